@@ -18,6 +18,18 @@ def create_app():
     bcrypt.init_app(app)
     db.init_app(app)
     
+    # Pool connection SQLite + pragma (WAL, busy_timeout, ...) dùng chung cho ORM và helper raw
+    from utils.database import init_engine
+    init_engine(app)
+    
+    # Hash / kiểm tra mật khẩu trên process pool riêng
+    from utils.password_hasher import PasswordHasher
+    PasswordHasher.init_app(app)
+    
+    # Cache chứng chỉ Google cho đăng nhập Google
+    from utils.google_certs import GoogleCertStore
+    GoogleCertStore.init_app(app)
+    
     # QUAN TRỌNG: Khởi tạo SocketIO
     socketio = SocketIO(app, cors_allowed_origins="*")
 
@@ -27,7 +39,7 @@ def create_app():
         stadium_bp, team_bp, match_bp,
         team_roster_bp, season_standing_bp, user_bp, prediction_bp,
         post_bp, like_bp, comment_bp, user_achievement_bp,
-        achievement_bp
+        achievement_bp, leaderboard_bp
     )
 
     # Register blueprints
@@ -46,6 +58,7 @@ def create_app():
     app.register_blueprint(comment_bp, url_prefix='/api')
     app.register_blueprint(user_achievement_bp, url_prefix='/api')
     app.register_blueprint(achievement_bp, url_prefix='/api')
+    app.register_blueprint(leaderboard_bp, url_prefix='/api')
     
     # Root endpoint
     @app.route('/')
@@ -66,13 +79,34 @@ def create_app():
             from models import (
                 User, Post, Comment, Like, Achievement, UserAchievement,
                 Prediction, Team, Player, Match, Season, Stadium, Referee,
-                TeamRoster, SeasonStanding, MatchLineup, MatchEvent, MatchReferee
+                TeamRoster, SeasonStanding, MatchLineup, MatchEvent, MatchReferee,
+                PlayerSeasonStats, MatchPredictionStats, MatchPredictionScore
             )
             db.create_all()
             print("✓ Database tables created successfully")
+
+            # Nâng cấp schema cho DB đã tồn tại (thêm cột/index mới)
+            from utils.migrations import run_migrations
+            run_migrations()
         except Exception as e:
             print(f"✗ Error creating database tables: {e}")
     
+    # Luồng ghi duy nhất gom commit cho like / bình luận / dự đoán
+    from utils.write_queue import WriteQueue
+    WriteQueue.init_app(app)
+    
+    # Mở khóa thành tựu theo sự kiện (chấm dự đoán, đăng bài, được like, ...)
+    from services.achievement_engine import AchievementEngine
+    AchievementEngine.register()
+    
+    # Tự chuyển trạng thái trận khi tới giờ đá (thay cho việc cập nhật trong API GET)
+    from services.match_scheduler import MatchStatusScheduler
+    MatchStatusScheduler.start(app)
+    
+    # Lệnh CLI bảo trì (flask --app run <lệnh>)
+    from commands import register_commands
+    register_commands(app)
+    
     # --- API MỚI: Kích hoạt AI ---
     @app.route('/api/ai/start', methods=['POST'])
     def start_ai_process():
@@ -0,0 +1,83 @@
+# bench/bench_auth.py
+# Đăng nhập dồn dập: bcrypt ngay trong luồng request so với process pool của PasswordHasher,
+# đo login/s, mã trả về và độ trễ /health chạy song song
+#   python bench/bench_auth.py [--workers 0|2] [--max-pending 32] [--logins 48] [--threads 8]
+import argparse
+import os
+import statistics
+import threading
+import time
+from collections import Counter
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=2, help='0 = hash ngay trong luồng request')
+    parser.add_argument('--max-pending', type=int, default=32)
+    parser.add_argument('--logins', type=int, default=48)
+    parser.add_argument('--threads', type=int, default=8)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # Phải đặt trước khi import common (common chỉ setdefault)
+    os.environ['PASSWORD_HASH_WORKERS'] = str(args.workers)
+    os.environ['PASSWORD_HASH_MAX_PENDING'] = str(args.max_pending)
+
+    from common import scratch_app, cleanup
+
+    app, path = scratch_app()
+    try:
+        from utils.password_hasher import PasswordHasher
+
+        client = app.test_client()
+        credentials = {'username': 'bench_auth', 'password': 'secret123'}
+        response = client.post('/api/auth/register', json=dict(credentials, email='bench_auth@example.com'))
+        assert response.status_code in (200, 201), response.get_json()
+
+        codes, login_latency, health_latency = [], [], []
+        stop = threading.Event()
+
+        def login_worker(count):
+            worker_client = app.test_client()
+            for _ in range(count):
+                started = time.perf_counter()
+                codes.append(worker_client.post('/api/auth/login', json=credentials).status_code)
+                login_latency.append(time.perf_counter() - started)
+
+        def health_worker():
+            worker_client = app.test_client()
+            while not stop.is_set():
+                started = time.perf_counter()
+                worker_client.get('/health')
+                health_latency.append(time.perf_counter() - started)
+                time.sleep(0.01)
+
+        health_thread = threading.Thread(target=health_worker)
+        health_thread.start()
+        started = time.perf_counter()
+        workers = [threading.Thread(target=login_worker, args=(args.logins // args.threads,))
+                   for _ in range(args.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        health_thread.join()
+
+        health_latency.sort()
+        mode = 'inline' if args.workers <= 0 else f'pool ({args.workers} workers, max_pending={args.max_pending})'
+        print(mode)
+        print(f"  codes {dict(Counter(codes))}, {len(codes) / elapsed:.1f} login/s, "
+              f"login p50 {statistics.median(login_latency) * 1000:.0f} ms")
+        print(f"  /health p50 {statistics.median(health_latency) * 1000:.1f} ms, "
+              f"p99 {health_latency[int(len(health_latency) * 0.99)] * 1000:.1f} ms, {len(health_latency)} requests")
+        PasswordHasher.shutdown()
+    finally:
+        cleanup(path)
+
+
+if __name__ == '__main__':
+    main()
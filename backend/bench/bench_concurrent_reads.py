@@ -0,0 +1,106 @@
+# bench/bench_concurrent_reads.py
+# Thông lượng đọc đồng thời: helper raw mở connection mới mỗi lần gọi (cách cũ)
+# so với pool connection dùng chung đã áp pragma (utils/database.py), có / không có luồng ghi
+#   python bench/bench_concurrent_reads.py [--threads 8] [--seconds 5] [--writer]
+import argparse
+import random
+import sqlite3
+import threading
+import time
+
+from common import scratch_app, cleanup
+
+MATCH_QUERY = '''
+    SELECT m.match_id, m.status, ht.name, at.name
+    FROM Matches m
+    JOIN Teams ht ON ht.team_id = m.home_team_id
+    JOIN Teams at ON at.team_id = m.away_team_id
+    WHERE m.match_id = ?
+'''
+EVENTS_QUERY = 'SELECT player_id, COUNT(*) FROM MatchEvents WHERE match_id = ? GROUP BY player_id'
+
+
+def run_for(seconds, threads, fn):
+    """Gọi fn liên tục trên threads luồng trong seconds giây, trả về số lần/giây"""
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def worker(i):
+        while not stop.is_set():
+            fn()
+            counts[i] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker_thread in workers:
+        worker_thread.join()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--writer', action='store_true', help='Thêm 1 luồng ghi liên tục')
+    args = parser.parse_args()
+
+    app, path = scratch_app()
+    try:
+        from sqlalchemy import text
+        from extensions import db
+        from utils.database import execute_query
+
+        with app.app_context():
+            match_ids = [row[0] for row in db.session.execute(text('SELECT match_id FROM Matches'))]
+
+        def per_call():
+            # Helper trước khi có pool: connect + pragma mỗi lần gọi
+            conn = sqlite3.connect(path)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA foreign_keys = ON')
+            for query in (MATCH_QUERY, EVENTS_QUERY):
+                [dict(row) for row in conn.execute(query, (random.choice(match_ids),))]
+            conn.close()
+
+        def pooled():
+            for query in (MATCH_QUERY, EVENTS_QUERY):
+                execute_query(query, (random.choice(match_ids),))
+
+        stop_writer = threading.Event()
+        writes = [0, 0]
+
+        def writer():
+            while not stop_writer.is_set():
+                with app.app_context():
+                    try:
+                        db.session.execute(text('UPDATE Users SET points = points WHERE user_id = 1'))
+                        db.session.commit()
+                        writes[0] += 1
+                    except Exception:
+                        db.session.rollback()
+                        writes[1] += 1
+                time.sleep(0.005)
+
+        for label, fn in (('connect per call', per_call), ('shared pool', pooled)):
+            writes[0] = writes[1] = 0
+            writer_thread = None
+            if args.writer:
+                stop_writer.clear()
+                writer_thread = threading.Thread(target=writer)
+                writer_thread.start()
+            rate = run_for(args.seconds, args.threads, fn)
+            if writer_thread:
+                stop_writer.set()
+                writer_thread.join()
+                print(f"{label:>18}: {rate:7.0f} reads/s  (writes ok {writes[0]}, failed {writes[1]})")
+            else:
+                print(f"{label:>18}: {rate:7.0f} reads/s")
+    finally:
+        cleanup(path)
+
+
+if __name__ == '__main__':
+    main()
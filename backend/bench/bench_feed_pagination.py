@@ -0,0 +1,78 @@
+# bench/bench_feed_pagination.py
+# Newsfeed: phân trang OFFSET (page/limit) so với keyset cursor ở trang đầu và trang sâu
+#   python bench/bench_feed_pagination.py [--posts 200000] [--limit 10] [--pages 1 500 15000]
+import argparse
+from datetime import datetime, timedelta
+
+from common import scratch_app, cleanup, timed
+
+
+def seed_posts(db, text, count):
+    """Thêm count bài viết, mỗi giây một bài, chia đều cho các user hiện có"""
+    user_ids = [row[0] for row in db.session.execute(text('SELECT user_id FROM Users'))]
+    start = datetime(2024, 1, 1)
+    rows = [{
+        'user_id': user_ids[i % len(user_ids)],
+        'title': f'Bài viết {i}',
+        'content': f'Nội dung bài viết số {i}',
+        'created_at': (start + timedelta(seconds=i)).strftime('%Y-%m-%d %H:%M:%S'),
+    } for i in range(count)]
+    db.session.execute(
+        text('INSERT INTO Posts (user_id, title, content, created_at) '
+             'VALUES (:user_id, :title, :content, :created_at)'),
+        rows
+    )
+    db.session.commit()
+
+
+def cursor_for_page(db, text, PostService, page, limit):
+    """Token cursor mà client sẽ có khi đã đi tới trang page"""
+    if page == 1:
+        return ''
+    created_at, post_id = db.session.execute(
+        text('SELECT CAST(created_at AS TEXT), post_id FROM Posts '
+             'ORDER BY created_at DESC, post_id DESC LIMIT 1 OFFSET :offset'),
+        {'offset': (page - 1) * limit - 1}
+    ).one()
+    return PostService._encode_cursor(created_at, post_id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=200000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 500, 15000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app, path = scratch_app()
+    try:
+        from sqlalchemy import text
+        from extensions import db
+        from services.post_service import PostService
+
+        with app.test_request_context():
+            seed_posts(db, text, args.posts)
+            print(f"{args.posts} bài, {args.limit} bài/trang (p50 / p99 ms)")
+
+            for page in args.pages:
+                def by_offset():
+                    result, error = PostService.get_all_posts(page=page, per_page=args.limit)
+                    assert error is None, error
+
+                token = cursor_for_page(db, text, PostService, page, args.limit)
+
+                def by_cursor():
+                    result, error = PostService.get_posts_by_cursor(token, args.limit)
+                    assert error is None, error
+
+                offset_p50, offset_p99 = timed(by_offset, args.repeat)
+                cursor_p50, cursor_p99 = timed(by_cursor, args.repeat)
+                print(f"  page {page:>6}: offset {offset_p50:6.1f} / {offset_p99:6.1f}"
+                      f"   cursor {cursor_p50:6.1f} / {cursor_p99:6.1f}")
+    finally:
+        cleanup(path)
+
+
+if __name__ == '__main__':
+    main()
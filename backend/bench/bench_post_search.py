@@ -0,0 +1,80 @@
+# bench/bench_post_search.py
+# Tìm kiếm bài viết: FTS5 PostsSearch (bm25 + snippet) so với LIKE cũ, và chi phí trigger khi ghi bài
+#   python bench/bench_post_search.py [--posts 50000] [--queries "Hà Nội" "ha noi" "thu"]
+import argparse
+import random
+import time
+
+from common import scratch_app, cleanup, timed
+
+WORDS = ['Hà Nội', 'Hoàng Anh Gia Lai', 'Công An Hà Nội', 'Thể Công', 'Đà Nẵng', 'Bình Dương',
+         'chuyển nhượng', 'thủ môn', 'tiền đạo', 'phạt đền', 'việt vị', 'bàn thắng', 'vòng đấu',
+         'trọng tài', 'đội hình', 'chấn thương', 'HLV', 'sân Hàng Đẫy', 'cổ động viên', 'V.League']
+
+
+def seed_posts(db, text, count):
+    """
+    Thêm count bài: mỗi bài 1 cụm trong WORDS giữa các từ đệm ngẫu nhiên (~5% bài khớp mỗi cụm),
+    trigger FTS5 chạy như khi đăng bài thật
+    """
+    rng = random.Random(7)
+    user_ids = [row[0] for row in db.session.execute(text('SELECT user_id FROM Users'))]
+    rows = [{
+        'user_id': user_ids[i % len(user_ids)],
+        'title': f'{rng.choice(WORDS)} tin{rng.randrange(5000)}',
+        'content': ' '.join([f'tu{rng.randrange(20000)}' for _ in range(40)] + [rng.choice(WORDS)]),
+    } for i in range(count)]
+    started = time.perf_counter()
+    db.session.execute(
+        text('INSERT INTO Posts (user_id, title, content) VALUES (:user_id, :title, :content)'), rows
+    )
+    db.session.commit()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=50000)
+    parser.add_argument('--queries', nargs='+', default=['Hà Nội', 'ha noi', 'phạt đền', 'phat den', 'thu'])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    app, path = scratch_app()
+    try:
+        from sqlalchemy import text
+        from extensions import db
+        from services.post_service import PostService
+
+        with app.test_request_context():
+            elapsed = seed_posts(db, text, args.posts)
+            print(f"{args.posts} bài: insert kèm trigger index {elapsed:.1f}s "
+                  f"({elapsed / args.posts * 1e6:.0f} µs/bài)")
+
+            started = time.perf_counter()
+            indexed, error = PostService.rebuild_search_index()
+            assert error is None, error
+            print(f"rebuild_search_index: {indexed} bài trong {time.perf_counter() - started:.1f}s")
+
+            print("trang 1, 10 bài (p50 / p99 ms)")
+            for query in args.queries:
+                def search():
+                    result, error = PostService.get_all_posts(page=1, per_page=10, search_query=query)
+                    assert error is None, error
+                    return result
+
+                PostService._search_index_exists = True
+                total = search()['total']
+                fts_p50, fts_p99 = timed(search, args.repeat)
+                PostService._search_index_exists = False
+                like_total = search()['total']
+                like_p50, like_p99 = timed(search, args.repeat)
+                PostService._search_index_exists = None
+
+                print(f"  {query!r:>18}: FTS5 {fts_p50:7.1f} / {fts_p99:7.1f} ({total} kết quả)"
+                      f"   LIKE {like_p50:7.1f} / {like_p99:7.1f} ({like_total} kết quả)")
+    finally:
+        cleanup(path)
+
+
+if __name__ == '__main__':
+    main()
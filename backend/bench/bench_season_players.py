@@ -0,0 +1,96 @@
+# bench/bench_season_players.py
+# /api/players/season/<id>: số câu SQL và thời gian của get_players_by_season (đọc PlayerSeasonStats)
+# so với cách cũ chạy 2 câu aggregate cho mỗi cầu thủ trong đội hình
+#   python bench/bench_season_players.py [--season-id 4] [--roster 2000]
+import argparse
+
+from common import scratch_app, cleanup, timed
+
+# Hai câu aggregate mỗi cầu thủ của bản trước khi gom nhóm (giữ lại làm mốc so sánh)
+PER_PLAYER_QUERIES = (
+    '''
+    SELECT COUNT(DISTINCT m.match_id) FROM MatchLineups ml
+    JOIN Matches m ON ml.match_id = m.match_id
+    WHERE ml.player_id = :player_id AND m.season_id = :season_id AND ml.team_id = :team_id
+    ''',
+    '''
+    SELECT COUNT(*),
+        SUM(CASE WHEN event_type = 'goal' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN event_type = 'yellow_card' THEN 1 ELSE 0 END)
+    FROM MatchEvents me JOIN Matches m ON me.match_id = m.match_id
+    WHERE me.player_id = :player_id AND m.season_id = :season_id AND me.team_id = :team_id
+    ''',
+)
+
+
+def pad_roster(db, text, season_id, size):
+    """Thêm cầu thủ giả vào đội hình mùa season_id cho đến khi đủ size dòng TeamRosters"""
+    current = db.session.execute(
+        text('SELECT COUNT(*) FROM TeamRosters WHERE season_id = :sid'), {'sid': season_id}
+    ).scalar()
+    team_ids = [row[0] for row in db.session.execute(
+        text('SELECT DISTINCT team_id FROM TeamRosters WHERE season_id = :sid'), {'sid': season_id}
+    )]
+    for i in range(max(size - current, 0)):
+        player_id = db.session.execute(
+            text("INSERT INTO Players (full_name, birth_date) VALUES (:name, '2000-01-01') RETURNING player_id"),
+            {'name': f'Bench Player {season_id}-{i}'}
+        ).scalar()
+        db.session.execute(
+            text('INSERT INTO TeamRosters (player_id, team_id, season_id) VALUES (:pid, :tid, :sid)'),
+            {'pid': player_id, 'tid': team_ids[i % len(team_ids)], 'sid': season_id}
+        )
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--season-id', type=int, default=4)
+    parser.add_argument('--roster', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    app, path = scratch_app()
+    try:
+        from sqlalchemy import event, text
+        from extensions import db
+        from services.player_statistics_service import PlayerStatisticsService
+
+        with app.app_context():
+            pad_roster(db, text, args.season_id, args.roster)
+            PlayerStatisticsService.rebuild_season_stats(args.season_id)
+
+            statements = [0]
+
+            def count(*_):
+                statements[0] += 1
+
+            def grouped():
+                return PlayerStatisticsService.get_players_by_season(args.season_id)
+
+            def per_player():
+                players = grouped()
+                for player in players:
+                    params = {'player_id': player['player_id'], 'season_id': args.season_id,
+                              'team_id': player['team_id']}
+                    for query in PER_PLAYER_QUERIES:
+                        db.session.execute(text(query), params).fetchone()
+                return players
+
+            event.listen(db.engine, 'before_cursor_execute', count)
+            try:
+                print(f"season {args.season_id} (p50 / p99 ms)")
+                for label, fn in (('per player', per_player), ('PlayerSeasonStats', grouped)):
+                    statements[0] = 0
+                    rows = len(fn())
+                    calls = statements[0]
+                    p50, p99 = timed(fn, args.repeat)
+                    print(f"  {label:>17}: {rows} players, {calls} statements, {p50:6.1f} / {p99:6.1f}")
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count)
+    finally:
+        cleanup(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# bench/common.py
+# Dựng app trên bản sao tạm của vleague.db cho các script benchmark (không ghi vào DB thật)
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault('MATCH_SCHEDULER_ENABLED', '0')
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+
+
+def copy_database(source=None):
+    """Sao chép DB (kể cả phần còn trong WAL) sang thư mục tạm, trả về đường dẫn bản sao"""
+    source = source or os.path.join(BACKEND_DIR, 'vleague.db')
+    target_dir = tempfile.mkdtemp(prefix='vleague-bench-')
+    target = os.path.join(target_dir, 'vleague.db')
+    src = sqlite3.connect(f'file:{source}?mode=ro', uri=True)
+    dst = sqlite3.connect(target)
+    with dst:
+        src.backup(dst)
+    src.close()
+    dst.close()
+    return target
+
+
+def scratch_app(source=None):
+    """(app, đường dẫn DB tạm): create_app() trỏ vào bản sao của vleague.db"""
+    from config import current_config
+
+    path = copy_database(source)
+    uri = f'sqlite:///{path}'
+    current_config.SQLALCHEMY_DATABASE_URI = uri
+    current_config.SQLALCHEMY_BINDS = {'read': dict(current_config.SQLALCHEMY_BINDS['read'], url=uri)}
+
+    from app import create_app
+    app, _ = create_app()
+    return app, path
+
+
+def cleanup(path):
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+def timed(fn, repeat=20):
+    """Chạy fn repeat lần (sau 1 lần làm nóng cache), trả về (p50, p99) tính bằng ms"""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))]
@@ -0,0 +1,100 @@
+# commands.py
+import click
+
+def register_commands(app):
+    """Đăng ký các lệnh bảo trì dữ liệu: flask --app run <lệnh>"""
+
+    @app.cli.command('reconcile-post-counters')
+    def reconcile_post_counters():
+        """Tính lại like_count / comment_count của Posts từ bảng Likes / Comments"""
+        from services.post_service import PostService
+
+        fixed, error = PostService.reconcile_counters()
+        if error:
+            raise click.ClickException(error)
+        click.echo(f"✓ Đã sửa bộ đếm cho {fixed} bài viết")
+
+    @app.cli.command('rebuild-post-search')
+    def rebuild_post_search():
+        """Dựng lại index tìm kiếm FTS5 của bài viết"""
+        from services.post_service import PostService
+
+        indexed, error = PostService.rebuild_search_index()
+        if error:
+            raise click.ClickException(error)
+        click.echo(f"✓ Đã index lại {indexed} bài viết")
+
+    @app.cli.command('rebuild-standings')
+    def rebuild_standings():
+        """Tính lại bảng xếp hạng mọi mùa giải từ kết quả trong bảng Matches"""
+        from services.season_standing_service import SeasonStandingService
+
+        written, error = SeasonStandingService.rebuild_all()
+        if error:
+            raise click.ClickException(error)
+        click.echo(f"✓ Đã ghi {written} dòng bảng xếp hạng")
+
+    @app.cli.command('rebuild-player-stats')
+    @click.option('--season-id', type=int, default=None, help='Chỉ tính lại 1 mùa')
+    def rebuild_player_stats(season_id):
+        """Tính lại bảng PlayerSeasonStats từ MatchLineups / MatchEvents"""
+        from services.player_statistics_service import PlayerStatisticsService
+
+        written, error = PlayerStatisticsService.rebuild_season_stats(season_id)
+        if error:
+            raise click.ClickException(error)
+        click.echo(f"✓ Đã ghi {written} dòng thống kê cầu thủ")
+
+    @app.cli.command('settle-predictions')
+    @click.option('--match-id', type=int, default=None, help='Chỉ chấm lại 1 trận')
+    def settle_predictions(match_id):
+        """Chấm điểm dự đoán của các trận đã kết thúc (chạy lại nhiều lần vẫn an toàn)"""
+        from services.prediction_service import PredictionService
+
+        if match_id:
+            settled, error = PredictionService.settle_match(match_id)
+        else:
+            settled, error = PredictionService.settle_finished_matches()
+        if error:
+            raise click.ClickException(error)
+        click.echo(f"✓ Đã chấm {settled} dự đoán")
+
+    @app.cli.command('backfill-achievement')
+    @click.argument('achievement_id', type=int)
+    @click.option('--chunk-size', type=int, default=None, help='Số user mỗi transaction')
+    def backfill_achievement(achievement_id, chunk_size):
+        """Mở khóa 1 thành tựu cho mọi user đã đủ điều kiện và cộng điểm thưởng"""
+        from services.achievement_engine import AchievementEngine
+
+        def report(done, total, unlocked):
+            click.echo(f"  {done}/{total} user_id, đã mở khóa {unlocked}")
+
+        unlocked, error = AchievementEngine.backfill_achievement(
+            achievement_id, chunk_size=chunk_size, progress=report
+        )
+        if error:
+            raise click.ClickException(error)
+        click.echo(f"✓ Đã mở khóa thành tựu {achievement_id} cho {unlocked} user")
+
+    @app.cli.command('rebuild-prediction-stats')
+    @click.option('--match-id', type=int, default=None, help='Chỉ tính lại 1 trận')
+    def rebuild_prediction_stats(match_id):
+        """Tính lại bộ đếm phân bố dự đoán (kết quả / tỉ số / thẻ phạt) từ bảng Predictions"""
+        from services.prediction_service import PredictionService
+
+        written, error = PredictionService.rebuild_distribution(match_id)
+        if error:
+            raise click.ClickException(error)
+        click.echo(f"✓ Đã tính lại phân bố dự đoán của {written} trận")
+
+    @app.cli.command('check-query-plans')
+    def check_query_plans():
+        """EXPLAIN QUERY PLAN các truy vấn đọc nóng, báo lỗi nếu bảng lớn bị quét toàn bộ (SCAN)"""
+        from utils.query_plans import check_query_plans as run_check
+
+        problems, checked = run_check()
+        for name, table, statement in problems:
+            click.echo(f"✗ {name}: SCAN {table}\n    {' '.join(statement.split())}")
+        if problems:
+            raise click.ClickException(f"{len(problems)} truy vấn quét toàn bảng / {checked} truy vấn")
+        click.echo(f"✓ {checked} truy vấn đều dùng index")
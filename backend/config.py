@@ -11,6 +11,21 @@ class Config:
     db_path = os.path.join(BASE_DIR, 'vleague.db').replace('\\', '/')
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Pool connection giữ mở lâu dài, pragma áp khi mở connection (utils/database.py)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': 30,
+    }
+    # Pool chỉ đọc (query_only) cho request GET, cùng file DB (utils/db_routing.py)
+    SQLALCHEMY_BINDS = {
+        'read': {
+            'url': SQLALCHEMY_DATABASE_URI,
+            'pool_size': int(os.getenv('DB_READ_POOL_SIZE', '20')),
+            'max_overflow': int(os.getenv('DB_READ_MAX_OVERFLOW', '20')),
+            'pool_timeout': 30,
+        }
+    }
     
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'fallback-secret-key'
@@ -19,6 +34,13 @@ class Config:
     
     # Bcrypt
     BCRYPT_LOG_ROUNDS = 12
+    # Hash mật khẩu trên process pool riêng (0 worker = hash ngay trong luồng request)
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '32'))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '5'))
+    
+    # Chứng chỉ Google cục bộ (JSON {kid: x509} hoặc JWKS) thay cho tải từ Google, dùng khi test / offline
+    GOOGLE_CERTS_FILE = os.getenv('GOOGLE_CERTS_FILE')
     
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*')
@@ -27,6 +49,14 @@ class Config:
     UPLOAD_FOLDER_POSTS = os.path.join(BASE_DIR, 'static/uploads/posts')
     MAX_CONTENT_LENGTH = 2 * 1024 * 1024  # Giới hạn file tối đa 2MB
 
+    # Luồng ghi duy nhất (utils/write_queue.py) gom nhiều thao tác ghi vào một transaction
+    WRITE_QUEUE_ENABLED = os.getenv('WRITE_QUEUE_ENABLED', '1') == '1'
+    WRITE_QUEUE_MAX_BATCH = int(os.getenv('WRITE_QUEUE_MAX_BATCH', '64'))
+    WRITE_QUEUE_TIMEOUT = float(os.getenv('WRITE_QUEUE_TIMEOUT', '10'))
+
+    # Luồng nền tự chuyển trạng thái trận khi tới giờ đá
+    MATCH_SCHEDULER_ENABLED = os.getenv('MATCH_SCHEDULER_ENABLED', '1') == '1'
+
 class DevelopmentConfig(Config):
     DEBUG = True
 
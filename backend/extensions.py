@@ -3,8 +3,10 @@ from flask_caching import Cache
 from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import SQLAlchemy
 from authlib.integrations.flask_client import OAuth
+from utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+# GET đọc qua engine 'read' (query_only), còn lại qua engine ghi (utils/db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
 cache = Cache()
 bcrypt = Bcrypt()
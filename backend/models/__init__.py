@@ -9,8 +9,11 @@ from .match_lineup import MatchLineup
 from .match_event import MatchEvent
 from .team_roster import TeamRoster
 from .season_standing import SeasonStanding
+from .player_season_stats import PlayerSeasonStats
 from .user import User
 from .prediction import Prediction
+from .match_prediction_stats import MatchPredictionStats
+from .match_prediction_score import MatchPredictionScore
 from .achievement import Achievement
 from .user_achievement import UserAchievement
 from .post import Post
@@ -20,6 +23,7 @@ from .comment import Comment
 __all__ = [
     'Player', 'Referee', 'Season', 'Stadium', 'Team',
     'Match', 'MatchReferee', 'MatchLineup', 'MatchEvent',
-    'TeamRoster', 'SeasonStanding','User', 'Prediction', 'Achievement', 'UserAchievement',
+    'TeamRoster', 'SeasonStanding', 'PlayerSeasonStats', 'User', 'Prediction',
+    'MatchPredictionStats', 'MatchPredictionScore', 'Achievement', 'UserAchievement',
     'Post', 'Like', 'Comment'
 ]
\ No newline at end of file
@@ -11,6 +11,12 @@ class Comment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Bình luận của bài / của user theo thời gian
+        db.Index('idx_comments_post_created', 'post_id', 'created_at'),
+        db.Index('idx_comments_user_created', 'user_id', 'created_at'),
+    )
+    
     def to_dict(self, include_user=False):
         result = {
             'comment_id': self.comment_id,
@@ -11,6 +11,8 @@ class Like(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint('user_id', 'post_id', name='unique_user_post_like'),
+        # Danh sách / số like của bài
+        db.Index('idx_likes_post', 'post_id'),
     )
     
     def to_dict(self):
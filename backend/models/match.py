@@ -1,6 +1,31 @@
 # models/match.py - sửa lại với relationships
 from extensions import db
 from datetime import datetime
+from sqlalchemy.orm import validates
+import re
+
+# Số vòng ở đầu chuỗi: "Vòng 12 LPBank V.League ...", "vòng 12", "12 ..."
+# Giữ đúng phạm vi của bộ lọc LIKE cũ, nên "Trận đấu sớm vòng 6 ..." không có số vòng
+_ROUND_NO_RE = re.compile(r'^(?:[Vv]òng )?(\d+)(?: |$)')
+
+def parse_round_no(round_text):
+    """Lấy số vòng từ chuỗi round tự do, None nếu không xác định được"""
+    if not round_text:
+        return None
+    m = _ROUND_NO_RE.match(round_text)
+    return int(m.group(1)) if m else None
+
+# Trận đá sớm / đá bù: "Trận đấu bù vòng 4 ..." được tính vào bảng xếp hạng vòng 4
+_ROUND_ANYWHERE_RE = re.compile(r'[Vv]òng (\d+)')
+
+def parse_standing_round(round_text, round_no=None):
+    """Vòng mà trận được tính trên bảng xếp hạng, None nếu không xác định được"""
+    if round_no is not None:
+        return round_no
+    if not round_text:
+        return None
+    m = _ROUND_NO_RE.match(round_text) or _ROUND_ANYWHERE_RE.search(round_text)
+    return int(m.group(1)) if m else None
 
 class Match(db.Model):
     __tablename__ = 'Matches'
@@ -8,6 +33,7 @@ class Match(db.Model):
     match_id = db.Column(db.Integer, primary_key=True)
     season_id = db.Column(db.Integer, db.ForeignKey('Seasons.season_id'), nullable=False)
     round = db.Column(db.String(50))
+    round_no = db.Column(db.Integer)  # Tự tính từ round, dùng để lọc theo vòng
     match_datetime = db.Column(db.DateTime, nullable=False)
     home_team_id = db.Column(db.Integer, db.ForeignKey('Teams.team_id'), nullable=False)
     away_team_id = db.Column(db.Integer, db.ForeignKey('Teams.team_id'), nullable=False)
@@ -26,6 +52,21 @@ class Match(db.Model):
     lineups = db.relationship('MatchLineup', backref='match', cascade='all, delete-orphan')
     events = db.relationship('MatchEvent', backref='match', cascade='all, delete-orphan')
     
+    __table_args__ = (
+        # Tìm giờ bóng lăn kế tiếp / các trận tới giờ đá theo trạng thái
+        db.Index('idx_matches_status_datetime', 'status', 'match_datetime'),
+        # Lọc theo mùa + vòng, sắp xếp theo giờ đá
+        db.Index('idx_matches_season_round_datetime', 'season_id', 'round_no', 'match_datetime'),
+        # Lịch thi đấu của 1 đội (home_team_id = ? OR away_team_id = ?)
+        db.Index('idx_matches_home_team', 'home_team_id'),
+        db.Index('idx_matches_away_team', 'away_team_id'),
+    )
+    
+    @validates('round')
+    def _sync_round_no(self, key, value):
+        self.round_no = parse_round_no(value)
+        return value
+    
     def to_dict(self, include_related=False):
         """Chuyển đổi object thành dictionary"""
         result = {
@@ -10,6 +10,13 @@ class MatchEvent(db.Model):
     event_type = db.Column(db.String(50), nullable=False)
     minute = db.Column(db.Integer, nullable=False)
     
+    __table_args__ = (
+        # Sự kiện của trận (chi tiết trận, thống kê thẻ)
+        db.Index('idx_match_events_match', 'match_id'),
+        # Sự kiện của cầu thủ theo trận (thống kê cầu thủ)
+        db.Index('idx_match_events_player_match', 'player_id', 'match_id'),
+    )
+    
     # Relationships
     team = db.relationship('Team', backref='match_events')
     player = db.relationship('Player', backref='match_events')
\ No newline at end of file
@@ -17,4 +17,6 @@ class MatchLineup(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint('match_id', 'player_id', name='unique_match_player'),
+        # Các trận cầu thủ ra sân (thống kê cầu thủ)
+        db.Index('idx_match_lineups_player', 'player_id'),
     )
\ No newline at end of file
@@ -0,0 +1,24 @@
+from extensions import db
+
+class MatchPredictionScore(db.Model):
+    """Số dự đoán theo từng tỉ số của trận (histogram tỉ số)"""
+    __tablename__ = 'MatchPredictionScores'
+
+    score_id = db.Column(db.Integer, primary_key=True)
+    match_id = db.Column(db.Integer, db.ForeignKey('Matches.match_id'), nullable=False)
+    home_score = db.Column(db.Integer, nullable=False)
+    away_score = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    __table_args__ = (
+        db.UniqueConstraint('match_id', 'home_score', 'away_score', name='uq_match_prediction_score'),
+    )
+
+    def to_dict(self):
+        return {
+            'score_id': self.score_id,
+            'match_id': self.match_id,
+            'home_score': self.home_score,
+            'away_score': self.away_score,
+            'count': self.count
+        }
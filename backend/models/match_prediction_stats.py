@@ -0,0 +1,24 @@
+from extensions import db
+
+class MatchPredictionStats(db.Model):
+    """Số dự đoán theo kết quả / thẻ phạt của từng trận, cập nhật khi tạo / sửa / xóa dự đoán"""
+    __tablename__ = 'MatchPredictionStats'
+
+    match_id = db.Column(db.Integer, db.ForeignKey('Matches.match_id'), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    home_win = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    draw = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    away_win = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    cards_over = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    cards_under = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def to_dict(self):
+        return {
+            'match_id': self.match_id,
+            'total': self.total,
+            'home_win': self.home_win,
+            'draw': self.draw,
+            'away_win': self.away_win,
+            'cards_over': self.cards_over,
+            'cards_under': self.cards_under
+        }
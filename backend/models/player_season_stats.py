@@ -0,0 +1,41 @@
+from extensions import db
+
+class PlayerSeasonStats(db.Model):
+    """Thống kê cộng dồn của cầu thủ theo đội + mùa, cập nhật khi thêm sự kiện / đội hình"""
+    __tablename__ = 'PlayerSeasonStats'
+
+    stat_id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('Players.player_id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('Teams.team_id'), nullable=False)
+    season_id = db.Column(db.Integer, db.ForeignKey('Seasons.season_id'), nullable=False)
+    appearances = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    starts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_events = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    goals = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    assists = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    yellow_cards = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    red_cards = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    substitutions_in = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    substitutions_out = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    __table_args__ = (
+        db.UniqueConstraint('player_id', 'team_id', 'season_id', name='uq_player_team_season_stats'),
+        db.Index('idx_player_season_stats_season', 'season_id', 'team_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'stat_id': self.stat_id,
+            'player_id': self.player_id,
+            'team_id': self.team_id,
+            'season_id': self.season_id,
+            'appearances': self.appearances,
+            'starts': self.starts,
+            'total_events': self.total_events,
+            'goals': self.goals,
+            'assists': self.assists,
+            'yellow_cards': self.yellow_cards,
+            'red_cards': self.red_cards,
+            'substitutions_in': self.substitutions_in,
+            'substitutions_out': self.substitutions_out
+        }
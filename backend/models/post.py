@@ -21,6 +21,10 @@ class Post(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Bộ đếm lưu sẵn, cập nhật cùng transaction khi like/comment thay đổi
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Quan hệ (Relationships)
     # user = db.relationship('User', backref='posts')
     match = db.relationship('Match', backref='posts')
@@ -31,7 +35,16 @@ class Post(db.Model):
     likes = db.relationship('Like', backref='post', cascade='all, delete-orphan')
     comments = db.relationship('Comment', backref='post', cascade='all, delete-orphan')
     
-    def to_dict(self, current_user_id=None):
+    __table_args__ = (
+        # Phục vụ newsfeed phân trang keyset ORDER BY created_at DESC, post_id DESC
+        db.Index('idx_posts_created_at_post_id', 'created_at', 'post_id'),
+        # Đếm bài / like theo người đăng (điều kiện thành tựu TOTAL_POSTS, LIKES_RECEIVED)
+        db.Index('idx_posts_user_id', 'user_id'),
+    )
+    
+    def to_dict(self, current_user_id=None, like_count=None, comment_count=None, is_liked=None):
+        # like_count / comment_count / is_liked có thể được truyền sẵn (đã gom theo trang),
+        # mặc định đọc từ cột đếm để không phải load toàn bộ likes/comments của bài
         result = {
             'post_id': self.post_id,
             'user_id': self.user_id,
@@ -40,8 +53,8 @@ class Post(db.Model):
             'image_url': self.image_url,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'like_count': len(self.likes),
-            'comment_count': len(self.comments),
+            'like_count': like_count if like_count is not None else (self.like_count or 0),
+            'comment_count': comment_count if comment_count is not None else (self.comment_count or 0),
         }
         
         # Info người đăng
@@ -55,18 +68,20 @@ class Post(db.Model):
 
         # Check xem user hiện tại đã like bài này chưa
         result['is_liked'] = False
-        if current_user_id:
+        if is_liked is not None:
+            result['is_liked'] = is_liked
+        elif current_user_id:
             for like in self.likes:
-                if like.user_id == current_user_id:
+                if str(like.user_id) == str(current_user_id):
                     result['is_liked'] = True
                     break
 
         # Info đối tượng được tag (nếu có)
-        if self.match_id and self.match:
-            result['match'] = {'match_id': self.match.match_id, 'name': f"Match #{self.match.match_id}"}
+        if self.match_id:
+            result['match'] = {'match_id': self.match_id, 'name': f"Match #{self.match_id}"}
         if self.team_id and self.team:
             result['team'] = {'team_id': self.team.team_id, 'name': self.team.name}
         if self.player_id and self.player:
-            result['player'] = {'player_id': self.player.player_id, 'name': self.player.name}
+            result['player'] = {'player_id': self.player.player_id, 'name': self.player.full_name}
             
         return result
\ No newline at end of file
@@ -34,6 +34,10 @@ class Prediction(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint('user_id', 'match_id', name='unique_user_match_prediction'),
+        # Lịch sử dự đoán của user (mới nhất trước)
+        db.Index('idx_predictions_user_created', 'user_id', 'created_at'),
+        # Dự đoán theo trận (chấm điểm, phân bố, danh sách dự đoán của trận)
+        db.Index('idx_predictions_match', 'match_id'),
     )
     
     def to_dict(self, include_match=False):
@@ -17,6 +17,8 @@ class TeamRoster(db.Model):
     __table_args__ = (
         db.UniqueConstraint('player_id', 'season_id', name='uk_player_season'),
         db.UniqueConstraint('team_id', 'season_id', 'shirt_number', name='uk_team_season_shirt'),
+        # Đội hình theo mùa / mùa + đội
+        db.Index('idx_team_rosters_season_team', 'season_id', 'team_id'),
     )
     
     def to_dict(self, include_related=False):
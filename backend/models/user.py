@@ -1,5 +1,6 @@
 # models/user.py
-from extensions import db, bcrypt
+from extensions import db
+from utils.password_hasher import PasswordHasher
 from datetime import datetime
 
 class User(db.Model):
@@ -26,12 +27,16 @@ class User(db.Model):
     achievements = db.relationship('UserAchievement', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     
     def set_password(self, password):
-        """Hash và lưu password"""
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        """Hash và lưu password (chạy trên process pool, có thể raise PasswordHasherBusy)"""
+        self.password_hash = PasswordHasher.hash(password)
     
     def check_password(self, password):
-        """Kiểm tra password"""
-        return bcrypt.check_password_hash(self.password_hash, password)
+        """Kiểm tra password (chạy trên process pool, có thể raise PasswordHasherBusy)"""
+        return PasswordHasher.check(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Hash cũ được tạo với BCRYPT_LOG_ROUNDS khác cấu hình hiện tại"""
+        return PasswordHasher.needs_rehash(self.password_hash)
     
     def to_dict(self):
         """Chuyển đổi thành dictionary"""
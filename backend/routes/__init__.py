@@ -13,13 +13,15 @@ from .like_routes import like_bp
 from .comment_routes import comment_bp
 from .user_achievement_routes import user_achievement_bp
 from .achievement_routes import achievement_bp
+from .leaderboard_routes import leaderboard_bp
 
 
 __all__ = [
     'player_bp', 'referee_bp', 'season_bp',
     'stadium_bp', 'team_bp', 'match_bp',
     'team_roster_bp', 'season_standing_bp','user_bp', 'prediction_bp', 
-    'post_bp', 'like_bp', 'comment_bp', 'user_achievement_bp', 'achievement_bp'
+    'post_bp', 'like_bp', 'comment_bp', 'user_achievement_bp', 'achievement_bp',
+    'leaderboard_bp'
 ]
 
 # Dictionary để dễ truy cập
@@ -38,5 +40,6 @@ blueprints = {
     'likes': like_bp,
     'comments': comment_bp,
     'user_achievements': user_achievement_bp,
-    'achievements': achievement_bp
+    'achievements': achievement_bp,
+    'leaderboard': leaderboard_bp
 }
\ No newline at end of file
@@ -0,0 +1,42 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from services.leaderboard_service import LeaderboardService
+
+leaderboard_bp = Blueprint('leaderboard', __name__)
+
+@leaderboard_bp.route('/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """
+    Bảng xếp hạng dự đoán
+    ?scope=overall|season|round&season_id=&round=&page=&per_page=
+    (season/round không có season_id thì lấy mùa mới nhất)
+    """
+    result, error = LeaderboardService.get_leaderboard(
+        scope=request.args.get('scope', 'overall'),
+        season_id=request.args.get('season_id', type=int),
+        round_no=request.args.get('round', type=int),
+        page=request.args.get('page', 1, type=int),
+        per_page=request.args.get('per_page', 20, type=int)
+    )
+    if error:
+        return jsonify({'status': 'error', 'message': error}), 400
+
+    return jsonify({'status': 'success', 'data': result}), 200
+
+@leaderboard_bp.route('/leaderboard/me', methods=['GET'])
+@jwt_required()
+def get_my_rank():
+    """Hạng của user đang đăng nhập + ?neighbours= người đứng trên/dưới"""
+    current_user_id = int(get_jwt_identity())
+
+    result, error = LeaderboardService.get_user_rank(
+        current_user_id,
+        scope=request.args.get('scope', 'overall'),
+        season_id=request.args.get('season_id', type=int),
+        round_no=request.args.get('round', type=int),
+        neighbours=request.args.get('neighbours', 2, type=int)
+    )
+    if error:
+        return jsonify({'status': 'error', 'message': error}), 400
+
+    return jsonify({'status': 'success', 'data': result}), 200
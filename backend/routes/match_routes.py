@@ -2,8 +2,6 @@ from flask import Blueprint, request, jsonify
 from services.match_service import MatchService
 from models.match import Match
 from extensions import db
-from sqlalchemy import desc
-from services.team_service import TeamService
 
 match_bp = Blueprint('matches', __name__)
 
@@ -27,7 +25,7 @@ def match_to_dict(match):
 @match_bp.route('/matches', methods=['GET'])
 def get_matches():
     try:
-        MatchService.update_match_statuses()
+        # Trạng thái trận do MatchStatusScheduler cập nhật, API GET chỉ đọc
         # Lấy tham số phân trang từ query string
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
@@ -40,85 +38,23 @@ def get_matches():
         # Debug log
         print(f"API Request - season_id: {season_id}, round: {round}, status: {status}")
         
-        # Xây dựng query
-        query = Match.query
+        result, error = MatchService.get_matches_list(
+            page=page, per_page=per_page,
+            season_id=season_id, round=round, status=status
+        )
+        if error:
+            raise Exception(error)
         
-        if season_id:
-            query = query.filter(Match.season_id == season_id)
-        
-        if round:
-            # Tìm kiếm theo vòng đấu, có thể là "Vòng 26" hoặc "26"
-            # Nếu người dùng chỉ nhập số, tìm cả "Vòng {số}"
-            if round:
-                if round.isdigit():
-                    # Chỉ tìm chính xác "Vòng {số}"
-                    query = query.filter(
-                        db.or_(
-                            Match.round == f"Vòng {round}",
-                            Match.round.like(f"Vòng {round} %"),
-                            Match.round == round,
-                            Match.round.like(f"{round} %")
-                        )
-                    )
-                else:
-                    query = query.filter(Match.round.like(f'%{round}%'))
-        
-        if status:
-            query = query.filter(Match.status == status)
-        
-        # Sắp xếp mới nhất trước
-        query = query.order_by(desc(Match.match_datetime))
-        
-        # Phân trang
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        print(f"Found {pagination.total} matches")
-        
-        # Chuyển đổi kết quả
-        matches_data = []
-        for match in pagination.items:
-            match_dict = {
-                'match_id': match.match_id,
-                'season_id': match.season_id,
-                'round': match.round,
-                'match_datetime': match.match_datetime.isoformat() if match.match_datetime else None,
-                'home_team_id': match.home_team_id,
-                'away_team_id': match.away_team_id,
-                'home_score': match.home_score,
-                'away_score': match.away_score,
-                'status': match.status,
-                'stadium_id': match.stadium_id,
-                'match_url': match.match_url
-            }
-            
-            # Thêm thông tin liên quan
-            if match.season:
-                match_dict['season_name'] = match.season.name
-            if match.home_team:
-                match_dict['home_team'] = {
-                    'id': match.home_team.team_id,
-                    'name': match.home_team.name,
-                    'logo_url': TeamService._process_logo_url(match.home_team.logo_url)
-                }
-            if match.away_team:
-                match_dict['away_team'] = {
-                    'id': match.away_team.team_id,
-                    'name': match.away_team.name,
-                    'logo_url': TeamService._process_logo_url(match.away_team.logo_url)
-                }
-            if match.stadium:
-                match_dict['stadium_name'] = match.stadium.name
-            
-            matches_data.append(match_dict)
+        print(f"Found {result['total']} matches")
         
         return jsonify({
             'status': 'success',
-            'data': matches_data,
-            'page': pagination.page,
-            'per_page': pagination.per_page,
-            'total': pagination.total,
-            'has_next': pagination.has_next,
-            'has_prev': pagination.has_prev
+            'data': result['matches'],
+            'page': result['page'],
+            'per_page': result['per_page'],
+            'total': result['total'],
+            'has_next': result['has_next'],
+            'has_prev': result['has_prev']
         }), 200
         
     except Exception as e:
@@ -2,6 +2,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.post_service import PostService
+from utils.write_queue import WriteQueue
 
 post_bp = Blueprint('post_bp', __name__)
 
@@ -19,17 +20,23 @@ def create_post():
     return jsonify({"status": "success", "data": result}), 201
 
 # 2. Lấy Newsfeed (Phân trang)
+# - Client mới: gửi ?cursor= (rỗng ở trang đầu), dùng next_cursor cho trang sau
+# - Client cũ: ?page=&limit= như trước
 @post_bp.route('', methods=['GET'])
 @jwt_required(optional=True) # Optional: để khách vãng lai cũng xem được
 def get_posts():
     current_user_id = get_jwt_identity()
     page = request.args.get('page', 1, type=int)
     limit = request.args.get('limit', 10, type=int)
+    cursor = request.args.get('cursor', type=str)
     
     # Lấy thêm tham số search
     search = request.args.get('search', '', type=str)
 
-    result, error = PostService.get_all_posts(page, limit, current_user_id, search_query=search)
+    if cursor is not None:
+        result, error = PostService.get_posts_by_cursor(cursor, limit, current_user_id, search_query=search)
+    else:
+        result, error = PostService.get_all_posts(page, limit, current_user_id, search_query=search)
     
     if error:
         return jsonify({"status": "error", "message": error}), 400
@@ -54,7 +61,8 @@ def like_post(post_id):
     action, error = PostService.toggle_like(user_id, post_id)
     
     if error:
-        return jsonify({"status": "error", "message": error}), 400
+        body, status = WriteQueue.error_response(error, 400)
+        return jsonify(body), status
     return jsonify({"status": "success", "message": action}), 200
 
 # 5. Comment
@@ -67,7 +75,8 @@ def comment_post(post_id):
     result, error = PostService.add_comment(user_id, post_id, data.get('content'))
     
     if error:
-        return jsonify({"status": "error", "message": error}), 400
+        body, status = WriteQueue.error_response(error, 400)
+        return jsonify(body), status
     return jsonify({"status": "success", "data": result}), 201
 
 # 6. Xóa bài viết
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.prediction_service import PredictionService
+from utils.write_queue import WriteQueue
 from models.prediction import Prediction
 from extensions import db
 
@@ -64,10 +65,8 @@ def create_prediction():
         )
         
         if error:
-            return jsonify({
-                'status': 'error',
-                'message': error
-            }), 400
+            body, status = WriteQueue.error_response(error, 400)
+            return jsonify(body), status
         
         return jsonify({
             'status': 'success',
@@ -81,6 +80,39 @@ def create_prediction():
             'message': str(e)
         }), 500
 
+@prediction_bp.route('/predictions/batch', methods=['POST'])
+@jwt_required()
+def save_predictions_batch():
+    """
+    Tạo / cập nhật nhiều dự đoán cùng lúc: {"predictions": [{match_id, predicted_...}, ...]}
+    Trả về kết quả từng dự đoán (created / updated / error) theo thứ tự gửi lên
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.json or {}
+        
+        results, error = PredictionService.save_predictions_batch(
+            user_id=current_user_id,
+            items=data.get('predictions')
+        )
+        
+        if error:
+            body, status = WriteQueue.error_response(error, 400)
+            return jsonify(body), status
+        
+        saved = sum(1 for result in results if result['status'] != 'error')
+        return jsonify({
+            'status': 'success',
+            'message': f'Saved {saved}/{len(results)} predictions',
+            'data': results
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
 @prediction_bp.route('/predictions/<int:prediction_id>', methods=['PUT'])
 @jwt_required()
 def update_prediction(prediction_id):
@@ -102,10 +134,8 @@ def update_prediction(prediction_id):
         
         if error:
             print(f"API: Update error: {error}")
-            return jsonify({
-                'status': 'error',
-                'message': error
-            }), 400
+            body, status = WriteQueue.error_response(error, 400)
+            return jsonify(body), status
         
         # Đảm bảo trả về đúng cấu trúc
         result = {
@@ -143,10 +173,8 @@ def delete_prediction(prediction_id):
         
         if error:
             print(f"API DELETE: Error - {error}")
-            return jsonify({
-                'status': 'error',
-                'message': error
-            }), 400
+            body, status = WriteQueue.error_response(error, 400)
+            return jsonify(body), status
         
         return jsonify({
             'status': 'success',
@@ -239,6 +267,23 @@ def get_match_predictions(match_id):
             'message': str(e)
         }), 500
 
+@prediction_bp.route('/predictions/match/<int:match_id>/summary', methods=['GET'])
+def get_match_prediction_summary(match_id):
+    """
+    Tỉ lệ dự đoán của trận (kết quả, tỉ số, thẻ phạt) - thay cho việc tải toàn bộ dự đoán (public)
+    """
+    summary, error = PredictionService.get_match_prediction_summary(match_id)
+    
+    if error == "Match not found":
+        return jsonify({'status': 'error', 'message': error}), 404
+    if error:
+        return jsonify({'status': 'error', 'message': error}), 500
+    
+    return jsonify({
+        'status': 'success',
+        'data': summary
+    }), 200
+
 @prediction_bp.route('/predictions/check/<int:match_id>', methods=['GET'])
 @jwt_required()
 def check_user_prediction(match_id):
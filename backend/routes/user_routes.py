@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from services.user_service import UserService
+from utils.password_hasher import PasswordHasher
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.user import User
 from werkzeug.utils import secure_filename
@@ -16,7 +17,8 @@ def register():
     result, error = UserService.register_user(data)
     
     if error:
-        return jsonify({"status": "error", "message": error}), 400
+        status = 503 if error == PasswordHasher.BUSY_MESSAGE else 400
+        return jsonify({"status": "error", "message": error}), status
     
     return jsonify({"status": "success", "data": result}), 201
 
@@ -27,7 +29,8 @@ def login():
     result, error = UserService.login_user(data)
     
     if error:
-        return jsonify({"status": "error", "message": error}), 401
+        status = 503 if error == PasswordHasher.BUSY_MESSAGE else 401
+        return jsonify({"status": "error", "message": error}), status
         
     return jsonify({"status": "success", "data": result}), 200
 
@@ -2,7 +2,9 @@
 from app import create_app
 
 # Unpack cả app và socketio
-app, socketio = create_app()
+# Tiến trình con của pool hash mật khẩu (spawn) import lại file này dưới tên __mp_main__ -> không tạo app ở đó
+if __name__ != '__mp_main__':
+    app, socketio = create_app()
 
 if __name__ == '__main__':
     # Dùng socketio.run thay vì app.run để hỗ trợ WebSocket
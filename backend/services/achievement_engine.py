@@ -0,0 +1,303 @@
+# services/achievement_engine.py
+import threading
+import time
+from functools import partial
+from flask import current_app
+from sqlalchemy import text, bindparam
+from extensions import db
+from services.leaderboard_service import LeaderboardService
+from utils import events
+
+class AchievementEngine:
+    """
+    Mở khóa thành tựu theo sự kiện: luật (Achievements) được giữ trong bộ nhớ theo
+    condition_type, mỗi sự kiện chỉ xét các loại điều kiện nó làm thay đổi,
+    và mở khóa bằng 1 câu INSERT ... SELECT bỏ qua thành tựu user đã có
+    """
+    # Loại điều kiện -> biểu thức SQL giá trị hiện tại của user (bảng Users alias u)
+    CONDITION_SQL = {
+        'TOTAL_POINTS': 'COALESCE(u.points, 0)',
+        'CORRECT_PREDICTIONS': 'COALESCE(u.correct_predictions, 0)',
+        'TOTAL_PREDICTIONS': 'COALESCE(u.total_predictions, 0)',
+        'PERFECT_PREDICTIONS': '''(
+            SELECT COUNT(*) FROM Predictions p
+            JOIN Matches m ON m.match_id = p.match_id
+            WHERE p.user_id = u.user_id AND p.status != 'PENDING'
+              AND p.predicted_home_score = m.home_score
+              AND p.predicted_away_score = m.away_score
+        )''',
+        'TOTAL_POSTS': '(SELECT COUNT(*) FROM Posts WHERE user_id = u.user_id)',
+        'LIKES_RECEIVED': '(SELECT COALESCE(SUM(like_count), 0) FROM Posts WHERE user_id = u.user_id)',
+    }
+
+    # Sự kiện -> các loại điều kiện cần xét lại
+    EVENT_CONDITIONS = {
+        events.PREDICTION_SETTLED: (
+            'TOTAL_POINTS', 'CORRECT_PREDICTIONS', 'TOTAL_PREDICTIONS', 'PERFECT_PREDICTIONS'
+        ),
+        events.POINTS_AWARDED: ('TOTAL_POINTS',),
+        events.POST_CREATED: ('TOTAL_POSTS',),
+        events.LIKE_RECEIVED: ('LIKES_RECEIVED',),
+    }
+
+    # Số user mỗi câu INSERT ... SELECT (giới hạn số tham số của SQLite)
+    USER_CHUNK_SIZE = 500
+    # Điểm thưởng có thể mở tiếp thành tựu TOTAL_POINTS, xét lại tối đa từng ấy lượt
+    MAX_REWARD_ROUNDS = 5
+    # Danh mục thành tựu có thể bị sửa ở process khác
+    RULES_TTL_SECONDS = 300
+
+    # Số user mỗi transaction khi chạy bù 1 thành tựu cho toàn bộ Users
+    BACKFILL_CHUNK_SIZE = 10000
+
+    _event_handlers = {}   # event -> handler đã subscribe (partial mới không bằng partial cũ)
+
+    _backfills_running = set()
+    _backfills_lock = threading.Lock()
+
+    _rules = None          # condition_type -> [achievement dict] theo condition_value tăng dần
+    _rules_by_id = None
+    _rules_loaded_at = 0
+    _rules_lock = threading.Lock()
+
+    @staticmethod
+    def register():
+        """Đăng ký nhận các sự kiện nghiệp vụ; gọi lại (mỗi create_app) không đăng ký trùng"""
+        for event, condition_types in AchievementEngine.EVENT_CONDITIONS.items():
+            handler = AchievementEngine._event_handlers.setdefault(
+                event, partial(AchievementEngine._on_event, condition_types)
+            )
+            events.subscribe(event, handler)
+
+    @staticmethod
+    def _on_event(condition_types, user_ids=(), **payload):
+        AchievementEngine.evaluate(user_ids, condition_types)
+
+    @staticmethod
+    def invalidate_rules():
+        with AchievementEngine._rules_lock:
+            AchievementEngine._rules = None
+
+    @staticmethod
+    def _get_rules():
+        with AchievementEngine._rules_lock:
+            expired = time.monotonic() - AchievementEngine._rules_loaded_at > AchievementEngine.RULES_TTL_SECONDS
+            if AchievementEngine._rules is None or expired:
+                from services.achievement_service import AchievementService
+
+                rules = {}
+                rules_by_id = {}
+                for achievement in AchievementService.get_all_achievements():
+                    rules.setdefault(achievement['condition_type'], []).append(achievement)
+                    rules_by_id[achievement['achievement_id']] = achievement
+                AchievementEngine._rules = rules
+                AchievementEngine._rules_by_id = rules_by_id
+                AchievementEngine._rules_loaded_at = time.monotonic()
+            return AchievementEngine._rules, AchievementEngine._rules_by_id
+
+    @staticmethod
+    def _unlock(user_ids, condition_types, rules):
+        """
+        Ghi UserAchievements cho các thành tựu thuộc condition_types mà user đạt điều kiện
+        nhưng chưa có. Chưa commit. Trả về list (user_id, achievement_id) vừa mở khóa
+        """
+        achievement_ids = [
+            achievement['achievement_id']
+            for condition_type in condition_types
+            for achievement in rules[condition_type]
+        ]
+        current_value = ' '.join(
+            f"WHEN '{condition_type}' THEN {AchievementEngine.CONDITION_SQL[condition_type]}"
+            for condition_type in condition_types
+        )
+        query = text(f'''
+            INSERT INTO UserAchievements (user_id, achievement_id)
+            SELECT u.user_id, a.achievement_id
+            FROM Users u
+            JOIN Achievements a ON a.achievement_id IN :achievement_ids
+            WHERE u.user_id IN :user_ids
+              AND a.condition_value <= CASE a.condition_type {current_value} END
+              AND NOT EXISTS (
+                  SELECT 1 FROM UserAchievements ua
+                  WHERE ua.user_id = u.user_id AND ua.achievement_id = a.achievement_id
+              )
+            RETURNING user_id, achievement_id
+        ''').bindparams(
+            bindparam('achievement_ids', expanding=True),
+            bindparam('user_ids', expanding=True)
+        )
+
+        unlocked = []
+        chunk_size = AchievementEngine.USER_CHUNK_SIZE
+        for start in range(0, len(user_ids), chunk_size):
+            unlocked.extend(db.session.execute(query, {
+                'achievement_ids': achievement_ids,
+                'user_ids': user_ids[start:start + chunk_size]
+            }).fetchall())
+        return unlocked
+
+    @staticmethod
+    def evaluate(user_ids, condition_types=None):
+        """
+        Xét và mở khóa thành tựu cho các user (chỉ các loại điều kiện được chỉ định,
+        None = tất cả), cộng điểm thưởng. Trả về {user_id: [thành tựu vừa mở khóa]}
+        """
+        try:
+            rules, rules_by_id = AchievementEngine._get_rules()
+            condition_types = [
+                condition_type
+                for condition_type in (condition_types or rules)
+                if condition_type in rules and condition_type in AchievementEngine.CONDITION_SQL
+            ]
+            user_ids = sorted({int(user_id) for user_id in user_ids})
+            if not condition_types or not user_ids:
+                return {}
+
+            unlocked = {}
+            awarded = {}
+            for _ in range(AchievementEngine.MAX_REWARD_ROUNDS):
+                rewards = {}
+                for user_id, achievement_id in AchievementEngine._unlock(user_ids, condition_types, rules):
+                    achievement = rules_by_id[achievement_id]
+                    unlocked.setdefault(user_id, []).append(achievement)
+                    if (achievement.get('points_reward') or 0) > 0:
+                        rewards[user_id] = rewards.get(user_id, 0) + achievement['points_reward']
+
+                if not rewards:
+                    break
+                db.session.execute(text('''
+                    UPDATE Users SET points = COALESCE(points, 0) + :points WHERE user_id = :user_id
+                '''), [{'user_id': user_id, 'points': points} for user_id, points in rewards.items()])
+                for user_id, points in rewards.items():
+                    awarded[user_id] = awarded.get(user_id, 0) + points
+
+                # Điểm thưởng vừa cộng có thể đủ mốc TOTAL_POINTS tiếp theo
+                if 'TOTAL_POINTS' not in rules:
+                    break
+                user_ids = sorted(rewards)
+                condition_types = ['TOTAL_POINTS']
+
+            with LeaderboardService.write_lock:
+                db.session.commit()
+                LeaderboardService.apply_points(awarded)
+
+            if unlocked:
+                print(f"🏆 SYSTEM: Mở khóa {sum(len(a) for a in unlocked.values())} thành tựu cho {len(unlocked)} user")
+            return unlocked
+        except Exception as e:
+            print(f"ERROR in AchievementEngine.evaluate: {str(e)}")
+            db.session.rollback()
+            return {}
+
+    # ===== Chạy bù 1 thành tựu cho toàn bộ user =====
+
+    @staticmethod
+    def backfill_achievement(achievement_id, chunk_size=None, progress=None):
+        """
+        Mở khóa 1 thành tựu cho mọi user đã đủ điều kiện (ví dụ thành tựu vừa thêm),
+        chạy bằng SQL theo từng khoảng user_id, mỗi khoảng 1 transaction,
+        không nạp danh sách user vào Python.
+        progress(user_id đã xét tới, user_id lớn nhất, số user đã mở khóa) gọi sau mỗi khoảng.
+        Điểm thưởng không xét tiếp các mốc TOTAL_POINTS khác: user được xét ở sự kiện kế tiếp.
+        Trả về (số user được mở khóa, lỗi)
+        """
+        chunk_size = chunk_size or AchievementEngine.BACKFILL_CHUNK_SIZE
+        unlocked = 0
+        rewarded = False
+        try:
+            achievement = db.session.execute(text('''
+                SELECT achievement_id, condition_type, condition_value, points_reward
+                FROM Achievements WHERE achievement_id = :achievement_id
+            '''), {'achievement_id': achievement_id}).fetchone()
+            if not achievement:
+                return 0, "Achievement not found"
+
+            current_value = AchievementEngine.CONDITION_SQL.get(achievement.condition_type)
+            if current_value is None:
+                return 0, f"Unsupported condition_type: {achievement.condition_type}"
+
+            max_user_id = db.session.execute(text('SELECT MAX(user_id) FROM Users')).scalar() or 0
+            db.session.commit()
+
+            qualifies = f'''
+                u.user_id > :low AND u.user_id <= :high
+                AND {current_value} >= :condition_value
+                AND NOT EXISTS (
+                    SELECT 1 FROM UserAchievements ua
+                    WHERE ua.user_id = u.user_id AND ua.achievement_id = :achievement_id
+                )
+            '''
+            points_reward = achievement.points_reward or 0
+
+            low = 0
+            while low < max_user_id:
+                high = min(low + chunk_size, max_user_id)
+                params = {
+                    'low': low,
+                    'high': high,
+                    'achievement_id': achievement.achievement_id,
+                    'condition_value': achievement.condition_value,
+                    'points_reward': points_reward
+                }
+
+                # Cộng điểm trước rồi mới ghi UserAchievements với cùng điều kiện:
+                # điểm chỉ tăng nên cả 2 câu chọn ra đúng 1 tập user (cùng transaction)
+                if points_reward > 0:
+                    db.session.execute(text(f'''
+                        UPDATE Users AS u SET points = COALESCE(points, 0) + :points_reward
+                        WHERE {qualifies}
+                    '''), params)
+                result = db.session.execute(text(f'''
+                    INSERT INTO UserAchievements (user_id, achievement_id)
+                    SELECT u.user_id, :achievement_id FROM Users u
+                    WHERE {qualifies}
+                '''), params)
+                db.session.commit()
+
+                unlocked += result.rowcount
+                rewarded = rewarded or (points_reward > 0 and result.rowcount > 0)
+                low = high
+                if progress:
+                    progress(high, max_user_id, unlocked)
+
+            return unlocked, None
+        except Exception as e:
+            print(f"ERROR in backfill_achievement: {str(e)}")
+            db.session.rollback()
+            return unlocked, str(e)
+        finally:
+            # Điểm của nhiều user đổi ngoài luồng cộng điểm thường -> dựng lại bảng xếp hạng
+            if rewarded:
+                LeaderboardService.invalidate()
+
+    @staticmethod
+    def start_backfill(achievement_id):
+        """Chạy bù thành tựu ở luồng nền (mỗi thành tựu tối đa 1 luồng), trả về False nếu đang chạy"""
+        with AchievementEngine._backfills_lock:
+            if achievement_id in AchievementEngine._backfills_running:
+                return False
+            AchievementEngine._backfills_running.add(achievement_id)
+
+        app = current_app._get_current_object()
+        threading.Thread(
+            target=AchievementEngine._run_backfill, args=(app, achievement_id),
+            name=f'achievement-backfill-{achievement_id}', daemon=True
+        ).start()
+        return True
+
+    @staticmethod
+    def _run_backfill(app, achievement_id):
+        def report(done, total, unlocked):
+            print(f"🏆 Backfill thành tựu {achievement_id}: {done}/{total} user_id, mở khóa {unlocked}")
+
+        with app.app_context():
+            try:
+                unlocked, error = AchievementEngine.backfill_achievement(achievement_id, progress=report)
+                if error:
+                    print(f"❌ Backfill thành tựu {achievement_id} lỗi: {error}")
+                else:
+                    print(f"✓ Backfill thành tựu {achievement_id} xong: mở khóa cho {unlocked} user")
+            finally:
+                db.session.remove()
+                with AchievementEngine._backfills_lock:
+                    AchievementEngine._backfills_running.discard(achievement_id)
@@ -1,6 +1,7 @@
 from extensions import db
 from sqlalchemy import text
 from datetime import datetime
+from services.post_service import PostService
 
 class CommentService:
     @staticmethod
@@ -84,11 +85,13 @@ class CommentService:
             ''')
             
             db.session.execute(query, data)
-            db.session.commit()
             
-            # Lấy ID vừa tạo
+            # Lấy ID vừa tạo (trước khi UPDATE bộ đếm)
             last_id = db.session.execute(text('SELECT last_insert_rowid()')).fetchone()[0]
             
+            PostService._bump_counter(data['post_id'], 'comment_count', 1)
+            db.session.commit()
+            
             return CommentService.get_comment_by_id(last_id), None
         except Exception as e:
             print(f"ERROR in create_comment: {str(e)}")
@@ -134,6 +137,7 @@ class CommentService:
             
             query = text('DELETE FROM Comments WHERE comment_id = :comment_id')
             db.session.execute(query, {'comment_id': comment_id})
+            PostService._bump_counter(existing['post_id'], 'comment_count', -1)
             db.session.commit()
             
             return True, None
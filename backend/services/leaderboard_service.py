@@ -0,0 +1,289 @@
+# services/leaderboard_service.py
+import threading
+import time
+from flask import current_app
+from sqlalchemy import text, func
+from extensions import db
+from models.user import User
+from models.season import Season
+from utils.rank_index import RankIndex
+
+class LeaderboardService:
+    """
+    Bảng xếp hạng dự đoán: toàn bộ (Users.points), theo mùa và theo vòng
+    (tổng points_awarded của các dự đoán đã chấm).
+    Mỗi bảng là 1 RankIndex trong bộ nhớ, dựng bằng 1 câu GROUP BY ở lần đọc đầu,
+    sau đó được cộng dồn khi chấm dự đoán / nhận thưởng thành tựu
+    """
+    SCOPES = ('overall', 'season', 'round')
+    MAX_PER_PAGE = 100
+    MAX_NEIGHBOURS = 25
+    # Bảng được làm mới nền sau khoảng này, phòng điểm bị sửa ngoài service
+    # (process khác, sửa trực tiếp trong DB); trong lúc làm mới vẫn đọc bảng cũ
+    BOARD_TTL_SECONDS = 600
+
+    # key -> (RankIndex, thời điểm dựng)
+    _boards = {}
+    # Giữ khi commit + cộng điểm và khi đọc/ghi bảng trong bộ nhớ
+    write_lock = threading.RLock()
+    # Chỉ 1 luồng dựng bảng chưa có tại 1 thời điểm
+    _load_lock = threading.Lock()
+    # Các bảng đang được làm mới ở luồng nền
+    _refreshing = set()
+    # Tăng mỗi lần cộng điểm, để biết bảng vừa dựng có lỡ 1 lần chấm điểm nào không
+    _generation = 0
+    LOAD_RETRIES = 3
+
+    @staticmethod
+    def _board_key(scope, season_id=None, round_no=None):
+        if scope == 'overall':
+            return ('overall',)
+        if scope == 'season':
+            return ('season', season_id)
+        return ('round', season_id, round_no)
+
+    @staticmethod
+    def _load_board(key):
+        if key[0] == 'overall':
+            rows = db.session.execute(text('''
+                SELECT user_id, COALESCE(points, 0) AS points FROM Users
+            '''))
+        else:
+            round_filter = 'AND m.round_no = :round_no' if key[0] == 'round' else ''
+            rows = db.session.execute(text(f'''
+                SELECT p.user_id, SUM(COALESCE(p.points_awarded, 0)) AS points
+                FROM Predictions p
+                JOIN Matches m ON m.match_id = p.match_id
+                WHERE m.season_id = :season_id {round_filter}
+                  AND p.status != 'PENDING'
+                GROUP BY p.user_id
+            '''), {'season_id': key[1], 'round_no': key[2] if len(key) > 2 else None})
+        return RankIndex({user_id: points for user_id, points in rows})
+
+    @staticmethod
+    def _is_fresh(entry):
+        return entry and time.monotonic() - entry[1] < LeaderboardService.BOARD_TTL_SECONDS
+
+    @staticmethod
+    def _build_board(key):
+        """
+        Dựng bảng ngoài write_lock (chấm điểm vẫn commit bình thường trong lúc dựng).
+        Nếu trong lúc dựng có lần cộng điểm thì bảng mới có thể thiếu/trùng phần điểm đó
+        -> dựng lại. Trả về (bảng dựng cuối, đã lưu chưa): chưa lưu khi quá LOAD_RETRIES lần vẫn bị chen
+        """
+        board = None
+        for _ in range(LeaderboardService.LOAD_RETRIES):
+            generation = LeaderboardService._generation
+            board = LeaderboardService._load_board(key)
+            with LeaderboardService.write_lock:
+                if LeaderboardService._generation == generation:
+                    LeaderboardService._boards[key] = (board, time.monotonic())
+                    return board, True
+        return board, False
+
+    @staticmethod
+    def _refresh_in_background(app, key):
+        try:
+            with app.app_context():
+                _, stored = LeaderboardService._build_board(key)
+                if not stored:
+                    # Giữ bảng cũ (vẫn hết hạn) -> request sau thử làm mới lại
+                    print(f"⚠️ Leaderboard {key}: điểm thay đổi liên tục, chưa làm mới được")
+        except Exception as e:
+            print(f"❌ Làm mới leaderboard {key} lỗi: {str(e)}")
+        finally:
+            with LeaderboardService.write_lock:
+                LeaderboardService._refreshing.discard(key)
+
+    @staticmethod
+    def _get_board(key):
+        """
+        Bảng trong bộ nhớ. Hết hạn thì vẫn trả bảng cũ và làm mới ở luồng nền
+        (mỗi bảng 1 luồng), chỉ chặn request khi bảng chưa có
+        """
+        entry = LeaderboardService._boards.get(key)
+        if entry:
+            if not LeaderboardService._is_fresh(entry):
+                with LeaderboardService.write_lock:
+                    start = key not in LeaderboardService._refreshing
+                    LeaderboardService._refreshing.add(key)
+                if start:
+                    threading.Thread(
+                        target=LeaderboardService._refresh_in_background,
+                        args=(current_app._get_current_object(), key),
+                        name='leaderboard-refresh', daemon=True
+                    ).start()
+            return entry[0]
+
+        with LeaderboardService._load_lock:
+            entry = LeaderboardService._boards.get(key)
+            if entry:
+                return entry[0]
+
+            board, stored = LeaderboardService._build_board(key)
+            if not stored:
+                # Bị chen quá nhiều lần: dùng bản dựng cuối nhưng đánh dấu hết hạn ngay,
+                # lần đọc sau sẽ làm mới nền (không dựng trong write_lock chặn việc chấm điểm)
+                with LeaderboardService.write_lock:
+                    LeaderboardService._boards[key] = (board, float('-inf'))
+            return board
+
+    @staticmethod
+    def invalidate(season_id=None):
+        """Bỏ các bảng mùa/vòng đã dựng của 1 mùa (hoặc mọi bảng khi season_id=None)"""
+        with LeaderboardService.write_lock:
+            # Lần dựng đang chạy (nền hoặc không) đọc dữ liệu cũ -> buộc dựng lại
+            LeaderboardService._generation += 1
+            if season_id is None:
+                LeaderboardService._boards.clear()
+                return
+            for key in list(LeaderboardService._boards):
+                if key[0] != 'overall' and key[1] == season_id:
+                    del LeaderboardService._boards[key]
+
+    @staticmethod
+    def apply_points(deltas, season_id=None, round_no=None):
+        """
+        Cộng điểm vào các bảng đang có trong bộ nhớ, gọi sau khi đã commit
+        (trong write_lock). deltas: {user_id: điểm cộng thêm}.
+        season_id/round_no: mùa/vòng của trận vừa chấm, None với điểm thưởng thành tựu
+        """
+        if not deltas:
+            return
+        with LeaderboardService.write_lock:
+            LeaderboardService._generation += 1
+            boards = LeaderboardService._boards
+
+            overall = boards.get(('overall',))
+            if overall:
+                # User đăng ký sau khi dựng bảng được nạp lại từ DB khi tra hạng
+                overall[0].apply_deltas({
+                    user_id: delta for user_id, delta in deltas.items() if user_id in overall[0]
+                })
+
+            if season_id is None:
+                return
+            for key in (('season', season_id), ('round', season_id, round_no)):
+                entry = boards.get(key)
+                if entry:
+                    entry[0].apply_deltas(deltas)
+
+    # ===== Đọc bảng xếp hạng =====
+
+    @staticmethod
+    def _resolve_window(scope, season_id=None, round_no=None):
+        """Kiểm tra tham số, trả về (key, lỗi)"""
+        if scope not in LeaderboardService.SCOPES:
+            return None, f"Invalid scope. Must be one of: {', '.join(LeaderboardService.SCOPES)}"
+        if scope == 'overall':
+            return LeaderboardService._board_key(scope), None
+
+        if season_id is None:
+            season_id = db.session.query(func.max(Season.season_id)).scalar()
+            if season_id is None:
+                return None, "No season found"
+        if scope == 'round' and round_no is None:
+            return None, "Missing round"
+        return LeaderboardService._board_key(scope, season_id, round_no), None
+
+    @staticmethod
+    def _ensure_user(board, key, user_id):
+        """User mới đăng ký chưa có trong bảng toàn bộ: nạp điểm hiện tại từ DB"""
+        if key[0] != 'overall' or user_id in board:
+            return
+        with LeaderboardService.write_lock:
+            points = db.session.query(User.points).filter(User.user_id == user_id).first()
+            if points is not None:
+                board.update({user_id: points[0] or 0})
+
+    @staticmethod
+    def _format_entries(rows):
+        """Gắn thông tin user (1 câu IN) vào các dòng (rank, user_id, points)"""
+        if not rows:
+            return []
+        users = {
+            user.user_id: user
+            for user in db.session.query(
+                User.user_id, User.username, User.full_name, User.avatar_url
+            ).filter(User.user_id.in_([row[1] for row in rows]))
+        }
+        entries = []
+        for rank, user_id, points in rows:
+            user = users.get(user_id)
+            entries.append({
+                'rank': rank,
+                'user_id': user_id,
+                'username': user.username if user else None,
+                'full_name': user.full_name if user else None,
+                'avatar_url': user.avatar_url if user else None,
+                'points': points
+            })
+        return entries
+
+    @staticmethod
+    def _window_info(key):
+        return {
+            'scope': key[0],
+            'season_id': key[1] if len(key) > 1 else None,
+            'round': key[2] if len(key) > 2 else None
+        }
+
+    @staticmethod
+    def get_leaderboard(scope='overall', season_id=None, round_no=None, page=1, per_page=20):
+        """Trang page của bảng xếp hạng, trả về (dict, lỗi)"""
+        try:
+            key, error = LeaderboardService._resolve_window(scope, season_id, round_no)
+            if error:
+                return None, error
+
+            page = max(page, 1)
+            per_page = min(max(per_page, 1), LeaderboardService.MAX_PER_PAGE)
+            board = LeaderboardService._get_board(key)
+            with LeaderboardService.write_lock:
+                total = len(board)
+                rows = board.entries((page - 1) * per_page, per_page)
+
+            result = LeaderboardService._window_info(key)
+            result.update({
+                'entries': LeaderboardService._format_entries(rows),
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'has_next': page * per_page < total,
+                'has_prev': page > 1
+            })
+            return result, None
+        except Exception as e:
+            print(f"DEBUG: Error getting leaderboard: {str(e)}")
+            return None, str(e)
+
+    @staticmethod
+    def get_user_rank(user_id, scope='overall', season_id=None, round_no=None, neighbours=2):
+        """Hạng của user + neighbours người đứng ngay trên/dưới, trả về (dict, lỗi)"""
+        try:
+            key, error = LeaderboardService._resolve_window(scope, season_id, round_no)
+            if error:
+                return None, error
+
+            neighbours = min(max(neighbours, 0), LeaderboardService.MAX_NEIGHBOURS)
+            board = LeaderboardService._get_board(key)
+            LeaderboardService._ensure_user(board, key, user_id)
+            with LeaderboardService.write_lock:
+                total = len(board)
+                rank = board.rank(user_id)
+                points = board.score(user_id)
+                rows = board.around(user_id, neighbours, neighbours)
+
+            result = LeaderboardService._window_info(key)
+            result.update({
+                'user_id': user_id,
+                # None: user chưa có dự đoán nào được chấm trong mùa/vòng này
+                'rank': rank,
+                'points': points,
+                'total': total,
+                'entries': LeaderboardService._format_entries(rows)
+            })
+            return result, None
+        except Exception as e:
+            print(f"DEBUG: Error getting user rank: {str(e)}")
+            return None, str(e)
@@ -1,6 +1,8 @@
 from extensions import db
 from sqlalchemy import text
 from datetime import datetime
+from services.post_service import PostService
+from utils import events
 
 class LikeService:
     @staticmethod
@@ -91,11 +93,15 @@ class LikeService:
             ''')
             
             db.session.execute(query, data)
-            db.session.commit()
             
-            # Lấy ID vừa tạo
+            # Lấy ID vừa tạo (trước khi UPDATE bộ đếm)
             last_id = db.session.execute(text('SELECT last_insert_rowid()')).fetchone()[0]
             
+            author_id = PostService._bump_counter(data['post_id'], 'like_count', 1)
+            db.session.commit()
+            if author_id:
+                events.publish(events.LIKE_RECEIVED, user_ids=[author_id], post_id=data['post_id'])
+            
             return LikeService.get_like_by_id(last_id), None
         except Exception as e:
             print(f"ERROR in create_like: {str(e)}")
@@ -111,6 +117,7 @@ class LikeService:
             
             query = text('DELETE FROM Likes WHERE like_id = :like_id')
             db.session.execute(query, {'like_id': like_id})
+            PostService._bump_counter(existing['post_id'], 'like_count', -1)
             db.session.commit()
             
             return True, None
@@ -132,6 +139,9 @@ class LikeService:
                 'post_id': post_id
             })
             
+            if result.rowcount > 0:
+                PostService._bump_counter(post_id, 'like_count', -result.rowcount)
+            
             db.session.commit()
             
             return result.rowcount > 0, None
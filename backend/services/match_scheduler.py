@@ -0,0 +1,78 @@
+# services/match_scheduler.py
+import os
+import threading
+from datetime import datetime
+from extensions import db
+
+class MatchStatusScheduler:
+    """
+    Luồng nền chuyển trận 'Chưa đá' -> 'Đang diễn ra' khi tới giờ bóng lăn.
+    Ngủ tới giờ đá gần nhất thay vì cập nhật trong mỗi request GET,
+    được đánh thức sớm (notify) khi lịch thi đấu thay đổi qua API
+    """
+    # Ngủ tối đa giữa 2 lần kiểm tra, phòng khi lịch bị sửa trực tiếp trong DB
+    MAX_SLEEP_SECONDS = 300
+    # Ngủ tối thiểu: trận quá giờ đá mà chưa đổi trạng thái không làm luồng quay liên tục
+    MIN_SLEEP_SECONDS = 5
+
+    _wakeup = threading.Event()
+    _thread = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def start(cls, app):
+        """Khởi động luồng nền (1 lần mỗi process)"""
+        if not app.config.get('MATCH_SCHEDULER_ENABLED', True):
+            return
+
+        # Debug reloader: chỉ chạy trong process con phục vụ request,
+        # process cha (chỉ theo dõi file) không chạy luồng nền
+        if app.debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+            return
+
+        with cls._lock:
+            if cls._thread and cls._thread.is_alive():
+                return
+            cls._thread = threading.Thread(
+                target=cls._run, args=(app,), name='match-status-scheduler', daemon=True
+            )
+            cls._thread.start()
+            print("⏰ Match status scheduler started")
+
+    @classmethod
+    def notify(cls):
+        """Báo lịch thi đấu vừa thay đổi để tính lại giờ thức dậy"""
+        cls._wakeup.set()
+
+    @classmethod
+    def _next_delay(cls, next_kickoff, failures=0):
+        """Số giây ngủ tới lần kiểm tra sau; lỗi liên tiếp thì lùi dần (5s, 10s, 20s, ... tối đa 300s)"""
+        if failures:
+            return min(cls.MIN_SLEEP_SECONDS * 2 ** (failures - 1), cls.MAX_SLEEP_SECONDS)
+        if not next_kickoff:
+            return cls.MAX_SLEEP_SECONDS
+        seconds_to_kickoff = (next_kickoff - datetime.now()).total_seconds()
+        return min(max(seconds_to_kickoff, cls.MIN_SLEEP_SECONDS), cls.MAX_SLEEP_SECONDS)
+
+    @classmethod
+    def _run(cls, app):
+        from services.match_service import MatchService
+
+        failures = 0
+        while True:
+            # Xóa cờ trước khi đọc lịch: notify() đến sau đó sẽ không bị mất
+            cls._wakeup.clear()
+            next_kickoff = None
+
+            with app.app_context():
+                try:
+                    MatchService.update_match_statuses()
+                    next_kickoff = MatchService.get_next_kickoff()
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    print(f"❌ Match status scheduler error: {str(e)}")
+                finally:
+                    db.session.remove()
+
+            cls._wakeup.wait(cls._next_delay(next_kickoff, failures))
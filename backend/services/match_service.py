@@ -1,12 +1,89 @@
+import copy
+import threading
+import time
 from datetime import datetime
 from models.match import Match
 from models.match_referee import MatchReferee
 from models.match_lineup import MatchLineup
 from models.match_event import MatchEvent
+from models.season import Season
+from models.stadium import Stadium
+from models.team import Team
 from extensions import db
-from sqlalchemy import or_, text, desc
+from services.match_scheduler import MatchStatusScheduler
+from services.team_service import TeamService
+from services.season_standing_service import SeasonStandingService
+from services.player_statistics_service import PlayerStatisticsService
+from services.prediction_service import PredictionService
+from services.leaderboard_service import LeaderboardService
+from sqlalchemy import or_, text, desc, func
+from sqlalchemy.orm import aliased
 
 class MatchService:
+    # Cache payload chi tiết trận, khóa là match_id kiểu int (xem _detail_key).
+    # Chỉ cache trận đã kết thúc: trận chưa đá / đang diễn ra còn đổi tỉ số, sự kiện liên tục.
+    # Xóa khi sự kiện / đội hình / trọng tài / thông tin trận thay đổi trong process này;
+    # TTL để sửa đổi từ process khác (worker khác, script) cũng được thấy sau tối đa từng ấy giây
+    DETAIL_CACHE_STATUS = 'Kết thúc'
+    DETAIL_CACHE_TTL_SECONDS = 300
+    _detail_cache = {}     # match_id -> (payload, thời điểm cache theo time.monotonic())
+    _detail_cache_lock = threading.Lock()
+    
+    # Cột của từng loại bản ghi trong câu UNION ALL của get_match_with_details
+    _DETAIL_COLUMNS = {
+        'events': ('event_id', 'match_id', 'team_id', 'player_id', 'event_type', 'minute',
+                   'player_name', 'team_name'),
+        'lineups': ('lineup_id', 'match_id', 'team_id', 'player_id', 'is_starter',
+                    'shirt_number', 'position', 'player_name', 'team_name'),
+        'referees': ('match_referee_id', 'match_id', 'referee_id', 'role', 'referee_name'),
+    }
+    
+    # Các cột ảnh hưởng tới bảng xếp hạng
+    _STANDING_FIELDS = {'season_id', 'round', 'status', 'home_team_id', 'away_team_id',
+                        'home_score', 'away_score'}
+    
+    @staticmethod
+    def _standing_key(match):
+        return (match.season_id, match.round, match.round_no, match.status)
+    
+    @staticmethod
+    def _detail_key(match_id):
+        """Khóa cache chi tiết trận: route truyền int, service khác có thể truyền chuỗi"""
+        try:
+            return int(match_id)
+        except (TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    def _get_cached_details(match_id):
+        key = MatchService._detail_key(match_id)
+        with MatchService._detail_cache_lock:
+            entry = MatchService._detail_cache.get(key)
+            if entry is None:
+                return None
+            payload, cached_at = entry
+            if time.monotonic() - cached_at > MatchService.DETAIL_CACHE_TTL_SECONDS:
+                del MatchService._detail_cache[key]
+                return None
+        return copy.deepcopy(payload)
+    
+    @staticmethod
+    def _cache_details(match_id, payload):
+        key = MatchService._detail_key(match_id)
+        if key is None or payload.get('status') != MatchService.DETAIL_CACHE_STATUS:
+            return
+        with MatchService._detail_cache_lock:
+            MatchService._detail_cache[key] = (payload, time.monotonic())
+    
+    @staticmethod
+    def invalidate_match_details(match_id=None):
+        """Xóa cache chi tiết của 1 trận (hoặc toàn bộ nếu match_id=None)"""
+        with MatchService._detail_cache_lock:
+            if match_id is None:
+                MatchService._detail_cache.clear()
+            else:
+                MatchService._detail_cache.pop(MatchService._detail_key(match_id), None)
+    
     @staticmethod
     def get_matches_paginated(page=1, per_page=10):
         """
@@ -24,6 +101,115 @@ class MatchService:
         except Exception as e:
             return None, str(e)
     
+    @staticmethod
+    def _apply_match_filters(query, season_id=None, round=None, status=None):
+        """Lọc danh sách trận theo mùa, vòng, trạng thái"""
+        if season_id:
+            query = query.filter(Match.season_id == season_id)
+        
+        if round:
+            # Tìm kiếm theo vòng đấu, có thể là "Vòng 26" hoặc "26"
+            if round.isascii() and round.isdigit():
+                # Số vòng -> cột round_no (có index), tương đương "Vòng {số}" / "Vòng {số} ..."
+                query = query.filter(Match.round_no == int(round))
+            else:
+                query = query.filter(Match.round.like(f'%{round}%'))
+        
+        if status:
+            query = query.filter(Match.status == status)
+        
+        return query
+    
+    @staticmethod
+    def get_matches_list(page=1, per_page=10, season_id=None, round=None, status=None):
+        """
+        Danh sách trận cho GET /api/matches: 1 câu JOIN lấy luôn tên mùa, đội, sân
+        (trả về Row tuple, không load ORM object) + 1 câu COUNT của paginate
+        """
+        try:
+            home_team = aliased(Team)
+            away_team = aliased(Team)
+            
+            query = db.session.query(
+                Match.match_id, Match.season_id, Match.round, Match.match_datetime,
+                Match.home_team_id, Match.away_team_id, Match.home_score, Match.away_score,
+                Match.status, Match.stadium_id, Match.match_url,
+                Season.name.label('season_name'),
+                home_team.name.label('home_team_name'),
+                home_team.logo_url.label('home_team_logo'),
+                away_team.name.label('away_team_name'),
+                away_team.logo_url.label('away_team_logo'),
+                Stadium.name.label('stadium_name'),
+            ).outerjoin(
+                Season, Season.season_id == Match.season_id
+            ).outerjoin(
+                home_team, home_team.team_id == Match.home_team_id
+            ).outerjoin(
+                away_team, away_team.team_id == Match.away_team_id
+            ).outerjoin(
+                Stadium, Stadium.stadium_id == Match.stadium_id
+            )
+            
+            query = MatchService._apply_match_filters(query, season_id, round, status)
+            
+            # Sắp xếp mới nhất trước, match_id phân định các trận cùng giờ đá
+            query = query.order_by(desc(Match.match_datetime), desc(Match.match_id))
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            
+            # Logo của 1 đội lặp lại nhiều lần trong 1 trang, chỉ xử lý URL 1 lần
+            logo_urls = {}
+            def logo_url(raw_path):
+                if raw_path not in logo_urls:
+                    logo_urls[raw_path] = TeamService._process_logo_url(raw_path)
+                return logo_urls[raw_path]
+            
+            matches_data = []
+            for row in pagination.items:
+                match_dict = {
+                    'match_id': row.match_id,
+                    'season_id': row.season_id,
+                    'round': row.round,
+                    'match_datetime': row.match_datetime.isoformat() if row.match_datetime else None,
+                    'home_team_id': row.home_team_id,
+                    'away_team_id': row.away_team_id,
+                    'home_score': row.home_score,
+                    'away_score': row.away_score,
+                    'status': row.status,
+                    'stadium_id': row.stadium_id,
+                    'match_url': row.match_url
+                }
+                
+                # Thêm thông tin liên quan (bỏ qua nếu bản ghi liên quan không tồn tại)
+                if row.season_name is not None:
+                    match_dict['season_name'] = row.season_name
+                if row.home_team_name is not None:
+                    match_dict['home_team'] = {
+                        'id': row.home_team_id,
+                        'name': row.home_team_name,
+                        'logo_url': logo_url(row.home_team_logo)
+                    }
+                if row.away_team_name is not None:
+                    match_dict['away_team'] = {
+                        'id': row.away_team_id,
+                        'name': row.away_team_name,
+                        'logo_url': logo_url(row.away_team_logo)
+                    }
+                if row.stadium_name is not None:
+                    match_dict['stadium_name'] = row.stadium_name
+                
+                matches_data.append(match_dict)
+            
+            return {
+                'matches': matches_data,
+                'page': pagination.page,
+                'per_page': pagination.per_page,
+                'total': pagination.total,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }, None
+        except Exception as e:
+            return None, str(e)
+    
     @staticmethod
     def get_all_matches():
         return Match.query.order_by(desc(Match.match_datetime)).all()
@@ -37,6 +223,11 @@ class MatchService:
         match = Match(**data)
         db.session.add(match)
         db.session.commit()
+        
+        # Lịch thi đấu thay đổi -> bộ lập lịch tính lại giờ thức dậy
+        MatchStatusScheduler.notify()
+        PredictionService.invalidate_upcoming_matches()
+        SeasonStandingService.recompute_for_matches([MatchService._standing_key(match)])
         return match
     
     @staticmethod
@@ -45,10 +236,35 @@ class MatchService:
         if not match:
             return None
         
+        before = MatchService._standing_key(match)
         for key, value in data.items():
             setattr(match, key, value)
         
         db.session.commit()
+        MatchService.invalidate_match_details(match_id)
+        PredictionService.invalidate_upcoming_matches()
+        PredictionService.invalidate_prediction_summary(match_id)
+        
+        if 'match_datetime' in data or 'status' in data:
+            MatchStatusScheduler.notify()
+        
+        # Kết quả trận đổi -> tính lại bảng xếp hạng từ vòng của trận (trước và sau khi sửa)
+        if MatchService._STANDING_FIELDS & set(data):
+            SeasonStandingService.recompute_for_matches([before, MatchService._standing_key(match)])
+        
+        # Trận kết thúc (hoặc sửa tỉ số sau khi kết thúc) -> chấm dự đoán
+        if match.status == 'Kết thúc' and {'status', 'home_score', 'away_score'} & set(data):
+            PredictionService.settle_match(match_id)
+        
+        # Trận chuyển mùa -> thống kê cầu thủ của cả 2 mùa đều đổi
+        if match.season_id != before[0]:
+            PlayerStatisticsService.rebuild_season_stats(before[0])
+            PlayerStatisticsService.rebuild_season_stats(match.season_id)
+        
+        # Trận chuyển mùa / vòng -> điểm dự đoán đã chấm chuyển sang bảng xếp hạng khác
+        if (match.season_id, match.round_no) != (before[0], before[2]):
+            LeaderboardService.invalidate(before[0])
+            LeaderboardService.invalidate(match.season_id)
         return match
     
     @staticmethod
@@ -57,8 +273,17 @@ class MatchService:
         if not match:
             return False
         
+        before = MatchService._standing_key(match)
         db.session.delete(match)
         db.session.commit()
+        MatchService.invalidate_match_details(match_id)
+        PredictionService.invalidate_upcoming_matches()
+        SeasonStandingService.recompute_for_matches([before])
+        # Đội hình / sự kiện của trận bị xóa theo -> tính lại thống kê cầu thủ của mùa
+        PlayerStatisticsService.rebuild_season_stats(before[0])
+        LeaderboardService.invalidate(before[0])
+        # Bỏ bộ đếm phân bố dự đoán của trận đã xóa
+        PredictionService.rebuild_distribution(match_id)
         return True
     
     @staticmethod
@@ -76,20 +301,35 @@ class MatchService:
         )
         db.session.add(match_referee)
         db.session.commit()
+        MatchService.invalidate_match_details(match_id)
         return match_referee
     
     @staticmethod
     def add_match_lineup(data):
         lineup = MatchLineup(**data)
         db.session.add(lineup)
+        PlayerStatisticsService.record_lineup(
+            lineup.match_id, lineup.team_id, lineup.player_id, lineup.is_starter
+        )
         db.session.commit()
+        MatchService.invalidate_match_details(lineup.match_id)
         return lineup
     
     @staticmethod
     def add_match_event(data):
         event = MatchEvent(**data)
         db.session.add(event)
+        PlayerStatisticsService.record_event(
+            event.match_id, event.team_id, event.player_id, event.event_type
+        )
         db.session.commit()
+        MatchService.invalidate_match_details(event.match_id)
+        
+        # Thêm thẻ phạt sau khi trận kết thúc -> chấm lại dự đoán tài/xỉu thẻ
+        if event.event_type in ('yellow_card', 'red_card'):
+            match = Match.query.get(event.match_id)
+            if match and match.status == 'Kết thúc':
+                PredictionService.settle_match(event.match_id)
         return event
     
     @staticmethod
@@ -100,19 +340,17 @@ class MatchService:
     def get_match_events(match_id):
         return MatchEvent.query.filter_by(match_id=match_id).all()
     
-   # match_service.py - Sửa hàm get_match_with_details với debug chi tiết
     @staticmethod
     def get_match_with_details(match_id):
+        """
+        Chi tiết trận: 1 câu lấy thông tin trận + 1 câu UNION ALL lấy events, lineups,
+        referees. Trận đã kết thúc được cache theo match_id (có TTL)
+        """
+        cached = MatchService._get_cached_details(match_id)
+        if cached is not None:
+            return cached
+        
         try:
-            match = Match.query.get(match_id)
-            if not match:
-                print(f"❌ DEBUG: Match {match_id} không tồn tại trong bảng Matches")
-                return None
-            
-            # Sử dụng SQL query đơn giản hơn để debug
-            from sqlalchemy import text
-            
-            # Query cơ bản để lấy thông tin match
             base_query = text('''
                 SELECT 
                     m.match_id,
@@ -135,69 +373,66 @@ class MatchService:
             result = db.session.execute(base_query, {'match_id': match_id}).fetchone()
             
             if not result:
-                print(f"❌ DEBUG: Query cơ bản không trả về kết quả cho match {match_id}")
+                print(f"❌ DEBUG: Match {match_id} không tồn tại trong bảng Matches")
                 return None
             
             match_data = dict(result._mapping)
             
-            # Lấy events
-            events_query = text('''
-                SELECT COUNT(*) as count FROM MatchEvents WHERE match_id = :match_id
-            ''')
-            events_count = db.session.execute(events_query, {'match_id': match_id}).fetchone()[0]
-            
-            events_query = text('''
-                SELECT 
-                    me.*,
-                    p.full_name as player_name,
-                    t.name as team_name
+            # events (theo phút), lineups (đá chính trước, theo số áo), referees
+            # gộp trong 1 câu; sort1/sort2/sort3 giữ thứ tự của từng danh sách
+            children_query = text('''
+                SELECT 'events' AS kind, me.event_id AS record_id, me.match_id,
+                       me.team_id, me.player_id, me.event_type, me.minute,
+                       NULL AS is_starter, NULL AS shirt_number, NULL AS position,
+                       NULL AS referee_id, NULL AS role,
+                       p.full_name AS player_name, t.name AS team_name, NULL AS referee_name,
+                       me.minute AS sort1, 0 AS sort2, me.event_id AS sort3
                 FROM MatchEvents me
                 LEFT JOIN Players p ON me.player_id = p.player_id
                 LEFT JOIN Teams t ON me.team_id = t.team_id
                 WHERE me.match_id = :match_id
-                ORDER BY me.minute
-            ''')
-            events = db.session.execute(events_query, {'match_id': match_id}).fetchall()
-            match_data['events'] = [dict(event._mapping) for event in events]
-            
-            # Lấy lineups
-            lineups_query = text('''
-                SELECT COUNT(*) as count FROM MatchLineups WHERE match_id = :match_id
-            ''')
-            lineups_count = db.session.execute(lineups_query, {'match_id': match_id}).fetchone()[0]
-            
-            lineups_query = text('''
-                SELECT 
-                    ml.*,
-                    p.full_name as player_name,
-                    t.name as team_name
+                
+                UNION ALL
+                
+                SELECT 'lineups', ml.lineup_id, ml.match_id,
+                       ml.team_id, ml.player_id, NULL, NULL,
+                       ml.is_starter, ml.shirt_number, ml.position,
+                       NULL, NULL,
+                       p.full_name, t.name, NULL,
+                       -ml.is_starter, ml.shirt_number, ml.player_id
                 FROM MatchLineups ml
                 LEFT JOIN Players p ON ml.player_id = p.player_id
                 LEFT JOIN Teams t ON ml.team_id = t.team_id
                 WHERE ml.match_id = :match_id
-                ORDER BY ml.is_starter DESC, ml.shirt_number
-            ''')
-            lineups = db.session.execute(lineups_query, {'match_id': match_id}).fetchall()
-            match_data['lineups'] = [dict(lineup._mapping) for lineup in lineups]
-            
-            # Lấy referees
-            referees_query = text('''
-                SELECT COUNT(*) as count FROM Match_Referees WHERE match_id = :match_id
-            ''')
-            referees_count = db.session.execute(referees_query, {'match_id': match_id}).fetchone()[0]
-            
-            referees_query = text('''
-                SELECT 
-                    mr.*,
-                    r.full_name as referee_name
+                
+                UNION ALL
+                
+                SELECT 'referees', mr.match_referee_id, mr.match_id,
+                       NULL, NULL, NULL, NULL,
+                       NULL, NULL, NULL,
+                       mr.referee_id, mr.role,
+                       NULL, NULL, r.full_name,
+                       mr.referee_id, mr.role, mr.match_referee_id
                 FROM Match_Referees mr
                 LEFT JOIN Referees r ON mr.referee_id = r.referee_id
                 WHERE mr.match_id = :match_id
+                
+                ORDER BY kind, sort1, sort2, sort3
             ''')
-            referees = db.session.execute(referees_query, {'match_id': match_id}).fetchall()
-            match_data['referees'] = [dict(referee._mapping) for referee in referees]
+            rows = db.session.execute(children_query, {'match_id': match_id}).fetchall()
+            
+            for kind in MatchService._DETAIL_COLUMNS:
+                match_data[kind] = []
+            for row in rows:
+                record = dict(row._mapping)
+                kind = record['kind']
+                columns = MatchService._DETAIL_COLUMNS[kind]
+                # Cột đầu là khóa chính riêng của từng bảng
+                record[columns[0]] = record['record_id']
+                match_data[kind].append({col: record[col] for col in columns})
             
-            return match_data
+            MatchService._cache_details(match_id, match_data)
+            return copy.deepcopy(match_data)
             
         except Exception as e:
             print(f"❌ DEBUG: Lỗi trong get_match_with_details: {str(e)}")
@@ -206,69 +441,41 @@ class MatchService:
             return None
         
     @staticmethod
-    def update_match_statuses():
+    def update_match_statuses(now=None):
         """
-        Tự động cập nhật trạng thái 'Chưa đá' -> 'Đang diễn ra'
+        Chuyển các trận 'Chưa đá' đã tới giờ đá sang 'Đang diễn ra' (tỉ số mặc định 0-0).
+        Chỉ được gọi từ MatchStatusScheduler, không gọi trong các API GET.
+        Điều kiện status = 'Chưa đá' trong UPDATE đảm bảo mỗi trận chỉ được chuyển 1 lần.
+        Lỗi DB được raise lại để scheduler lùi thời gian thử lại
         """
         try:
-            # SỬA LẠI: Dùng now() thay vì utcnow() để khớp với giờ máy tính của bạn
-            now = datetime.now() 
+            # Dùng giờ local để khớp với giờ lưu trong DB
+            now = now or datetime.now()
             
-            # Debug để bạn kiểm tra giờ server đang hiểu là mấy giờ
-            print(f"🕒 SERVER TIME CHECK: {now}")
-            
-            # Tìm các trận 'Chưa đá' mà thời gian <= hiện tại
-            matches_to_start = Match.query.filter(
+            started = Match.query.filter(
                 Match.status == 'Chưa đá',
                 Match.match_datetime <= now
-            ).all()
+            ).update({
+                Match.status: 'Đang diễn ra',
+                Match.home_score: func.coalesce(Match.home_score, 0),
+                Match.away_score: func.coalesce(Match.away_score, 0)
+            }, synchronize_session=False)
             
-            if matches_to_start:
-                print(f"🔄 SYSTEM: Phát hiện {len(matches_to_start)} trận cần cập nhật!")
-                for match in matches_to_start:
-                    print(f"   -> Cập nhật trận: {match.home_team_id} vs {match.away_team_id} (Giờ đá: {match.match_datetime})")
-                    match.status = 'Đang diễn ra'
-                    
-                    # Set tỉ số mặc định 0-0 nếu chưa có
-                    if match.home_score is None: match.home_score = 0
-                    if match.away_score is None: match.away_score = 0
-                
-                db.session.commit()
-                print("✅ Đã lưu vào Database thành công.")
-                return True
+            db.session.commit()
             
-            return False
+            if started:
+                MatchService.invalidate_match_details()
+                PredictionService.invalidate_upcoming_matches()
+                print(f"🔄 SYSTEM: Đã chuyển {started} trận sang 'Đang diễn ra'")
+            return started
         except Exception as e:
             print(f"❌ LỖI UPDATE STATUS: {str(e)}")
             db.session.rollback()
-            return False
-        """
-        Kiểm tra và cập nhật trạng thái các trận đấu đã đến giờ
-        """
-        try:
-            # Lấy thời gian hiện tại
-            # Lưu ý: Đảm bảo server và DB cùng múi giờ (UTC hoặc Local)
-            # Nếu DB lưu giờ VN thì dùng datetime.now()
-            now = datetime.now() 
-            
-            # Tìm các trận 'Chưa đá' mà thời gian đã qua -> Update thành 'Đang diễn ra'
-            matches_to_start = Match.query.filter(
-                Match.status == 'Chưa đá',
-                Match.match_datetime <= now
-            ).all()
-            
-            if matches_to_start:
-                print(f"🔄 SYSTEM: Tự động bắt đầu {len(matches_to_start)} trận đấu...")
-                for match in matches_to_start:
-                    match.status = 'Đang diễn ra'
-                    # Có thể set mặc định tỉ số 0-0 nếu muốn
-                    if match.home_score is None: match.home_score = 0
-                    if match.away_score is None: match.away_score = 0
-                    
-                db.session.commit()
-                return True
-            return False
-        except Exception as e:
-            print(f"❌ Error updating match statuses: {str(e)}")
-            db.session.rollback()
-            return False
\ No newline at end of file
+            raise
+    
+    @staticmethod
+    def get_next_kickoff():
+        """Giờ bóng lăn sớm nhất của các trận 'Chưa đá' (dùng index status, match_datetime)"""
+        return db.session.query(func.min(Match.match_datetime)).filter(
+            Match.status == 'Chưa đá'
+        ).scalar()
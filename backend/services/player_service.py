@@ -1,6 +1,7 @@
 from extensions import db
 from sqlalchemy import text
 from datetime import datetime
+from utils.repository import Repository
 
 class PlayerService:
     @staticmethod
@@ -33,6 +34,21 @@ class PlayerService:
             db.session.rollback()
             return []
     
+    @staticmethod
+    def _format_player(player_dict):
+        # Xử lý birth_date
+        if player_dict.get('birth_date'):
+            if isinstance(player_dict['birth_date'], str):
+                try:
+                    player_dict['birth_date'] = datetime.strptime(
+                        player_dict['birth_date'], '%Y-%m-%d'
+                    ).date().isoformat()
+                except:
+                    player_dict['birth_date'] = None
+            elif hasattr(player_dict['birth_date'], 'isoformat'):
+                player_dict['birth_date'] = player_dict['birth_date'].isoformat()
+        return player_dict
+    
     @staticmethod
     def get_player_by_id(player_id):
         try:
@@ -40,20 +56,7 @@ class PlayerService:
             result = db.session.execute(query, {'id': player_id}).fetchone()
             
             if result:
-                player_dict = dict(result._mapping)
-                # Xử lý birth_date
-                if player_dict.get('birth_date'):
-                    if isinstance(player_dict['birth_date'], str):
-                        try:
-                            player_dict['birth_date'] = datetime.strptime(
-                                player_dict['birth_date'], '%Y-%m-%d'
-                            ).date().isoformat()
-                        except:
-                            player_dict['birth_date'] = None
-                    elif hasattr(player_dict['birth_date'], 'isoformat'):
-                        player_dict['birth_date'] = player_dict['birth_date'].isoformat()
-                
-                return player_dict
+                return PlayerService._format_player(dict(result._mapping))
             return None
             
         except Exception as e:
@@ -70,27 +73,10 @@ class PlayerService:
                 except:
                     data['birth_date'] = None
             
-            columns = []
-            values = []
-            params = {}
-            
-            for key, value in data.items():
-                columns.append(key)
-                values.append(f":{key}")
-                params[key] = value
-            
-            query = text(f'''
-                INSERT INTO Players ({', '.join(columns)})
-                VALUES ({', '.join(values)})
-            ''')
-            
-            db.session.execute(query, params)
+            player = Repository.insert('Players', data)
             db.session.commit()
             
-            # Lấy ID vừa tạo
-            last_id = db.session.execute(text('SELECT last_insert_rowid()')).fetchone()[0]
-            
-            return PlayerService.get_player_by_id(last_id)
+            return PlayerService._format_player(player)
             
         except Exception as e:
             print(f"ERROR in create_player: {str(e)}")
@@ -100,10 +86,6 @@ class PlayerService:
     @staticmethod
     def update_player(player_id, data):
         try:
-            existing = PlayerService.get_player_by_id(player_id)
-            if not existing:
-                return None
-            
             # Parse birth_date nếu là string
             if 'birth_date' in data and isinstance(data['birth_date'], str):
                 try:
@@ -111,20 +93,13 @@ class PlayerService:
                 except:
                     data['birth_date'] = None
             
-            set_clause = ', '.join([f"{key} = :{key}" for key in data.keys()])
-            query = text(f'''
-                UPDATE Players 
-                SET {set_clause}
-                WHERE player_id = :player_id
-            ''')
-            
-            params = data.copy()
-            params['player_id'] = player_id
-            
-            db.session.execute(query, params)
+            player = Repository.update('Players', 'player_id', player_id, data)
+            if not player:
+                db.session.rollback()
+                return None
             db.session.commit()
             
-            return PlayerService.get_player_by_id(player_id)
+            return PlayerService._format_player(player)
             
         except Exception as e:
             print(f"ERROR in update_player: {str(e)}")
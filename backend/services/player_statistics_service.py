@@ -6,10 +6,15 @@ from datetime import datetime
 class PlayerStatisticsService:
     @staticmethod
     def get_players_by_season(season_id, team_id=None):
-        """Lấy danh sách cầu thủ theo mùa và đội, kèm thống kê"""
+        """Lấy danh sách cầu thủ theo mùa và đội, kèm thống kê (đọc từ PlayerSeasonStats)"""
         try:
-            # Base query lấy thông tin cầu thủ
-            base_query = '''
+            stat_columns = ',\n'.join(
+                f'                    pss.{col} as stat_{col}'
+                for col in PlayerStatisticsService._STAT_COLUMNS
+            )
+            
+            # Base query lấy thông tin cầu thủ + thống kê mùa (1 dòng PlayerSeasonStats / cầu thủ)
+            base_query = f'''
                 SELECT 
                     p.player_id,
                     p.full_name,
@@ -23,11 +28,15 @@ class PlayerStatisticsService:
                     t.team_id,
                     t.name as team_name,
                     t.logo_url as team_logo,
-                    s.name as season_name
+                    s.name as season_name,
+{stat_columns}
                 FROM Players p
                 INNER JOIN TeamRosters tr ON p.player_id = tr.player_id
                 INNER JOIN Teams t ON tr.team_id = t.team_id
                 INNER JOIN Seasons s ON tr.season_id = s.season_id
+                LEFT JOIN PlayerSeasonStats pss ON pss.player_id = tr.player_id
+                    AND pss.team_id = tr.team_id
+                    AND pss.season_id = tr.season_id
                 WHERE tr.season_id = :season_id
             '''
             
@@ -50,13 +59,11 @@ class PlayerStatisticsService:
                     if hasattr(player_dict['birth_date'], 'isoformat'):
                         player_dict['birth_date'] = player_dict['birth_date'].isoformat()
                 
-                # Lấy thống kê cho cầu thủ
-                stats = PlayerStatisticsService.get_player_season_stats(
-                    player_dict['player_id'], 
-                    season_id,
-                    player_dict['team_id']
-                )
-                player_dict['statistics'] = stats
+                counts = {
+                    col: player_dict.pop(f'stat_{col}')
+                    for col in PlayerStatisticsService._STAT_COLUMNS
+                }
+                player_dict['statistics'] = PlayerStatisticsService._build_stats(counts)
                 
                 players.append(player_dict)
             
@@ -66,99 +73,158 @@ class PlayerStatisticsService:
             print(f"ERROR in get_players_by_season: {str(e)}")
             return []
     
+    # Cột đếm của PlayerSeasonStats
+    _STAT_COLUMNS = ('appearances', 'starts', 'total_events', 'goals', 'assists', 'yellow_cards',
+                     'red_cards', 'substitutions_in', 'substitutions_out')
+    
+    # event_type -> cột đếm tương ứng (loại khác chỉ tính vào total_events)
+    _EVENT_COLUMNS = {
+        'goal': 'goals',
+        'assist': 'assists',
+        'yellow_card': 'yellow_cards',
+        'red_card': 'red_cards',
+        'substitution_in': 'substitutions_in',
+        'substitution_out': 'substitutions_out',
+    }
+    
+    @staticmethod
+    def _build_stats(counts):
+        """Dict thống kê trả về cho API từ 1 dòng PlayerSeasonStats (thiếu/None -> 0)"""
+        counts = {key: counts.get(key) or 0 for key in PlayerStatisticsService._STAT_COLUMNS}
+        
+        stats = {'matches_played': counts.pop('appearances')}
+        stats.update(counts)
+        
+        # Tính hiệu suất
+        matches_played = stats['matches_played']
+        if matches_played > 0:
+            stats['goals_per_match'] = round(stats['goals'] / matches_played, 2)
+            stats['assists_per_match'] = round(stats['assists'] / matches_played, 2)
+        else:
+            stats['goals_per_match'] = 0
+            stats['assists_per_match'] = 0
+        
+        return stats
+    
     @staticmethod
     def get_player_season_stats(player_id, season_id, team_id):
         """Lấy thống kê của cầu thủ trong mùa"""
         try:
-            # Lấy số trận đã đấu
-            matches_query = text('''
-                SELECT COUNT(DISTINCT m.match_id) as matches_played
-                FROM MatchLineups ml
-                JOIN Matches m ON ml.match_id = m.match_id
-                WHERE ml.player_id = :player_id 
-                AND m.season_id = :season_id
-                AND ml.team_id = :team_id
-                AND m.status = 'FT'
-            ''')
-            
-            matches_result = db.session.execute(matches_query, {
+            result = db.session.execute(text('''
+                SELECT * FROM PlayerSeasonStats
+                WHERE player_id = :player_id AND season_id = :season_id AND team_id = :team_id
+            '''), {
                 'player_id': player_id,
                 'season_id': season_id,
                 'team_id': team_id
             }).fetchone()
             
-            matches_played = matches_result.matches_played if matches_result else 0
+            return PlayerStatisticsService._build_stats(dict(result._mapping) if result else {})
+                
+        except Exception as e:
+            print(f"ERROR in get_player_season_stats: {str(e)}")
+            return PlayerStatisticsService._build_stats({})
+    
+    # ===== Duy trì bảng PlayerSeasonStats =====
+    
+    @staticmethod
+    def record_lineup(match_id, team_id, player_id, is_starter):
+        """Cộng 1 lần ra sân (chưa commit, chạy cùng transaction thêm đội hình)"""
+        db.session.execute(text('''
+            INSERT INTO PlayerSeasonStats (player_id, team_id, season_id, appearances, starts)
+            SELECT :player_id, :team_id, m.season_id, 1, :starts
+            FROM Matches m WHERE m.match_id = :match_id
+            ON CONFLICT(player_id, team_id, season_id) DO UPDATE SET
+                appearances = appearances + 1,
+                starts = starts + excluded.starts
+        '''), {
+            'match_id': match_id,
+            'team_id': team_id,
+            'player_id': player_id,
+            'starts': 1 if is_starter else 0
+        })
+    
+    @staticmethod
+    def record_event(match_id, team_id, player_id, event_type):
+        """Cộng 1 sự kiện (chưa commit, chạy cùng transaction thêm sự kiện)"""
+        column = PlayerStatisticsService._EVENT_COLUMNS.get(event_type)
+        insert_columns = 'total_events' + (f', {column}' if column else '')
+        insert_values = '1' + (', 1' if column else '')
+        update_column = f', {column} = {column} + 1' if column else ''
+        
+        db.session.execute(text(f'''
+            INSERT INTO PlayerSeasonStats (player_id, team_id, season_id, {insert_columns})
+            SELECT :player_id, :team_id, m.season_id, {insert_values}
+            FROM Matches m WHERE m.match_id = :match_id
+            ON CONFLICT(player_id, team_id, season_id) DO UPDATE SET
+                total_events = total_events + 1{update_column}
+        '''), {
+            'match_id': match_id,
+            'team_id': team_id,
+            'player_id': player_id
+        })
+    
+    @staticmethod
+    def rebuild_season_stats(season_id=None, commit=True):
+        """
+        Tính lại PlayerSeasonStats từ MatchLineups + MatchEvents (1 mùa hoặc tất cả).
+        Trả về (số dòng đã ghi, lỗi)
+        """
+        try:
+            season_filter = 'WHERE m.season_id = :season_id' if season_id else ''
+            event_sums = ', '.join(
+                f"SUM(CASE WHEN me.event_type = '{event_type}' THEN 1 ELSE 0 END)"
+                for event_type in PlayerStatisticsService._EVENT_COLUMNS
+            )
+            event_columns = ', '.join(PlayerStatisticsService._EVENT_COLUMNS.values())
+            event_totals = ', '.join(f'SUM({col})' for col in PlayerStatisticsService._EVENT_COLUMNS.values())
+            event_zeros = ', '.join(f'0 as {col}' for col in PlayerStatisticsService._EVENT_COLUMNS.values())
+            params = {'season_id': season_id} if season_id else {}
             
-            # Lấy thống kê từ MatchEvents
-            events_query = text('''
-                SELECT 
-                    COUNT(*) as total_events,
-                    SUM(CASE WHEN event_type = 'goal' THEN 1 ELSE 0 END) as goals,
-                    SUM(CASE WHEN event_type = 'assist' THEN 1 ELSE 0 END) as assists,
-                    SUM(CASE WHEN event_type = 'yellow_card' THEN 1 ELSE 0 END) as yellow_cards,
-                    SUM(CASE WHEN event_type = 'red_card' THEN 1 ELSE 0 END) as red_cards,
-                    SUM(CASE WHEN event_type = 'substitution_in' THEN 1 ELSE 0 END) as substitutions_in,
-                    SUM(CASE WHEN event_type = 'substitution_out' THEN 1 ELSE 0 END) as substitutions_out
-                FROM MatchEvents me
-                JOIN Matches m ON me.match_id = m.match_id
-                WHERE me.player_id = :player_id 
-                AND m.season_id = :season_id
-                AND me.team_id = :team_id
-            ''')
+            if season_id:
+                db.session.execute(
+                    text('DELETE FROM PlayerSeasonStats WHERE season_id = :season_id'), params
+                )
+            else:
+                db.session.execute(text('DELETE FROM PlayerSeasonStats'))
             
-            events_result = db.session.execute(events_query, {
-                'player_id': player_id,
-                'season_id': season_id,
-                'team_id': team_id
-            }).fetchone()
+            result = db.session.execute(text(f'''
+                INSERT INTO PlayerSeasonStats (
+                    player_id, team_id, season_id, appearances, starts, total_events, {event_columns}
+                )
+                SELECT player_id, team_id, season_id,
+                       SUM(appearances), SUM(starts), SUM(total_events),
+                       {event_totals}
+                FROM (
+                    SELECT ml.player_id, ml.team_id, m.season_id,
+                           COUNT(DISTINCT ml.match_id) as appearances,
+                           SUM(CASE WHEN ml.is_starter THEN 1 ELSE 0 END) as starts,
+                           0 as total_events, {event_zeros}
+                    FROM MatchLineups ml
+                    JOIN Matches m ON ml.match_id = m.match_id
+                    {season_filter}
+                    GROUP BY ml.player_id, ml.team_id, m.season_id
+                    
+                    UNION ALL
+                    
+                    SELECT me.player_id, me.team_id, m.season_id,
+                           0, 0, COUNT(*),
+                           {event_sums}
+                    FROM MatchEvents me
+                    JOIN Matches m ON me.match_id = m.match_id
+                    {season_filter}
+                    GROUP BY me.player_id, me.team_id, m.season_id
+                )
+                GROUP BY player_id, team_id, season_id
+            '''), params)
             
-            if events_result:
-                stats = dict(events_result._mapping)
-                # Xử lý None values
-                for key in stats:
-                    if stats[key] is None:
-                        stats[key] = 0
-                
-                # Thêm số trận đã đấu
-                stats['matches_played'] = matches_played
-                
-                # Tính hiệu suất
-                if matches_played > 0:
-                    stats['goals_per_match'] = round(stats['goals'] / matches_played, 2)
-                    stats['assists_per_match'] = round(stats['assists'] / matches_played, 2)
-                else:
-                    stats['goals_per_match'] = 0
-                    stats['assists_per_match'] = 0
-                
-                return stats
-            else:
-                return {
-                    'matches_played': matches_played,
-                    'total_events': 0,
-                    'goals': 0,
-                    'assists': 0,
-                    'yellow_cards': 0,
-                    'red_cards': 0,
-                    'substitutions_in': 0,
-                    'substitutions_out': 0,
-                    'goals_per_match': 0,
-                    'assists_per_match': 0
-                }
-                
+            if commit:
+                db.session.commit()
+            return result.rowcount, None
         except Exception as e:
-            print(f"ERROR in get_player_season_stats: {str(e)}")
-            return {
-                'matches_played': 0,
-                'total_events': 0,
-                'goals': 0,
-                'assists': 0,
-                'yellow_cards': 0,
-                'red_cards': 0,
-                'substitutions_in': 0,
-                'substitutions_out': 0,
-                'goals_per_match': 0,
-                'assists_per_match': 0
-            }
+            print(f"ERROR in rebuild_season_stats: {str(e)}")
+            db.session.rollback()
+            return 0, str(e)
     
     @staticmethod
     def get_player_detailed_stats(player_id, season_id):
@@ -207,15 +273,14 @@ class PlayerStatisticsService:
                 dict(row._mapping) for row in team_history
             ]
             
-            # Lấy thống kê tổng hợp tất cả các mùa
+            # Lấy thống kê tổng hợp tất cả các mùa (cộng các dòng PlayerSeasonStats)
             career_stats_query = text('''
                 SELECT 
-                    COUNT(DISTINCT m.match_id) as career_matches,
-                    SUM(CASE WHEN me.event_type = 'goal' THEN 1 ELSE 0 END) as career_goals,
-                    SUM(CASE WHEN me.event_type = 'assist' THEN 1 ELSE 0 END) as career_assists
-                FROM MatchEvents me
-                JOIN Matches m ON me.match_id = m.match_id
-                WHERE me.player_id = :player_id
+                    SUM(appearances) as career_matches,
+                    SUM(goals) as career_goals,
+                    SUM(assists) as career_assists
+                FROM PlayerSeasonStats
+                WHERE player_id = :player_id
             ''')
             
             career_stats_result = db.session.execute(career_stats_query, {
@@ -1,14 +1,22 @@
 # services/post_service.py
 import os
 import time
+import re
+import json
+import base64
+from collections import defaultdict
 from werkzeug.utils import secure_filename
 from flask import current_app
 from extensions import db
 from models.post import Post
 from models.like import Like
 from models.comment import Comment
-from sqlalchemy import or_ # <-- Nhớ import thêm or_
+from sqlalchemy import or_, text, tuple_, type_coerce, false, String # <-- Nhớ import thêm or_
+from sqlalchemy.orm import joinedload
 from models.user import User # <-- Import model User để join bảng
+from utils.migrations import fill_posts_search
+from utils import events
+from utils.write_queue import WriteQueue
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 
@@ -16,6 +24,9 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 class PostService:
+    # Cache kết quả kiểm tra bảng FTS5 (xem _search_index_ready)
+    _search_index_exists = None
+
     
     @staticmethod
     def create_post(user_id, form_data, file_storage):
@@ -55,6 +66,7 @@ class PostService:
             
             db.session.add(new_post)
             db.session.commit()
+            events.publish(events.POST_CREATED, user_ids=[new_post.user_id], post_id=new_post.post_id)
             
             # Trả về data đầy đủ để frontend hiển thị ngay mà không bị lỗi thiếu field
             result_data = new_post.to_dict()
@@ -72,53 +84,25 @@ class PostService:
     @staticmethod
     def get_all_posts(page=1, per_page=10, current_user_id=None, search_query=None):
         try:
+            # Có từ khóa: xếp theo độ liên quan, đếm và phân trang ngay trên bảng FTS5
+            if search_query and PostService._search_index_ready():
+                return PostService._search_posts_ranked(search_query, page, per_page, current_user_id)
+
             # Bắt đầu query cơ bản
-            query = Post.query
-
-            # --- LOGIC TÌM KIẾM MỚI ---
-            if search_query:
-                # Cần join với bảng User để tìm theo tên người đăng
-                query = query.join(User)
-                search_term = f"%{search_query}%"
-                query = query.filter(
-                    or_(
-                        Post.title.like(search_term),       # Tìm theo tiêu đề
-                        Post.content.like(search_term),     # Tìm theo nội dung
-                        User.username.like(search_term),    # Tìm theo username
-                        User.full_name.like(search_term)    # Tìm theo tên đầy đủ (nếu có cột này)
-                    )
-                )
-            # ---------------------------
+            query = PostService._apply_search(Post.query, search_query)
 
             # Sắp xếp bài mới nhất trước
-            pagination = query.order_by(Post.created_at.desc()).paginate(
+            # Load sẵn user/team/player của bài trong cùng câu query trang
+            pagination = query.options(
+                joinedload(Post.user),
+                joinedload(Post.team),
+                joinedload(Post.player)
+            ).order_by(Post.created_at.desc()).paginate(
                 page=page, per_page=per_page, error_out=False
             )
             
-            posts_data = []
-            
-            for post in pagination.items:
-                # ... (Phần code xử lý to_dict, comments, likes giữ nguyên y hệt cũ) ...
-                # Copy lại nguyên khối logic xử lý data ở đây từ file cũ của bạn
-                data = post.to_dict(current_user_id)
-                
-                # Query Comment
-                comments = Comment.query.filter_by(post_id=post.post_id).order_by(Comment.created_at.asc()).all()
-                data['comments'] = [c.to_dict(include_user=True) for c in comments]
-                data['comment_count'] = len(comments)
-
-                # Query Like
-                like_count = Like.query.filter_by(post_id=post.post_id).count()
-                data['like_count'] = like_count
-
-                # Check is_liked
-                is_liked = False
-                if current_user_id:
-                    check_like = Like.query.filter_by(user_id=current_user_id, post_id=post.post_id).first()
-                    if check_like: is_liked = True
-                data['is_liked'] = is_liked
-                
-                posts_data.append(data)
+            posts_data = PostService._assemble_feed(pagination.items, current_user_id)
+            PostService._attach_snippets(posts_data, search_query)
             
             return {
                 'posts': posts_data,
@@ -128,63 +112,360 @@ class PostService:
             }, None
         except Exception as e:
             return None, str(e)
+
     @staticmethod
-    def toggle_like(user_id, post_id):
+    def get_posts_by_cursor(cursor=None, limit=10, current_user_id=None, search_query=None):
+        """
+        Newsfeed phân trang kiểu keyset theo (created_at, post_id):
+        không COUNT(*), không OFFSET, trang ổn định khi có bài mới được đăng
+        """
+        if not isinstance(limit, int) or isinstance(limit, bool) or limit < 1:
+            return None, "limit phải là số nguyên >= 1"
+
         try:
-            existing_like = Like.query.filter_by(user_id=user_id, post_id=post_id).first()
-            
-            action = ''
-            if existing_like:
-                db.session.delete(existing_like)
-                action = 'unliked'
-            else:
-                new_like = Like(user_id=user_id, post_id=post_id)
-                db.session.add(new_like)
-                action = 'liked'
-                
+            query = PostService._apply_search(Post.query, search_query)
+
+            # So sánh trên giá trị created_at thô trong DB để khớp đúng định dạng đã lưu
+            created_at_raw = type_coerce(Post.created_at, String)
+
+            if cursor:
+                position = PostService._decode_cursor(cursor)
+                if not position:
+                    return None, "Cursor không hợp lệ"
+                query = query.filter(tuple_(created_at_raw, Post.post_id) < position)
+
+            # Lấy dư 1 bài để biết còn trang sau hay không
+            rows = query.options(
+                joinedload(Post.user),
+                joinedload(Post.team),
+                joinedload(Post.player)
+            ).add_columns(created_at_raw).order_by(
+                Post.created_at.desc(), Post.post_id.desc()
+            ).limit(limit + 1).all()
+
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            next_cursor = None
+            if has_more:
+                last_post, last_created_at = rows[-1]
+                next_cursor = PostService._encode_cursor(last_created_at, last_post.post_id)
+
+            posts = [post for post, _ in rows]
+            posts_data = PostService._assemble_feed(posts, current_user_id)
+            PostService._attach_snippets(posts_data, search_query)
+            return {
+                'posts': posts_data,
+                'next_cursor': next_cursor,
+                'has_more': has_more
+            }, None
+        except Exception as e:
+            return None, str(e)
+
+    @staticmethod
+    def _search_posts_ranked(search_query, page, per_page, current_user_id=None):
+        """
+        Tìm kiếm có xếp hạng bm25 (tiêu đề > tên người đăng > nội dung).
+        COUNT và ORDER BY ... LIMIT chạy trực tiếp trên bảng FTS5, chỉ load Posts của trang
+        """
+        match = PostService._build_match_query(search_query)
+        if not match:
+            return {'posts': [], 'total': 0, 'pages': 0, 'current_page': page}, None
+
+        page = max(page, 1)
+        total = db.session.execute(
+            text('SELECT COUNT(*) FROM PostsSearch WHERE PostsSearch MATCH :match'),
+            {'match': match}
+        ).scalar()
+
+        # snippet() chỉ được tính cho các dòng của trang sau khi sắp xếp
+        ranked = db.session.execute(text('''
+            SELECT rowid AS post_id,
+                   snippet(PostsSearch, -1, '<mark>', '</mark>', '…', 16) AS snippet
+            FROM PostsSearch
+            WHERE PostsSearch MATCH :match
+            ORDER BY bm25(PostsSearch, 5.0, 1.0, 2.0)
+            LIMIT :limit OFFSET :offset
+        '''), {'match': match, 'limit': per_page, 'offset': (page - 1) * per_page}).fetchall()
+        ranked_ids = [row.post_id for row in ranked]
+        snippets = {row.post_id: row.snippet for row in ranked}
+
+        posts_by_id = {}
+        if ranked_ids:
+            posts_by_id = {
+                post.post_id: post for post in Post.query.options(
+                    joinedload(Post.user),
+                    joinedload(Post.team),
+                    joinedload(Post.player)
+                ).filter(Post.post_id.in_(ranked_ids))
+            }
+        posts = [posts_by_id[post_id] for post_id in ranked_ids if post_id in posts_by_id]
+
+        posts_data = PostService._assemble_feed(posts, current_user_id)
+        for data in posts_data:
+            data['snippet'] = snippets.get(data['post_id'])
+
+        return {
+            'posts': posts_data,
+            'total': total,
+            'pages': (total + per_page - 1) // per_page if per_page > 0 else 0,
+            'current_page': page
+        }, None
+
+    @staticmethod
+    def _apply_search(query, search_query):
+        """Lọc bài viết theo tiêu đề, nội dung hoặc tên người đăng qua bảng FTS5 PostsSearch"""
+        if not search_query:
+            return query
+
+        if not PostService._search_index_ready():
+            return PostService._apply_like_search(query, search_query)
+
+        match = PostService._build_match_query(search_query)
+        if not match:
+            return query.filter(false())
+
+        matched_ids = text('SELECT rowid FROM PostsSearch WHERE PostsSearch MATCH :match')\
+            .bindparams(match=match)
+        return query.filter(Post.post_id.in_(matched_ids))
+
+    @staticmethod
+    def _apply_like_search(query, search_query):
+        """Tìm kiếm LIKE cũ, dùng khi SQLite không có FTS5"""
+        # Cần join với bảng User để tìm theo tên người đăng
+        query = query.join(User, Post.user_id == User.user_id)
+        search_term = f"%{search_query}%"
+        return query.filter(
+            or_(
+                Post.title.like(search_term),       # Tìm theo tiêu đề
+                Post.content.like(search_term),     # Tìm theo nội dung
+                User.username.like(search_term),    # Tìm theo username
+                User.full_name.like(search_term)    # Tìm theo tên đầy đủ (nếu có cột này)
+            )
+        )
+
+    @staticmethod
+    def _build_match_query(search_query):
+        """
+        Chuyển chuỗi người dùng gõ thành biểu thức MATCH: mọi từ đều phải có,
+        từ cuối cho phép tìm theo tiền tố (gõ tới đâu tìm tới đó).
+        Bỏ đ/Đ giống lúc index, các dấu khác do tokenizer tự bỏ ("Ha Noi" khớp "Hà Nội")
+        """
+        folded = search_query.replace('đ', 'd').replace('Đ', 'D')
+        tokens = re.findall(r'\w+', folded)
+        if not tokens:
+            return None
+        terms = [f'"{token}"' for token in tokens]
+        terms[-1] += '*'
+        return ' '.join(terms)
+
+    @staticmethod
+    def _search_index_ready():
+        """Kiểm tra (1 lần mỗi process) bảng FTS5 PostsSearch đã được migration tạo chưa"""
+        if PostService._search_index_exists is None:
+            PostService._search_index_exists = db.session.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'PostsSearch'"
+            )).first() is not None
+        return PostService._search_index_exists
+
+    @staticmethod
+    def _attach_snippets(posts_data, search_query):
+        """Gắn đoạn trích có highlight từ khóa (<mark>) cho các bài trong trang"""
+        if not posts_data or not search_query or not PostService._search_index_ready():
+            return
+        match = PostService._build_match_query(search_query)
+        if not match:
+            return
+
+        post_ids = ', '.join(str(int(data['post_id'])) for data in posts_data)
+        rows = db.session.execute(text(f'''
+            SELECT rowid AS post_id,
+                   snippet(PostsSearch, -1, '<mark>', '</mark>', '…', 16) AS snippet
+            FROM PostsSearch
+            WHERE PostsSearch MATCH :match AND rowid IN ({post_ids})
+        '''), {'match': match})
+
+        snippets = {row.post_id: row.snippet for row in rows}
+        for data in posts_data:
+            data['snippet'] = snippets.get(data['post_id'])
+
+    @staticmethod
+    def rebuild_search_index():
+        """Dựng lại toàn bộ index FTS5 (kèm bảng PostsSearchAuthor) từ Posts/Users, giá trị đã bỏ đ"""
+        try:
+            if not PostService._search_index_ready():
+                return 0, "Bảng PostsSearch chưa được tạo (SQLite không hỗ trợ FTS5?)"
+
+            indexed = fill_posts_search()
+            db.session.commit()
+            return indexed, None
+        except Exception as e:
+            db.session.rollback()
+            return 0, str(e)
+
+    @staticmethod
+    def _encode_cursor(created_at, post_id):
+        """Đóng gói vị trí (created_at, post_id) thành token trả cho client"""
+        payload = json.dumps([created_at, post_id], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        """Giải mã token cursor, trả về None nếu token sai định dạng"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, post_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if not isinstance(created_at, str) or not isinstance(post_id, int):
+                return None
+            return created_at, post_id
+        except (ValueError, TypeError):
+            return None
+
+    @staticmethod
+    def _assemble_feed(posts, current_user_id=None, comments_desc=False):
+        """
+        Dựng dữ liệu cho một trang bài viết với số query cố định:
+        comments và các bài user hiện tại đã like được gom theo post_id,
+        like_count / comment_count đọc từ cột đếm của Posts
+        """
+        post_ids = [post.post_id for post in posts]
+        if not post_ids:
+            return []
+
+        # 1. Toàn bộ comment của trang (kèm user) trong 1 query
+        comment_order = Comment.created_at.desc() if comments_desc else Comment.created_at.asc()
+        comments = Comment.query.options(joinedload(Comment.user))\
+            .filter(Comment.post_id.in_(post_ids))\
+            .order_by(comment_order).all()
+
+        comments_by_post = defaultdict(list)
+        for comment in comments:
+            comments_by_post[comment.post_id].append(comment.to_dict(include_user=True))
+
+        # 2. Các bài trong trang mà user hiện tại đã like
+        liked_post_ids = set()
+        if current_user_id:
+            liked_post_ids = {
+                row.post_id for row in db.session.query(Like.post_id).filter(
+                    Like.user_id == current_user_id,
+                    Like.post_id.in_(post_ids)
+                )
+            }
+
+        posts_data = []
+        for post in posts:
+            data = post.to_dict(current_user_id, is_liked=post.post_id in liked_post_ids)
+            data['comments'] = comments_by_post.get(post.post_id, [])
+            posts_data.append(data)
+
+        return posts_data
+
+    @staticmethod
+    def _bump_counter(post_id, column, delta):
+        """Cộng/trừ bộ đếm like_count hoặc comment_count của bài (không commit), trả về user_id chủ bài"""
+        if column not in ('like_count', 'comment_count'):
+            raise ValueError(f"Invalid counter column: {column}")
+        return db.session.execute(text(f'''
+            UPDATE Posts
+            SET {column} = MAX({column} + :delta, 0)
+            WHERE post_id = :post_id
+            RETURNING user_id
+        '''), {'delta': delta, 'post_id': post_id}).scalar()
+
+    @staticmethod
+    def reconcile_counters():
+        """
+        Tính lại like_count / comment_count cho các bài bị lệch so với Likes / Comments
+        bằng 1 câu UPDATE, trả về số bài đã sửa
+        """
+        try:
+            result = db.session.execute(text('''
+                UPDATE Posts
+                SET like_count = actual.likes,
+                    comment_count = actual.comments
+                FROM (
+                    SELECT p.post_id,
+                           COALESCE(l.total, 0) AS likes,
+                           COALESCE(c.total, 0) AS comments
+                    FROM Posts p
+                    LEFT JOIN (SELECT post_id, COUNT(*) AS total FROM Likes GROUP BY post_id) l
+                        ON l.post_id = p.post_id
+                    LEFT JOIN (SELECT post_id, COUNT(*) AS total FROM Comments GROUP BY post_id) c
+                        ON c.post_id = p.post_id
+                ) AS actual
+                WHERE actual.post_id = Posts.post_id
+                  AND (Posts.like_count != actual.likes OR Posts.comment_count != actual.comments)
+            '''))
             db.session.commit()
+            return result.rowcount, None
+        except Exception as e:
+            db.session.rollback()
+            return 0, str(e)
+
+    @staticmethod
+    def toggle_like(user_id, post_id):
+        try:
+            # Ghi qua WriteQueue: like / bỏ like đồng thời được gom commit, không tranh khóa SQLite
+            action, author_id = WriteQueue.run(PostService._toggle_like_job, user_id, post_id)
+            if action == 'liked' and author_id:
+                events.publish(events.LIKE_RECEIVED, user_ids=[author_id], post_id=post_id)
             return action, None
         except Exception as e:
             db.session.rollback()
             return None, str(e)
 
+    @staticmethod
+    def _toggle_like_job(user_id, post_id):
+        """Job ghi: thêm / bỏ like và cập nhật bộ đếm (không commit), trả về (action, user_id chủ bài)"""
+        existing_like = Like.query.filter_by(user_id=user_id, post_id=post_id).first()
+        
+        if existing_like:
+            db.session.delete(existing_like)
+            action = 'unliked'
+            delta = -1
+        else:
+            new_like = Like(user_id=user_id, post_id=post_id)
+            db.session.add(new_like)
+            action = 'liked'
+            delta = 1
+        
+        # Cập nhật bộ đếm trong cùng transaction với Like
+        author_id = PostService._bump_counter(post_id, 'like_count', delta)
+        return action, author_id
+
     @staticmethod
     def add_comment(user_id, post_id, content):
         try:
             if not content or not content.strip():
                 return None, "Nội dung bình luận không được để trống"
-                
-            new_comment = Comment(user_id=user_id, post_id=post_id, content=content)
-            db.session.add(new_comment)
-            db.session.commit()
             
-            return new_comment.to_dict(include_user=True), None
+            return WriteQueue.run(PostService._add_comment_job, user_id, post_id, content), None
         except Exception as e:
+            db.session.rollback()
             return None, str(e)
+
+    @staticmethod
+    def _add_comment_job(user_id, post_id, content):
+        """Job ghi: thêm bình luận và tăng comment_count (không commit), trả về dict bình luận"""
+        new_comment = Comment(user_id=user_id, post_id=post_id, content=content)
+        db.session.add(new_comment)
+        PostService._bump_counter(post_id, 'comment_count', 1)
+        db.session.flush()
+        return new_comment.to_dict(include_user=True)
             
     @staticmethod
     def get_post_detail(post_id, current_user_id=None):
         try:
-            post = Post.query.get(post_id)
+            post = Post.query.options(
+                joinedload(Post.user),
+                joinedload(Post.team),
+                joinedload(Post.player)
+            ).filter(Post.post_id == post_id).first()
             if not post:
                 return None, "Bài viết không tồn tại"
             
-            data = post.to_dict(current_user_id)
-            
-            # Lấy comment
-            comments = Comment.query.filter_by(post_id=post_id)\
-                .order_by(Comment.created_at.desc()).all()
-            data['comments'] = [c.to_dict(include_user=True) for c in comments]
-            
-            # Lấy like count
-            data['like_count'] = Like.query.filter_by(post_id=post_id).count()
-            
-            # Check is liked
-            if current_user_id:
-                check = Like.query.filter_by(user_id=current_user_id, post_id=post_id).first()
-                data['is_liked'] = True if check else False
-            else:
-                data['is_liked'] = False
+            # Dùng chung bộ dựng newsfeed (comment mới nhất lên đầu như cũ)
+            data = PostService._assemble_feed([post], current_user_id, comments_desc=True)[0]
 
             return data, None
         except Exception as e:
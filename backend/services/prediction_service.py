@@ -1,107 +1,105 @@
+import threading
+import time
 from datetime import datetime
 from services.team_service import TeamService 
+from services.leaderboard_service import LeaderboardService
+from utils import events
+from utils.write_queue import WriteQueue
 from models.prediction import Prediction
+from models.match_prediction_stats import MatchPredictionStats
+from models.match_prediction_score import MatchPredictionScore
 from models.match import Match
 from models.user import User
 from extensions import db
-from sqlalchemy import desc, and_, or_ 
+from sqlalchemy import desc, and_, or_, text, func
+from sqlalchemy.orm import aliased
 from models.team import Team  # Thêm import này
 from models.stadium import Stadium  # Thêm import này 
 from models.season import Season  # Thêm import này
-from services.match_service import MatchService
 
 class PredictionService:
     @staticmethod
     def create_prediction(user_id, match_id, data):
         """
-        Tạo dự đoán mới cho người dùng
+        Tạo dự đoán mới (ghi qua WriteQueue, chung transaction với các thao tác ghi khác)
         """
         try:
             print(f"DEBUG: Creating prediction for user={user_id}, match={match_id}")
-            
-            # Kiểm tra trận đấu có tồn tại
-            match = Match.query.get(match_id)
-            if not match:
-                print(f"DEBUG: Match {match_id} not found")
-                return None, "Match not found"
-            
-            # Kiểm tra trận đấu đã diễn ra chưa (status phải là 'Chưa đá')
-            if match.status != 'Chưa đá':
-                print(f"DEBUG: Match {match_id} status is {match.status}, not 'Chưa đá'")
-                return None, "Cannot predict for finished or ongoing match"
-            
-            # Kiểm tra người dùng đã dự đoán chưa
-            existing_prediction = Prediction.query.filter_by(
-                user_id=user_id, 
-                match_id=match_id
-            ).first()
-            
-            if existing_prediction:
-                print(f"DEBUG: User {user_id} already predicted match {match_id}")
-                return None, "Already predicted this match"
-            
-            # Tạo dự đoán mới
-            prediction = Prediction(
-                user_id=user_id,
-                match_id=match_id,
-                predicted_result=data.get('predicted_result'),
-                predicted_home_score=data.get('predicted_home_score'),
-                predicted_away_score=data.get('predicted_away_score'),
-                predicted_card_over_under=data.get('predicted_card_over_under'),
-                status='PENDING'
+            prediction_id, error = WriteQueue.run(
+                PredictionService._create_prediction_job, user_id, match_id, data
             )
+            if error:
+                return None, error
+            PredictionService.invalidate_prediction_summary(match_id)
             
-            db.session.add(prediction)
-            db.session.commit()
-            
-            print(f"DEBUG: Prediction created successfully with ID {prediction.prediction_id}")
-            return prediction, None
+            print(f"DEBUG: Prediction created successfully with ID {prediction_id}")
+            # Job chạy trên session của luồng ghi -> nạp lại trên session của request
+            return Prediction.query.get(prediction_id), None
             
         except Exception as e:
             db.session.rollback()
             print(f"DEBUG: Error creating prediction: {str(e)}")
             return None, str(e)
+    
+    @staticmethod
+    def _create_prediction_job(user_id, match_id, data):
+        """Job ghi: kiểm tra và thêm dự đoán (không commit), trả về (prediction_id, error)"""
+        # Kiểm tra trận đấu có tồn tại
+        match = Match.query.get(match_id)
+        if not match:
+            print(f"DEBUG: Match {match_id} not found")
+            return None, "Match not found"
+        
+        # Kiểm tra trận đấu đã diễn ra chưa (status phải là 'Chưa đá')
+        if match.status != 'Chưa đá':
+            print(f"DEBUG: Match {match_id} status is {match.status}, not 'Chưa đá'")
+            return None, "Cannot predict for finished or ongoing match"
+        
+        # Kiểm tra người dùng đã dự đoán chưa
+        existing_prediction = Prediction.query.filter_by(
+            user_id=user_id, 
+            match_id=match_id
+        ).first()
+        
+        if existing_prediction:
+            print(f"DEBUG: User {user_id} already predicted match {match_id}")
+            return None, "Already predicted this match"
+        
+        # Tạo dự đoán mới
+        prediction = Prediction(
+            user_id=user_id,
+            match_id=match_id,
+            predicted_result=data.get('predicted_result'),
+            predicted_home_score=data.get('predicted_home_score'),
+            predicted_away_score=data.get('predicted_away_score'),
+            predicted_card_over_under=data.get('predicted_card_over_under'),
+            status='PENDING'
+        )
+        
+        db.session.add(prediction)
+        PredictionService._record_distribution(
+            match.match_id, new=PredictionService._distribution_key(prediction)
+        )
+        db.session.flush()
+        return prediction.prediction_id, None
         
     @staticmethod
     def update_prediction(prediction_id, user_id, data):
         """
-        Cập nhật dự đoán (chỉ khi trận chưa bắt đầu)
+        Cập nhật dự đoán (chỉ khi trận chưa bắt đầu, ghi qua WriteQueue)
         """
         try:
             print(f"DEBUG: Updating prediction {prediction_id}")
             print(f"DEBUG: Data received: {data}")
             
-            prediction = Prediction.query.get(prediction_id)
-            if not prediction:
-                return None, "Prediction not found"
-            
-            # Kiểm tra quyền sở hữu
-            if prediction.user_id != int(user_id):
-                return None, "Unauthorized"
-            
-            # Kiểm tra trận đấu
-            match = Match.query.get(prediction.match_id)
-            if match.status != 'Chưa đá':
-                return None, "Cannot update prediction for finished match"
-            
-            # Cập nhật kết quả
-            if 'predicted_result' in data:
-                prediction.predicted_result = data['predicted_result']
-            
-            # QUAN TRỌNG: Cập nhật tỉ số, cho phép None
-            if 'predicted_home_score' in data:
-                # Nhận None từ frontend nếu là dự đoán kết quả
-                prediction.predicted_home_score = data['predicted_home_score']
-            
-            if 'predicted_away_score' in data:
-                prediction.predicted_away_score = data['predicted_away_score']
-            
-            if 'predicted_card_over_under' in data:
-                prediction.predicted_card_over_under = data['predicted_card_over_under']
-
-            prediction.updated_at = datetime.utcnow()
-            db.session.commit()
+            match_id, error = WriteQueue.run(
+                PredictionService._update_prediction_job, prediction_id, user_id, data
+            )
+            if error:
+                return None, error
+            PredictionService.invalidate_prediction_summary(match_id)
             
+            prediction = Prediction.query.get(prediction_id)
             print(f"DEBUG: Updated prediction: {prediction.to_dict()}")
             return prediction, None
             
@@ -109,50 +107,61 @@ class PredictionService:
             db.session.rollback()
             print(f"DEBUG: Error updating prediction: {str(e)}")
             return None, str(e)
+    
+    @staticmethod
+    def _update_prediction_job(prediction_id, user_id, data):
+        """Job ghi: kiểm tra quyền / trạng thái trận rồi sửa dự đoán, trả về (match_id, error)"""
+        prediction = Prediction.query.get(prediction_id)
+        if not prediction:
+            return None, "Prediction not found"
+        
+        # Kiểm tra quyền sở hữu
+        if prediction.user_id != int(user_id):
+            return None, "Unauthorized"
+        
+        # Kiểm tra trận đấu
+        match = Match.query.get(prediction.match_id)
+        if match.status != 'Chưa đá':
+            return None, "Cannot update prediction for finished match"
+        
+        old_choice = PredictionService._distribution_key(prediction)
+        
+        # Cập nhật kết quả
+        if 'predicted_result' in data:
+            prediction.predicted_result = data['predicted_result']
+        
+        # QUAN TRỌNG: Cập nhật tỉ số, cho phép None
+        if 'predicted_home_score' in data:
+            # Nhận None từ frontend nếu là dự đoán kết quả
+            prediction.predicted_home_score = data['predicted_home_score']
+        
+        if 'predicted_away_score' in data:
+            prediction.predicted_away_score = data['predicted_away_score']
+        
+        if 'predicted_card_over_under' in data:
+            prediction.predicted_card_over_under = data['predicted_card_over_under']
+
+        prediction.updated_at = datetime.utcnow()
+        PredictionService._record_distribution(
+            match.match_id, old=old_choice, new=PredictionService._distribution_key(prediction)
+        )
+        return match.match_id, None
         
     @staticmethod
     def delete_prediction(prediction_id, user_id):
         """
-        Xóa dự đoán (chỉ khi trận chưa bắt đầu)
+        Xóa dự đoán (chỉ khi trận chưa bắt đầu, ghi qua WriteQueue)
         """
         try:
             print(f"DEBUG: Attempting to delete prediction {prediction_id} for user {user_id}")
             print(f"DEBUG: User ID type: {type(user_id)}")
             
-            prediction = Prediction.query.get(prediction_id)
-            if not prediction:
-                print(f"DEBUG: Prediction {prediction_id} not found")
-                return False, "Prediction not found"
-            
-            # KIỂM TRA QUYỀN SỞ HỮU - chuyển user_id về int để so sánh
-            # Vì JWT identity thường trả về string
-            try:
-                user_id_int = int(user_id)
-            except (ValueError, TypeError):
-                print(f"DEBUG: Invalid user_id format: {user_id}")
-                return False, "Invalid user ID format"
-            
-            print(f"DEBUG: Prediction user_id: {prediction.user_id} (type: {type(prediction.user_id)})")
-            print(f"DEBUG: Current user_id: {user_id_int} (type: {type(user_id_int)})")
-            
-            if prediction.user_id != user_id_int:
-                print(f"DEBUG: Unauthorized: {prediction.user_id} != {user_id_int}")
-                return False, "Unauthorized: You don't own this prediction"
-            
-            # Kiểm tra trận đấu đã bắt đầu chưa
-            match = Match.query.get(prediction.match_id)
-            if not match:
-                print(f"DEBUG: Match {prediction.match_id} not found")
-                return False, "Match not found"
-            
-            print(f"DEBUG: Match status: {match.status}")
-            if match.status != 'Chưa đá':
-                print(f"DEBUG: Cannot delete. Match status is: {match.status}")
-                return False, f"Cannot delete prediction for match that has already started or finished (Status: {match.status})"
-            
-            print(f"DEBUG: Deleting prediction {prediction_id}...")
-            db.session.delete(prediction)
-            db.session.commit()
+            match_id, error = WriteQueue.run(
+                PredictionService._delete_prediction_job, prediction_id, user_id
+            )
+            if error:
+                return False, error
+            PredictionService.invalidate_prediction_summary(match_id)
             
             print(f"DEBUG: Prediction {prediction_id} deleted successfully")
             return True, None
@@ -163,7 +172,208 @@ class PredictionService:
             import traceback
             traceback.print_exc()
             return False, str(e)
+    
+    @staticmethod
+    def _delete_prediction_job(prediction_id, user_id):
+        """Job ghi: kiểm tra quyền / trạng thái trận rồi xóa dự đoán, trả về (match_id, error)"""
+        prediction = Prediction.query.get(prediction_id)
+        if not prediction:
+            print(f"DEBUG: Prediction {prediction_id} not found")
+            return None, "Prediction not found"
+        
+        # KIỂM TRA QUYỀN SỞ HỮU - chuyển user_id về int để so sánh
+        # Vì JWT identity thường trả về string
+        try:
+            user_id_int = int(user_id)
+        except (ValueError, TypeError):
+            print(f"DEBUG: Invalid user_id format: {user_id}")
+            return None, "Invalid user ID format"
         
+        print(f"DEBUG: Prediction user_id: {prediction.user_id} (type: {type(prediction.user_id)})")
+        print(f"DEBUG: Current user_id: {user_id_int} (type: {type(user_id_int)})")
+        
+        if prediction.user_id != user_id_int:
+            print(f"DEBUG: Unauthorized: {prediction.user_id} != {user_id_int}")
+            return None, "Unauthorized: You don't own this prediction"
+        
+        # Kiểm tra trận đấu đã bắt đầu chưa
+        match = Match.query.get(prediction.match_id)
+        if not match:
+            print(f"DEBUG: Match {prediction.match_id} not found")
+            return None, "Match not found"
+        
+        print(f"DEBUG: Match status: {match.status}")
+        if match.status != 'Chưa đá':
+            print(f"DEBUG: Cannot delete. Match status is: {match.status}")
+            return None, f"Cannot delete prediction for match that has already started or finished (Status: {match.status})"
+        
+        print(f"DEBUG: Deleting prediction {prediction_id}...")
+        PredictionService._record_distribution(
+            match.match_id, old=PredictionService._distribution_key(prediction)
+        )
+        db.session.delete(prediction)
+        return match.match_id, None
+    
+    MAX_BATCH_SIZE = 50
+    _PREDICTION_FIELDS = (
+        'predicted_result', 'predicted_home_score', 'predicted_away_score', 'predicted_card_over_under'
+    )
+    
+    @staticmethod
+    def _batch_item_error(item, message):
+        return {
+            'match_id': item.get('match_id') if isinstance(item, dict) else None,
+            'status': 'error',
+            'message': message
+        }
+    
+    @staticmethod
+    def _batch_match_id(item):
+        """match_id của 1 dự đoán trong batch (nhận cả chuỗi "5" như POST /predictions), trả về (id, lỗi)"""
+        if not isinstance(item, dict) or item.get('match_id') is None:
+            return None, "Missing match_id"
+        match_id = item['match_id']
+        if isinstance(match_id, bool):
+            return None, "Invalid match_id"
+        try:
+            return int(match_id), None
+        except (ValueError, TypeError):
+            return None, "Invalid match_id"
+    
+    @staticmethod
+    def _batch_item_invalid(item):
+        """Kiểm tra kiểu / giá trị các trường dự đoán trước khi ghi và cộng vào bộ đếm phân bố"""
+        result = item.get('predicted_result')
+        if result is not None and result not in PredictionService._RESULT_COLUMNS:
+            return "Invalid predicted_result"
+        for field in ('predicted_home_score', 'predicted_away_score'):
+            score = item.get(field)
+            if score is not None and (isinstance(score, bool) or not isinstance(score, int) or score < 0):
+                return f"Invalid {field}"
+        cards = item.get('predicted_card_over_under')
+        card_line = PredictionService.CARD_LINE
+        if cards is not None and cards not in (f'OVER_{card_line}', f'UNDER_{card_line}'):
+            return "Invalid predicted_card_over_under"
+        return None
+    
+    @staticmethod
+    def save_predictions_batch(user_id, items):
+        """
+        Tạo / cập nhật nhiều dự đoán của user trong 1 job ghi (ví dụ cả 1 vòng đấu).
+        Kiểm tra trận và dự đoán đã có bằng 2 câu IN, ghi qua WriteQueue như dự đoán lẻ.
+        Dự đoán đã có thì cập nhật các trường được gửi (giống update_prediction).
+        Trả về (kết quả từng dự đoán theo thứ tự gửi lên, lỗi)
+        """
+        if not isinstance(items, list) or not items:
+            return None, "Missing predictions"
+        if len(items) > PredictionService.MAX_BATCH_SIZE:
+            return None, f"Too many predictions (max {PredictionService.MAX_BATCH_SIZE})"
+        
+        try:
+            user_id = int(user_id)
+            results = WriteQueue.run(PredictionService._save_predictions_batch_job, user_id, items)
+            
+            saved = [result for result in results if result['status'] != 'error']
+            for result in saved:
+                PredictionService.invalidate_prediction_summary(result['match_id'])
+            
+            print(f"DEBUG: Saved {len(saved)}/{len(items)} predictions in batch for user={user_id}")
+            return results, None
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"DEBUG: Error saving prediction batch: {str(e)}")
+            return None, str(e)
+    
+    @staticmethod
+    def _save_predictions_batch_job(user_id, items):
+        """Job ghi: kiểm tra và tạo / sửa các dự đoán (không commit), trả về kết quả từng dự đoán"""
+        item_match_ids = [PredictionService._batch_match_id(item) for item in items]
+        match_ids = {match_id for match_id, error in item_match_ids if error is None}
+        
+        match_status = dict(
+            db.session.query(Match.match_id, Match.status).filter(Match.match_id.in_(match_ids))
+        ) if match_ids else {}
+        existing = {
+            prediction.match_id: prediction
+            for prediction in Prediction.query.filter(
+                Prediction.user_id == user_id,
+                Prediction.match_id.in_(match_ids)
+            )
+        } if match_ids else {}
+        
+        results = []
+        saved = []  # (vị trí trong results, dự đoán, 'created' / 'updated')
+        distribution_changes = []
+        seen = set()
+        for item, (match_id, error) in zip(items, item_match_ids):
+            if error:
+                results.append(PredictionService._batch_item_error(item, error))
+                continue
+            
+            has_result = 'predicted_result' in item
+            has_score = 'predicted_home_score' in item and 'predicted_away_score' in item
+            has_cards = 'predicted_card_over_under' in item
+            
+            if match_id in seen:
+                results.append(PredictionService._batch_item_error(item, "Duplicate match in batch"))
+                continue
+            seen.add(match_id)
+            
+            if not (has_result or has_score or has_cards):
+                results.append(PredictionService._batch_item_error(item, "Missing prediction data"))
+                continue
+            invalid = PredictionService._batch_item_invalid(item)
+            if invalid:
+                results.append(PredictionService._batch_item_error(item, invalid))
+                continue
+            if match_id not in match_status:
+                results.append(PredictionService._batch_item_error(item, "Match not found"))
+                continue
+            if match_status[match_id] != 'Chưa đá':
+                results.append(PredictionService._batch_item_error(
+                    item, "Cannot predict for finished or ongoing match"
+                ))
+                continue
+            
+            prediction = existing.get(match_id)
+            if prediction:
+                old_choice = PredictionService._distribution_key(prediction)
+                for field in PredictionService._PREDICTION_FIELDS:
+                    if field in item:
+                        setattr(prediction, field, item[field])
+                prediction.updated_at = datetime.utcnow()
+                action = 'updated'
+            else:
+                old_choice = None
+                prediction = Prediction(
+                    user_id=user_id,
+                    match_id=match_id,
+                    status='PENDING',
+                    **{field: item.get(field) for field in PredictionService._PREDICTION_FIELDS}
+                )
+                db.session.add(prediction)
+                action = 'created'
+            
+            distribution_changes.append(
+                (match_id, old_choice, PredictionService._distribution_key(prediction))
+            )
+            saved.append((len(results), prediction, action))
+            results.append(None)
+        
+        if saved:
+            PredictionService._record_distributions(distribution_changes)
+            # flush để có prediction_id, đọc dữ liệu ngay trong job
+            # (luồng ghi commit cả lô sau đó, to_dict() sau commit phải nạp lại từng dòng)
+            db.session.flush()
+            for index, prediction, action in saved:
+                results[index] = {
+                    'match_id': prediction.match_id,
+                    'status': action,
+                    'data': prediction.to_dict()
+                }
+        return results
+    
     @staticmethod
     def get_user_predictions(user_id, page=1, per_page=20):
         """
@@ -202,96 +412,345 @@ class PredictionService:
         except Exception as e:
             return None, str(e)
     
+    # ===== Phân bố dự đoán của trận (MatchPredictionStats / MatchPredictionScores) =====
+    
+    _RESULT_COLUMNS = {'HOME_WIN': 'home_win', 'DRAW': 'draw', 'AWAY_WIN': 'away_win'}
+    _DISTRIBUTION_COLUMNS = ('total', 'home_win', 'draw', 'away_win', 'cards_over', 'cards_under')
+    
+    @staticmethod
+    def _distribution_key(prediction):
+        """Các lựa chọn của 1 dự đoán được tính vào bộ đếm phân bố"""
+        return (
+            prediction.predicted_result,
+            prediction.predicted_home_score,
+            prediction.predicted_away_score,
+            prediction.predicted_card_over_under
+        )
+    
+    @staticmethod
+    def _card_column(choice):
+        if not choice:
+            return None
+        if choice.startswith('OVER'):
+            return 'cards_over'
+        if choice.startswith('UNDER'):
+            return 'cards_under'
+        return None
+    
+    @staticmethod
+    def _record_distribution(match_id, old=None, new=None):
+        """
+        Cập nhật bộ đếm phân bố của trận: trừ lựa chọn cũ (old), cộng lựa chọn mới (new).
+        Chưa commit, chạy cùng transaction tạo / sửa / xóa dự đoán
+        """
+        PredictionService._record_distributions([(match_id, old, new)])
+    
+    @staticmethod
+    def _record_distributions(changes):
+        """Như _record_distribution cho nhiều thay đổi [(match_id, old, new)], gộp thành executemany"""
+        counts = {}
+        scores = {}
+        for match_id, old, new in changes:
+            if old == new:
+                continue
+            match_counts = counts.setdefault(
+                match_id, dict.fromkeys(PredictionService._DISTRIBUTION_COLUMNS, 0)
+            )
+            for choice, sign in ((old, -1), (new, 1)):
+                if choice is None:
+                    continue
+                result, home_score, away_score, cards = choice
+                match_counts['total'] += sign
+                result_column = PredictionService._RESULT_COLUMNS.get(result)
+                if result_column:
+                    match_counts[result_column] += sign
+                card_column = PredictionService._card_column(cards)
+                if card_column:
+                    match_counts[card_column] += sign
+                if home_score is not None and away_score is not None:
+                    score = (match_id, int(home_score), int(away_score))
+                    scores[score] = scores.get(score, 0) + sign
+        
+        if not counts:
+            return
+        
+        columns = PredictionService._DISTRIBUTION_COLUMNS
+        db.session.execute(text(f'''
+            INSERT INTO MatchPredictionStats (match_id, {', '.join(columns)})
+            VALUES (:match_id, {', '.join(f':{col}' for col in columns)})
+            ON CONFLICT(match_id) DO UPDATE SET
+                {', '.join(f'{col} = {col} + excluded.{col}' for col in columns)}
+        '''), [dict(match_counts, match_id=match_id) for match_id, match_counts in counts.items()])
+        
+        score_params = [
+            {'match_id': match_id, 'home_score': home, 'away_score': away, 'count': count}
+            for (match_id, home, away), count in scores.items() if count
+        ]
+        if score_params:
+            db.session.execute(text('''
+                INSERT INTO MatchPredictionScores (match_id, home_score, away_score, count)
+                VALUES (:match_id, :home_score, :away_score, :count)
+                ON CONFLICT(match_id, home_score, away_score) DO UPDATE SET
+                    count = count + excluded.count
+            '''), score_params)
+            
+            emptied = {param['match_id'] for param in score_params if param['count'] < 0}
+            if emptied:
+                db.session.execute(text('''
+                    DELETE FROM MatchPredictionScores WHERE match_id = :match_id AND count <= 0
+                '''), [{'match_id': match_id} for match_id in emptied])
+    
+    @staticmethod
+    def rebuild_distribution(match_id=None, commit=True):
+        """
+        Tính lại MatchPredictionStats / MatchPredictionScores từ bảng Predictions
+        (1 trận hoặc tất cả). Trả về (số trận đã ghi, lỗi)
+        """
+        try:
+            match_filter = 'WHERE match_id = :match_id' if match_id else ''
+            params = {'match_id': match_id} if match_id else {}
+            db.session.execute(text(f'DELETE FROM MatchPredictionStats {match_filter}'), params)
+            db.session.execute(text(f'DELETE FROM MatchPredictionScores {match_filter}'), params)
+            
+            result = db.session.execute(text(f'''
+                INSERT INTO MatchPredictionStats (
+                    match_id, total, home_win, draw, away_win, cards_over, cards_under
+                )
+                SELECT match_id, COUNT(*),
+                       SUM(CASE WHEN predicted_result = 'HOME_WIN' THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN predicted_result = 'DRAW' THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN predicted_result = 'AWAY_WIN' THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN predicted_card_over_under LIKE 'OVER%' THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN predicted_card_over_under LIKE 'UNDER%' THEN 1 ELSE 0 END)
+                FROM Predictions
+                {match_filter}
+                GROUP BY match_id
+            '''), params)
+            
+            score_filter = 'AND match_id = :match_id' if match_id else ''
+            db.session.execute(text(f'''
+                INSERT INTO MatchPredictionScores (match_id, home_score, away_score, count)
+                SELECT match_id, predicted_home_score, predicted_away_score, COUNT(*)
+                FROM Predictions
+                WHERE predicted_home_score IS NOT NULL AND predicted_away_score IS NOT NULL
+                  {score_filter}
+                GROUP BY match_id, predicted_home_score, predicted_away_score
+            '''), params)
+            
+            if commit:
+                db.session.commit()
+                PredictionService.invalidate_prediction_summary(match_id)
+            return result.rowcount, None
+        except Exception as e:
+            print(f"ERROR in rebuild_distribution: {str(e)}")
+            db.session.rollback()
+            return 0, str(e)
+    
+    # Tóm tắt phân bố theo trận. Trước giờ đá chỉ giữ SUMMARY_TTL_SECONDS
+    # (process khác có thể vừa nhận dự đoán mới), sau giờ đá không nhận dự đoán nữa nên giữ luôn
+    SUMMARY_TTL_SECONDS = 30
+    _summary_cache = {}
+    _summary_cache_lock = threading.Lock()
+    
+    @staticmethod
+    def invalidate_prediction_summary(match_id=None):
+        with PredictionService._summary_cache_lock:
+            if match_id is None:
+                PredictionService._summary_cache.clear()
+            else:
+                PredictionService._summary_cache.pop(match_id, None)
+    
+    @staticmethod
+    def _percent(count, total):
+        return round(count * 100.0 / total, 1) if total else 0.0
+    
+    @staticmethod
+    def get_match_prediction_summary(match_id):
+        """
+        Tỉ lệ dự đoán của trận: kết quả, tỉ số, thẻ phạt (đọc từ bộ đếm, không quét Predictions).
+        Trả về (dict, lỗi)
+        """
+        with PredictionService._summary_cache_lock:
+            cached = PredictionService._summary_cache.get(match_id)
+        if cached and (cached[1] is None or cached[1] > time.monotonic()):
+            return cached[0], None
+        
+        try:
+            match = db.session.query(Match.status).filter(Match.match_id == match_id).first()
+            if not match:
+                return None, "Match not found"
+            
+            stats = db.session.get(MatchPredictionStats, match_id)
+            score_rows = db.session.query(
+                MatchPredictionScore.home_score,
+                MatchPredictionScore.away_score,
+                MatchPredictionScore.count
+            ).filter(
+                MatchPredictionScore.match_id == match_id,
+                MatchPredictionScore.count > 0
+            ).order_by(
+                desc(MatchPredictionScore.count),
+                MatchPredictionScore.home_score,
+                MatchPredictionScore.away_score
+            ).all()
+            
+            counts = stats.to_dict() if stats else dict.fromkeys(PredictionService._DISTRIBUTION_COLUMNS, 0)
+            percent = PredictionService._percent
+            
+            result_total = counts['home_win'] + counts['draw'] + counts['away_win']
+            result_split = {
+                result: {'count': counts[column], 'percent': percent(counts[column], result_total)}
+                for result, column in PredictionService._RESULT_COLUMNS.items()
+            }
+            
+            card_total = counts['cards_over'] + counts['cards_under']
+            card_line = PredictionService.CARD_LINE
+            card_split = {
+                f'OVER_{card_line}': {'count': counts['cards_over'], 'percent': percent(counts['cards_over'], card_total)},
+                f'UNDER_{card_line}': {'count': counts['cards_under'], 'percent': percent(counts['cards_under'], card_total)}
+            }
+            
+            score_total = sum(row.count for row in score_rows)
+            scores = [
+                {
+                    'home_score': row.home_score,
+                    'away_score': row.away_score,
+                    'count': row.count,
+                    'percent': percent(row.count, score_total)
+                }
+                for row in score_rows
+            ]
+            
+            # Hết nhận dự đoán (đã tới giờ đá) -> số liệu không đổi nữa
+            frozen = match.status != 'Chưa đá'
+            summary = {
+                'match_id': match_id,
+                'status': match.status,
+                'frozen': frozen,
+                'total': counts['total'],
+                'result': {'total': result_total, 'split': result_split},
+                'scores': {'total': score_total, 'histogram': scores},
+                'cards': {'total': card_total, 'split': card_split}
+            }
+            
+            expires_at = None if frozen else time.monotonic() + PredictionService.SUMMARY_TTL_SECONDS
+            with PredictionService._summary_cache_lock:
+                PredictionService._summary_cache[match_id] = (summary, expires_at)
+            return summary, None
+        except Exception as e:
+            print(f"DEBUG: Error getting prediction summary for match {match_id}: {str(e)}")
+            return None, str(e)
+    
+    # Danh sách trận sắp đá theo mùa (không phụ thuộc user), dùng chung cho mọi request.
+    # Xóa khi có trận được thêm / sửa / xóa / chuyển trạng thái (MatchService)
+    _upcoming_cache = {}
+    _upcoming_cache_lock = threading.Lock()
+    
+    @staticmethod
+    def invalidate_upcoming_matches():
+        with PredictionService._upcoming_cache_lock:
+            PredictionService._upcoming_cache.clear()
+    
+    @staticmethod
+    def _get_upcoming_snapshot(season_id):
+        """Các trận 'Chưa đá' / 'Đang diễn ra' của mùa kèm tên mùa, đội, sân (1 câu JOIN, có cache)"""
+        with PredictionService._upcoming_cache_lock:
+            snapshot = PredictionService._upcoming_cache.get(season_id)
+        if snapshot is not None:
+            return snapshot
+        
+        home_team = aliased(Team)
+        away_team = aliased(Team)
+        rows = db.session.query(
+            Match.match_id, Match.season_id, Match.round, Match.match_datetime,
+            Match.home_team_id, Match.away_team_id, Match.home_score, Match.away_score,
+            Match.status, Match.stadium_id, Match.match_url,
+            Season.name.label('season_name'),
+            home_team.name.label('home_team_name'),
+            home_team.logo_url.label('home_team_logo'),
+            away_team.name.label('away_team_name'),
+            away_team.logo_url.label('away_team_logo'),
+            Stadium.name.label('stadium_name'),
+        ).outerjoin(
+            Season, Season.season_id == Match.season_id
+        ).outerjoin(
+            home_team, home_team.team_id == Match.home_team_id
+        ).outerjoin(
+            away_team, away_team.team_id == Match.away_team_id
+        ).outerjoin(
+            Stadium, Stadium.stadium_id == Match.stadium_id
+        ).filter(
+            Match.season_id == season_id,
+            Match.status.in_(['Chưa đá', 'Đang diễn ra'])
+        ).order_by(Match.match_datetime.asc(), Match.match_id.asc()).all()
+        
+        # Logo giữ đường dẫn gốc, URL đầy đủ phụ thuộc host của request nên xử lý khi trả về
+        snapshot = tuple(dict(row._mapping) for row in rows)
+        
+        with PredictionService._upcoming_cache_lock:
+            PredictionService._upcoming_cache[season_id] = snapshot
+        return snapshot
+    
     @staticmethod
     def get_upcoming_matches_for_prediction(user_id=None):
         """
         Lấy danh sách TẤT CẢ trận sắp diễn ra để dự đoán
-        KHÔNG phân trang - load tất cả trận có status = 'Chưa đá' của mùa hiện tại
+        KHÔNG phân trang - load tất cả trận có status = 'Chưa đá' của mùa hiện tại.
+        Danh sách trận lấy từ snapshot dùng chung, dự đoán của user ghép vào bằng 1 câu IN
         """
         try:
-            MatchService.update_match_statuses()
             print(f"DEBUG: Getting ALL upcoming matches for user_id={user_id}")
             
             # 1. Lấy season_id lớn nhất (mùa hiện tại)
-            current_season = Season.query.order_by(desc(Season.season_id)).first()
-            if not current_season:
+            current_season_id = db.session.query(func.max(Season.season_id)).scalar()
+            if not current_season_id:
                 return None, "Không tìm thấy mùa giải nào"
             
-            current_season_id = current_season.season_id
             print(f"DEBUG: Current season_id = {current_season_id}")
 
-            now = datetime.utcnow()
+            # Trận tới giờ đá được MatchStatusScheduler chuyển sang 'Đang diễn ra',
+            # API này chỉ đọc
 
-            matches_to_start = Match.query.filter(
-                Match.season_id == current_season_id,
-                Match.status.in_(['Chưa đá', 'Đang diễn ra']),
-                Match.match_datetime <= now
-            ).all()
-            
-            if matches_to_start:
-                print(f"DEBUG: Auto-starting {len(matches_to_start)} matches...")
-                for match in matches_to_start:
-                    match.status = 'Đang diễn ra'
-                db.session.commit()
-            
             # 2. Lấy trận đấu: Bao gồm cả 'Chưa đá' VÀ 'Đang diễn ra'
-            matches = Match.query.filter(
-                Match.season_id == current_season_id,
-                Match.status.in_(['Chưa đá', 'Đang diễn ra'])
-            ).order_by(Match.match_datetime.asc()).all()
+            snapshot = PredictionService._get_upcoming_snapshot(current_season_id)
+            
+            print(f"DEBUG: Found {len(snapshot)} matches with status 'Chưa đá' or 'Đang diễn ra' in season {current_season_id}")
+            
+            # 3. Dự đoán của user cho các trận trên (1 câu)
+            predictions = {}
+            if user_id and snapshot:
+                predictions = {
+                    prediction.match_id: prediction
+                    for prediction in Prediction.query.filter(
+                        Prediction.user_id == user_id,
+                        Prediction.match_id.in_([match['match_id'] for match in snapshot])
+                    )
+                }
             
-            print(f"DEBUG: Found {len(matches)} matches with status 'Chưa đá' or 'Đang diễn ra' in season {current_season_id}")
+            # 4. Chuẩn bị dữ liệu trả về
+            logo_urls = {}
+            def logo_url(raw_path):
+                if raw_path not in logo_urls:
+                    logo_urls[raw_path] = TeamService._process_logo_url(raw_path)
+                return logo_urls[raw_path]
             
-            # 3. Chuẩn bị dữ liệu trả về
             matches_data = []
-            
-            for match in matches:
-                # Lấy thông tin cơ bản của trận
-                match_dict = {
-                    'match_id': match.match_id,
-                    'season_id': match.season_id,
-                    'round': match.round,
-                    'match_datetime': match.match_datetime.isoformat() if match.match_datetime else None,
-                    'home_team_id': match.home_team_id,
-                    'away_team_id': match.away_team_id,
-                    'home_score': match.home_score,
-                    'away_score': match.away_score,
-                    'status': match.status,
-                    'stadium_id': match.stadium_id,
-                    'match_url': match.match_url,
-                    'season_name': match.season.name if match.season else None,
-                    'home_team_name': match.home_team.name if match.home_team else None,
-                    'away_team_name': match.away_team.name if match.away_team else None,
-                    'stadium_name': match.stadium.name if match.stadium else None,
-                }
+            for match in snapshot:
+                match_dict = dict(match)
+                match_dict['match_datetime'] = match['match_datetime'].isoformat() if match['match_datetime'] else None
                 
-                # Thêm logo nếu có
-                # Xử lý logo cho đội nhà
-                if match.home_team and hasattr(match.home_team, 'logo_url'):
-                    match_dict['home_team_logo'] = TeamService._process_logo_url(match.home_team.logo_url)
-                else:
-                    match_dict['home_team_logo'] = None
-                    
-                # Xử lý logo cho đội khách
-                if match.away_team and hasattr(match.away_team, 'logo_url'):
-                    match_dict['away_team_logo'] = TeamService._process_logo_url(match.away_team.logo_url)
-                else:
-                    match_dict['away_team_logo'] = None
+                # Xử lý logo cho đội nhà / đội khách
+                match_dict['home_team_logo'] = logo_url(match['home_team_logo']) if match['home_team_name'] is not None else None
+                match_dict['away_team_logo'] = logo_url(match['away_team_logo']) if match['away_team_name'] is not None else None
                 
-                # Nếu có user_id, kiểm tra xem đã dự đoán chưa
-                if user_id:
-                    prediction = Prediction.query.filter_by(
-                        user_id=user_id,
-                        match_id=match.match_id
-                    ).first()
-                    
-                    if prediction:
-                        match_dict['prediction_id'] = prediction.prediction_id
-                        match_dict['predicted_result'] = prediction.predicted_result
-                        match_dict['predicted_home_score'] = prediction.predicted_home_score
-                        match_dict['predicted_away_score'] = prediction.predicted_away_score
-                        match_dict['predicted_card_over_under'] = prediction.predicted_card_over_under
-                        match_dict['prediction_status'] = prediction.status
+                prediction = predictions.get(match['match_id'])
+                if prediction:
+                    match_dict['prediction_id'] = prediction.prediction_id
+                    match_dict['predicted_result'] = prediction.predicted_result
+                    match_dict['predicted_home_score'] = prediction.predicted_home_score
+                    match_dict['predicted_away_score'] = prediction.predicted_away_score
+                    match_dict['predicted_card_over_under'] = prediction.predicted_card_over_under
+                    match_dict['prediction_status'] = prediction.status
                 
                 matches_data.append(match_dict)
             
@@ -308,22 +767,48 @@ class PredictionService:
             traceback.print_exc()
             return None, str(e)
          
+    # Điểm thưởng khi chấm dự đoán
+    RESULT_POINTS = 3        # Đúng kết quả (thắng/thua/hòa)
+    EXACT_SCORE_POINTS = 5   # Đúng tỉ số chính xác
+    NEAR_SCORE_POINTS = 2    # Tỉ số gần đúng (lệch tối đa 1 bàn mỗi đội)
+    CARD_POINTS = 2          # Đúng tài/xỉu 3.5 thẻ
+    CARD_LINE = 3.5
+    
     @staticmethod
     def calculate_points_and_update(prediction):
         """
         Tính điểm và cập nhật dự đoán sau khi trận kết thúc
+        (chấm cả trận của dự đoán này bằng settle_match)
+        """
+        settled, error = PredictionService.settle_match(prediction.match_id)
+        if error:
+            return 0, error
+        
+        db.session.refresh(prediction)
+        return prediction.points_awarded or 0, None
+    
+    @staticmethod
+    def settle_match(match_id):
+        """
+        Chấm toàn bộ dự đoán của 1 trận đã 'Kết thúc' bằng vài câu UPDATE ... FROM
+        và cộng điểm cho Users trong 1 transaction.
+        Chạy lại nhiều lần vẫn đúng: Users chỉ nhận phần chênh lệch so với lần chấm trước
+        (dự đoán đã chấm không bị cộng lại), nên có thể gọi lại khi sửa tỉ số / thêm thẻ phạt.
+        Trả về (số dự đoán đã chấm, lỗi)
         """
         try:
-            match = prediction.match
+            match = db.session.execute(text('''
+                SELECT status, home_score, away_score, season_id, round_no
+                FROM Matches WHERE match_id = :match_id
+            '''), {'match_id': match_id}).fetchone()
             
+            if not match:
+                return 0, "Match not found"
             if match.status != 'Kết thúc':
                 return 0, "Match not finished yet"
+            if match.home_score is None or match.away_score is None:
+                return 0, "Match has no final score"
             
-            # Tính điểm
-            points = 0
-            
-            # Điểm cho dự đoán kết quả (thắng/thua/hòa)
-            actual_result = None
             if match.home_score > match.away_score:
                 actual_result = 'HOME_WIN'
             elif match.home_score < match.away_score:
@@ -331,34 +816,117 @@ class PredictionService:
             else:
                 actual_result = 'DRAW'
             
-            if prediction.predicted_result == actual_result:
-                points += 3  # Điểm cho dự đoán đúng kết quả
-            
-            # Điểm cho dự đoán tỉ số chính xác
-            if (prediction.predicted_home_score == match.home_score and 
-                prediction.predicted_away_score == match.away_score):
-                points += 5  # Bonus cho dự đoán đúng tỉ số
-            
-            # Điểm cho dự đoán gần đúng (sai lệch 1 bàn)
-            elif (abs(prediction.predicted_home_score - match.home_score) <= 1 and 
-                  abs(prediction.predicted_away_score - match.away_score) <= 1):
-                points += 2  # Bonus cho dự đoán gần đúng
-            
-            # Cập nhật điểm và trạng thái
-            prediction.points_awarded = points
-            prediction.status = 'CORRECT' if points > 0 else 'INCORRECT'
-            
-            # Cập nhật thống kê người dùng
-            user = User.query.get(prediction.user_id)
-            user.points += points
-            user.total_predictions += 1
-            if points > 0:
-                user.correct_predictions += 1
-            
-            db.session.commit()
+            cards = db.session.execute(text('''
+                SELECT COUNT(*) FROM MatchEvents
+                WHERE match_id = :match_id AND event_type IN ('yellow_card', 'red_card')
+            '''), {'match_id': match_id}).scalar()
+            card_line = PredictionService.CARD_LINE
+            actual_cards = f'OVER_{card_line}' if cards > card_line else f'UNDER_{card_line}'
+            
+            params = {
+                'match_id': match_id,
+                'actual_result': actual_result,
+                'home_score': match.home_score,
+                'away_score': match.away_score,
+                'actual_cards': actual_cards,
+                'result_points': PredictionService.RESULT_POINTS,
+                'exact_points': PredictionService.EXACT_SCORE_POINTS,
+                'near_points': PredictionService.NEAR_SCORE_POINTS,
+                'card_points': PredictionService.CARD_POINTS,
+            }
+            
+            # Điểm mới của từng dự đoán + điểm/trạng thái của lần chấm trước
+            scored = '''
+                SELECT 
+                    p.prediction_id,
+                    p.user_id,
+                    CASE WHEN p.status = 'PENDING' THEN 0 ELSE COALESCE(p.points_awarded, 0) END AS old_points,
+                    CASE WHEN p.status = 'PENDING' THEN 0 ELSE 1 END AS was_settled,
+                    CASE WHEN p.status = 'CORRECT' THEN 1 ELSE 0 END AS was_correct,
+                    (CASE WHEN p.predicted_result = :actual_result THEN :result_points ELSE 0 END)
+                    + (CASE
+                        WHEN p.predicted_home_score = :home_score
+                             AND p.predicted_away_score = :away_score THEN :exact_points
+                        WHEN abs(p.predicted_home_score - :home_score) <= 1
+                             AND abs(p.predicted_away_score - :away_score) <= 1 THEN :near_points
+                        ELSE 0
+                       END)
+                    + (CASE WHEN p.predicted_card_over_under = :actual_cards THEN :card_points ELSE 0 END)
+                    AS new_points
+                FROM Predictions p
+                WHERE p.match_id = :match_id
+            '''
+            
+            # Phần chênh lệch của từng user so với lần chấm trước
+            deltas = f'''
+                SELECT 
+                    user_id,
+                    SUM(new_points - old_points) AS points_delta,
+                    SUM(1 - was_settled) AS total_delta,
+                    SUM((CASE WHEN new_points > 0 THEN 1 ELSE 0 END) - was_correct) AS correct_delta
+                FROM ({scored})
+                GROUP BY user_id
+            '''
+            
+            # 1. Đọc chênh lệch để cập nhật bảng xếp hạng trong bộ nhớ sau khi commit
+            #    (user lần đầu được chấm vẫn vào bảng mùa/vòng dù được 0 điểm)
+            leaderboard_deltas = {
+                row.user_id: row.points_delta
+                for row in db.session.execute(text(f'''
+                    SELECT user_id, points_delta FROM ({deltas})
+                    WHERE points_delta != 0 OR total_delta != 0
+                '''), params)
+            }
+            
+            # 2. Cộng phần chênh lệch cho Users (đọc trạng thái cũ trước khi cập nhật Predictions)
+            db.session.execute(text(f'''
+                UPDATE Users SET
+                    points = COALESCE(points, 0) + d.points_delta,
+                    total_predictions = COALESCE(total_predictions, 0) + d.total_delta,
+                    correct_predictions = COALESCE(correct_predictions, 0) + d.correct_delta
+                FROM ({deltas}) AS d
+                WHERE Users.user_id = d.user_id
+                  AND (d.points_delta != 0 OR d.total_delta != 0 OR d.correct_delta != 0)
+            '''), params)
+            
+            # 3. Ghi điểm và trạng thái cho từng dự đoán
+            result = db.session.execute(text(f'''
+                UPDATE Predictions SET
+                    points_awarded = s.new_points,
+                    status = CASE WHEN s.new_points > 0 THEN 'CORRECT' ELSE 'INCORRECT' END
+                FROM ({scored}) AS s
+                WHERE Predictions.prediction_id = s.prediction_id
+            '''), params)
+            
+            with LeaderboardService.write_lock:
+                db.session.commit()
+                LeaderboardService.apply_points(leaderboard_deltas, match.season_id, match.round_no)
+            events.publish(events.PREDICTION_SETTLED, user_ids=list(leaderboard_deltas), match_id=match_id)
             
-            return points, None
+            settled = result.rowcount
+            if settled:
+                print(f"🏁 SYSTEM: Đã chấm {settled} dự đoán của trận {match_id}")
+            return settled, None
             
         except Exception as e:
             db.session.rollback()
-            return 0, str(e)
\ No newline at end of file
+            print(f"DEBUG: Error settling predictions for match {match_id}: {str(e)}")
+            return 0, str(e)
+    
+    @staticmethod
+    def settle_finished_matches():
+        """Chấm các trận đã kết thúc còn dự đoán PENDING (chạy bù, ví dụ sau khi import dữ liệu)"""
+        match_ids = [row.match_id for row in db.session.execute(text('''
+            SELECT DISTINCT p.match_id
+            FROM Predictions p
+            JOIN Matches m ON m.match_id = p.match_id
+            WHERE p.status = 'PENDING' AND m.status = 'Kết thúc'
+        '''))]
+        
+        settled = 0
+        for match_id in match_ids:
+            count, error = PredictionService.settle_match(match_id)
+            if error:
+                return settled, error
+            settled += count
+        return settled, None
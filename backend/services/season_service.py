@@ -1,6 +1,7 @@
 from extensions import db
 from sqlalchemy import text
 from datetime import datetime
+from utils.repository import Repository
 
 class SeasonService:
     @staticmethod
@@ -33,6 +34,22 @@ class SeasonService:
             print(f"ERROR in get_all_seasons: {str(e)}")
             return []
     
+    @staticmethod
+    def _format_season(season_dict):
+        # Xử lý date fields
+        for date_field in ['start_date', 'end_date']:
+            if season_dict.get(date_field):
+                if isinstance(season_dict[date_field], str):
+                    try:
+                        season_dict[date_field] = datetime.strptime(
+                            season_dict[date_field], '%Y-%m-%d'
+                        ).date().isoformat()
+                    except:
+                        season_dict[date_field] = None
+                elif hasattr(season_dict[date_field], 'isoformat'):
+                    season_dict[date_field] = season_dict[date_field].isoformat()
+        return season_dict
+    
     @staticmethod
     def get_season_by_id(season_id):
         try:
@@ -40,21 +57,7 @@ class SeasonService:
             result = db.session.execute(query, {'id': season_id}).fetchone()
             
             if result:
-                season_dict = dict(result._mapping)
-                # Xử lý date fields
-                for date_field in ['start_date', 'end_date']:
-                    if season_dict.get(date_field):
-                        if isinstance(season_dict[date_field], str):
-                            try:
-                                season_dict[date_field] = datetime.strptime(
-                                    season_dict[date_field], '%Y-%m-%d'
-                                ).date().isoformat()
-                            except:
-                                season_dict[date_field] = None
-                        elif hasattr(season_dict[date_field], 'isoformat'):
-                            season_dict[date_field] = season_dict[date_field].isoformat()
-                
-                return season_dict
+                return SeasonService._format_season(dict(result._mapping))
             return None
             
         except Exception as e:
@@ -105,24 +108,10 @@ class SeasonService:
                     except:
                         data[date_field] = None
             
-            columns = []
-            values = []
-            params = {}
-            
-            for key, value in data.items():
-                columns.append(key)
-                values.append(f":{key}")
-                params[key] = value
-            
-            query = text(f'''
-                INSERT INTO Seasons ({', '.join(columns)})
-                VALUES ({', '.join(values)})
-            ''')
-            
-            db.session.execute(query, params)
+            season = Repository.insert('Seasons', data)
             db.session.commit()
             
-            return SeasonService.get_season_by_id(data['season_id'])
+            return SeasonService._format_season(season)
             
         except Exception as e:
             print(f"ERROR in create_season: {str(e)}")
@@ -132,10 +121,6 @@ class SeasonService:
     @staticmethod
     def update_season(season_id, data):
         try:
-            existing = SeasonService.get_season_by_id(season_id)
-            if not existing:
-                return None
-            
             # Parse date fields
             for date_field in ['start_date', 'end_date']:
                 if date_field in data and isinstance(data[date_field], str):
@@ -144,20 +129,13 @@ class SeasonService:
                     except:
                         data[date_field] = None
             
-            set_clause = ', '.join([f"{key} = :{key}" for key in data.keys()])
-            query = text(f'''
-                UPDATE Seasons 
-                SET {set_clause}
-                WHERE season_id = :season_id
-            ''')
-            
-            params = data.copy()
-            params['season_id'] = season_id
-            
-            db.session.execute(query, params)
+            season = Repository.update('Seasons', 'season_id', season_id, data)
+            if not season:
+                db.session.rollback()
+                return None
             db.session.commit()
             
-            return SeasonService.get_season_by_id(season_id)
+            return SeasonService._format_season(season)
             
         except Exception as e:
             print(f"ERROR in update_season: {str(e)}")
@@ -1,5 +1,8 @@
+from collections import defaultdict
 from extensions import db
 from sqlalchemy import text
+from models.match import parse_standing_round
+from utils.repository import Repository
 
 class SeasonStandingService:
     @staticmethod
@@ -27,27 +30,10 @@ class SeasonStandingService:
     @staticmethod
     def create_standing(data):
         try:
-            columns = []
-            values = []
-            params = {}
-            
-            for key, value in data.items():
-                columns.append(key)
-                values.append(f":{key}")
-                params[key] = value
-            
-            query = text(f'''
-                INSERT INTO SeasonStandings ({', '.join(columns)})
-                VALUES ({', '.join(values)})
-            ''')
-            
-            db.session.execute(query, params)
+            standing = Repository.insert('SeasonStandings', data)
             db.session.commit()
             
-            # Lấy ID vừa tạo
-            last_id = db.session.execute(text('SELECT last_insert_rowid()')).fetchone()[0]
-            
-            return SeasonStandingService.get_standing_by_id(last_id)
+            return standing
         except Exception as e:
             print(f"ERROR in create_standing: {str(e)}")
             db.session.rollback()
@@ -56,24 +42,13 @@ class SeasonStandingService:
     @staticmethod
     def update_standing(standing_id, data):
         try:
-            existing = SeasonStandingService.get_standing_by_id(standing_id)
-            if not existing:
+            standing = Repository.update('SeasonStandings', 'standing_id', standing_id, data)
+            if not standing:
+                db.session.rollback()
                 return None
-            
-            set_clause = ', '.join([f"{key} = :{key}" for key in data.keys()])
-            query = text(f'''
-                UPDATE SeasonStandings 
-                SET {set_clause}
-                WHERE standing_id = :standing_id
-            ''')
-            
-            params = data.copy()
-            params['standing_id'] = standing_id
-            
-            db.session.execute(query, params)
             db.session.commit()
             
-            return SeasonStandingService.get_standing_by_id(standing_id)
+            return standing
         except Exception as e:
             print(f"ERROR in update_standing: {str(e)}")
             db.session.rollback()
@@ -192,4 +167,254 @@ class SeasonStandingService:
             return standings
         except Exception as e:
             print(f"ERROR in get_standings_with_details: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+    
+    # ===== Tính bảng xếp hạng từ kết quả trận đấu =====
+    
+    FINISHED_STATUS = 'Kết thúc'
+    
+    @staticmethod
+    def _season_results(season_id, from_round=1):
+        """
+        Các trận đã kết thúc của mùa có vòng xếp hạng >= from_round:
+        list (round, home_team_id, away_team_id, home_score, away_score)
+        """
+        query = text('''
+            SELECT round, round_no, home_team_id, away_team_id, home_score, away_score
+            FROM Matches
+            WHERE season_id = :season_id AND status = :status
+              AND (round_no >= :from_round OR round_no IS NULL)
+        ''')
+        rows = db.session.execute(query, {
+            'season_id': season_id,
+            'status': SeasonStandingService.FINISHED_STATUS,
+            'from_round': from_round
+        }).fetchall()
+        
+        results = []
+        for row in rows:
+            standing_round = parse_standing_round(row.round, row.round_no)
+            if standing_round is None or standing_round < from_round:
+                continue
+            results.append((
+                standing_round, row.home_team_id, row.away_team_id,
+                row.home_score or 0, row.away_score or 0
+            ))
+        return results
+    
+    @staticmethod
+    def _apply_result(table, home_id, away_id, home_score, away_score):
+        """Cộng kết quả 1 trận vào bảng tích lũy {team_id: {...}}"""
+        for team_id, scored, conceded in ((home_id, home_score, away_score),
+                                          (away_id, away_score, home_score)):
+            row = table[team_id]
+            row['played'] += 1
+            row['goals_for'] += scored
+            row['goals_against'] += conceded
+            if scored > conceded:
+                row['wins'] += 1
+            elif scored == conceded:
+                row['draws'] += 1
+            else:
+                row['losses'] += 1
+    
+    @staticmethod
+    def _rank(table, head_to_head):
+        """
+        Xếp hạng theo chỉ số phụ V.League: điểm -> hiệu số -> bàn thắng ->
+        đối đầu giữa các đội còn bằng nhau (điểm, hiệu số, bàn thắng) -> team_id.
+        Thứ tự này khớp với dữ liệu SeasonStandings đã nhập tay trước đây.
+        head_to_head(): list (home, away, home_score, away_score) đã đá tới vòng đang xét
+        """
+        def overall_key(team_id):
+            row = table[team_id]
+            return (-(row['wins'] * 3 + row['draws']),
+                    -(row['goals_for'] - row['goals_against']),
+                    -row['goals_for'])
+        
+        ordered = sorted(table, key=lambda team_id: (overall_key(team_id), team_id))
+        
+        ranked = []
+        i = 0
+        while i < len(ordered):
+            j = i + 1
+            while j < len(ordered) and overall_key(ordered[j]) == overall_key(ordered[i]):
+                j += 1
+            group = ordered[i:j]
+            
+            if len(group) > 1:
+                # Bảng phụ đối đầu giữa các đội trong nhóm
+                members = set(group)
+                mini = {team_id: [0, 0, 0] for team_id in group}
+                met = set()
+                for home_id, away_id, home_score, away_score in head_to_head():
+                    if home_id not in members or away_id not in members:
+                        continue
+                    met.add((home_id, away_id))
+                    for team_id, scored, conceded in ((home_id, home_score, away_score),
+                                                      (away_id, away_score, home_score)):
+                        mini[team_id][0] += 3 if scored > conceded else (1 if scored == conceded else 0)
+                        mini[team_id][1] += scored - conceded
+                        mini[team_id][2] += scored
+                # Chỉ xét đối đầu khi các đội trong nhóm đã gặp nhau đủ lượt đi và lượt về
+                if all((a, b) in met for a in group for b in group if a != b):
+                    group.sort(key=lambda team_id: (-mini[team_id][0], -mini[team_id][1],
+                                                    -mini[team_id][2], team_id))
+            
+            ranked.extend(group)
+            i = j
+        
+        return ranked
+    
+    @staticmethod
+    def recompute_from_round(season_id, from_round=1, commit=True):
+        """
+        Tính lại bảng xếp hạng của mùa từ vòng from_round tới vòng cuối đã có kết quả.
+        Lấy snapshot vòng from_round - 1 trong SeasonStandings rồi cộng dồn kết quả
+        từng vòng (không quét lại cả mùa), upsert tất cả các vòng trong 1 transaction.
+        Trả về (số dòng đã ghi, lỗi)
+        """
+        try:
+            from_round = max(int(from_round or 1), 1)
+            empty_row = lambda: {'played': 0, 'wins': 0, 'draws': 0, 'losses': 0,
+                                 'goals_for': 0, 'goals_against': 0}
+            
+            # Tất cả đội của mùa (kể cả đội chưa đá trận nào)
+            team_rows = db.session.execute(text('''
+                SELECT home_team_id AS team_id FROM Matches WHERE season_id = :season_id
+                UNION
+                SELECT away_team_id FROM Matches WHERE season_id = :season_id
+            '''), {'season_id': season_id}).fetchall()
+            table = {row.team_id: empty_row() for row in team_rows}
+            
+            # Snapshot vòng trước, thiếu thì tính lại từ vòng 1
+            if from_round > 1:
+                snapshot = db.session.execute(text('''
+                    SELECT team_id, played, wins, draws, losses, goals_for, goals_against
+                    FROM SeasonStandings
+                    WHERE season_id = :season_id AND round = :round
+                '''), {'season_id': season_id, 'round': from_round - 1}).fetchall()
+                
+                if snapshot:
+                    for row in snapshot:
+                        table[row.team_id] = {
+                            key: row._mapping[key] for key in empty_row()
+                        }
+                else:
+                    from_round = 1
+            
+            results = SeasonStandingService._season_results(season_id, from_round)
+            by_round = defaultdict(list)
+            for standing_round, *result in results:
+                by_round[standing_round].append(result)
+            last_round = max(by_round) if by_round else from_round - 1
+            
+            # Kết quả các vòng trước from_round chỉ cần khi có đội bằng chỉ số (đối đầu)
+            earlier_results = None
+            def load_earlier_results():
+                nonlocal earlier_results
+                if earlier_results is None:
+                    earlier_results = [
+                        result[1:] for result in SeasonStandingService._season_results(season_id)
+                        if result[0] < from_round
+                    ] if from_round > 1 else []
+                return earlier_results
+            
+            upsert_params = []
+            for standing_round in range(from_round, last_round + 1):
+                for result in by_round.get(standing_round, []):
+                    SeasonStandingService._apply_result(table, *result)
+                
+                def head_to_head(upto=standing_round):
+                    played = list(load_earlier_results())
+                    for rnd in range(from_round, upto + 1):
+                        played.extend(by_round.get(rnd, []))
+                    return played
+                
+                ranked = SeasonStandingService._rank(table, head_to_head)
+                for position, team_id in enumerate(ranked, start=1):
+                    row = table[team_id]
+                    upsert_params.append({
+                        'season_id': season_id,
+                        'team_id': team_id,
+                        'round': standing_round,
+                        'position': position,
+                        **row,
+                        'goal_difference': row['goals_for'] - row['goals_against'],
+                        'points': row['wins'] * 3 + row['draws']
+                    })
+            
+            if upsert_params:
+                db.session.execute(text('''
+                    INSERT INTO SeasonStandings (
+                        season_id, team_id, round, position, played, wins, draws, losses,
+                        goals_for, goals_against, goal_difference, points
+                    ) VALUES (
+                        :season_id, :team_id, :round, :position, :played, :wins, :draws, :losses,
+                        :goals_for, :goals_against, :goal_difference, :points
+                    )
+                    ON CONFLICT(season_id, team_id, round) DO UPDATE SET
+                        position = excluded.position,
+                        played = excluded.played,
+                        wins = excluded.wins,
+                        draws = excluded.draws,
+                        losses = excluded.losses,
+                        goals_for = excluded.goals_for,
+                        goals_against = excluded.goals_against,
+                        goal_difference = excluded.goal_difference,
+                        points = excluded.points
+                '''), upsert_params)
+            
+            # Vòng không còn kết quả nào (trận bị sửa/xóa) thì bỏ bảng xếp hạng cũ
+            db.session.execute(text('''
+                DELETE FROM SeasonStandings WHERE season_id = :season_id AND round > :last_round
+            '''), {'season_id': season_id, 'last_round': last_round})
+            
+            if commit:
+                db.session.commit()
+            return len(upsert_params), None
+        except Exception as e:
+            print(f"ERROR in recompute_from_round: {str(e)}")
+            db.session.rollback()
+            return 0, str(e)
+    
+    @staticmethod
+    def recompute_for_matches(changes):
+        """
+        Tính lại bảng xếp hạng sau khi kết quả trận thay đổi.
+        changes: list (season_id, round_text, round_no, status) trước/sau khi sửa trận;
+        mỗi mùa chỉ tính lại 1 lần từ vòng nhỏ nhất bị ảnh hưởng
+        """
+        rounds = {}
+        for season_id, round_text, round_no, status in changes:
+            if status != SeasonStandingService.FINISHED_STATUS or not season_id:
+                continue
+            standing_round = parse_standing_round(round_text, round_no)
+            if standing_round is None:
+                continue
+            rounds[season_id] = min(rounds.get(season_id, standing_round), standing_round)
+        
+        written = 0
+        for season_id, from_round in rounds.items():
+            count, error = SeasonStandingService.recompute_from_round(season_id, from_round)
+            if error:
+                return written, error
+            written += count
+        return written, None
+    
+    @staticmethod
+    def rebuild_all():
+        """Tính lại toàn bộ bảng xếp hạng của mọi mùa từ bảng Matches"""
+        season_ids = [row.season_id for row in db.session.execute(
+            text('SELECT DISTINCT season_id FROM Matches ORDER BY season_id')
+        )]
+        
+        written = 0
+        for season_id in season_ids:
+            count, error = SeasonStandingService.recompute_from_round(season_id, 1, commit=False)
+            if error:
+                return written, error
+            written += count
+        
+        db.session.commit()
+        return written, None
@@ -1,5 +1,6 @@
 from extensions import db
 from sqlalchemy import text
+from utils.repository import Repository
 
 class StadiumService:
     @staticmethod
@@ -24,6 +25,14 @@ class StadiumService:
             print(f"ERROR in get_all_stadiums: {str(e)}")
             return []
     
+    @staticmethod
+    def _format_stadium(stadium_dict):
+        # Chuyển đổi Decimal sang float
+        for coord in ['latitude', 'longitude']:
+            if stadium_dict.get(coord):
+                stadium_dict[coord] = float(stadium_dict[coord])
+        return stadium_dict
+    
     @staticmethod
     def get_stadium_by_id(stadium_id):
         try:
@@ -31,13 +40,7 @@ class StadiumService:
             result = db.session.execute(query, {'id': stadium_id}).fetchone()
             
             if result:
-                stadium_dict = dict(result._mapping)
-                # Chuyển đổi Decimal sang float
-                for coord in ['latitude', 'longitude']:
-                    if stadium_dict.get(coord):
-                        stadium_dict[coord] = float(stadium_dict[coord])
-                
-                return stadium_dict
+                return StadiumService._format_stadium(dict(result._mapping))
             return None
             
         except Exception as e:
@@ -47,27 +50,10 @@ class StadiumService:
     @staticmethod
     def create_stadium(data):
         try:
-            columns = []
-            values = []
-            params = {}
-            
-            for key, value in data.items():
-                columns.append(key)
-                values.append(f":{key}")
-                params[key] = value
-            
-            query = text(f'''
-                INSERT INTO Stadiums ({', '.join(columns)})
-                VALUES ({', '.join(values)})
-            ''')
-            
-            db.session.execute(query, params)
+            stadium = Repository.insert('Stadiums', data)
             db.session.commit()
             
-            # Lấy ID vừa tạo
-            last_id = db.session.execute(text('SELECT last_insert_rowid()')).fetchone()[0]
-            
-            return StadiumService.get_stadium_by_id(last_id)
+            return StadiumService._format_stadium(stadium)
             
         except Exception as e:
             print(f"ERROR in create_stadium: {str(e)}")
@@ -77,24 +63,13 @@ class StadiumService:
     @staticmethod
     def update_stadium(stadium_id, data):
         try:
-            existing = StadiumService.get_stadium_by_id(stadium_id)
-            if not existing:
+            stadium = Repository.update('Stadiums', 'stadium_id', stadium_id, data)
+            if not stadium:
+                db.session.rollback()
                 return None
-            
-            set_clause = ', '.join([f"{key} = :{key}" for key in data.keys()])
-            query = text(f'''
-                UPDATE Stadiums 
-                SET {set_clause}
-                WHERE stadium_id = :stadium_id
-            ''')
-            
-            params = data.copy()
-            params['stadium_id'] = stadium_id
-            
-            db.session.execute(query, params)
             db.session.commit()
             
-            return StadiumService.get_stadium_by_id(stadium_id)
+            return StadiumService._format_stadium(stadium)
             
         except Exception as e:
             print(f"ERROR in update_stadium: {str(e)}")
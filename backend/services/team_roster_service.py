@@ -1,5 +1,6 @@
 from extensions import db
 from sqlalchemy import text
+from utils.repository import Repository
 
 class TeamRosterService:
     @staticmethod
@@ -27,27 +28,10 @@ class TeamRosterService:
     @staticmethod
     def create_roster(data):
         try:
-            columns = []
-            values = []
-            params = {}
-            
-            for key, value in data.items():
-                columns.append(key)
-                values.append(f":{key}")
-                params[key] = value
-            
-            query = text(f'''
-                INSERT INTO TeamRosters ({', '.join(columns)})
-                VALUES ({', '.join(values)})
-            ''')
-            
-            db.session.execute(query, params)
+            roster = Repository.insert('TeamRosters', data)
             db.session.commit()
             
-            # Lấy ID vừa tạo
-            last_id = db.session.execute(text('SELECT last_insert_rowid()')).fetchone()[0]
-            
-            return TeamRosterService.get_roster_by_id(last_id)
+            return roster
         except Exception as e:
             print(f"ERROR in create_roster: {str(e)}")
             db.session.rollback()
@@ -56,24 +40,13 @@ class TeamRosterService:
     @staticmethod
     def update_roster(roster_id, data):
         try:
-            existing = TeamRosterService.get_roster_by_id(roster_id)
-            if not existing:
+            roster = Repository.update('TeamRosters', 'roster_id', roster_id, data)
+            if not roster:
+                db.session.rollback()
                 return None
-            
-            set_clause = ', '.join([f"{key} = :{key}" for key in data.keys()])
-            query = text(f'''
-                UPDATE TeamRosters 
-                SET {set_clause}
-                WHERE roster_id = :roster_id
-            ''')
-            
-            params = data.copy()
-            params['roster_id'] = roster_id
-            
-            db.session.execute(query, params)
             db.session.commit()
             
-            return TeamRosterService.get_roster_by_id(roster_id)
+            return roster
         except Exception as e:
             print(f"ERROR in update_roster: {str(e)}")
             db.session.rollback()
@@ -1,6 +1,7 @@
 from extensions import db
 from sqlalchemy import text
 from flask import request, current_app
+from utils.repository import Repository
 
 class TeamService:
     @staticmethod
@@ -130,27 +131,11 @@ class TeamService:
     @staticmethod
     def create_team(data):
         try:
-            columns = []
-            values = []
-            params = {}
-            
-            for key, value in data.items():
-                columns.append(key)
-                values.append(f":{key}")
-                params[key] = value
-            
-            query = text(f'''
-                INSERT INTO Teams ({', '.join(columns)})
-                VALUES ({', '.join(values)})
-            ''')
-            
-            db.session.execute(query, params)
+            team = Repository.insert('Teams', data)
             db.session.commit()
             
-            # Lấy ID vừa tạo
-            last_id = db.session.execute(text('SELECT last_insert_rowid()')).fetchone()[0]
-            
-            return TeamService.get_team_by_id(last_id)
+            team['logo_url'] = TeamService._process_logo_url(team.get('logo_url'))
+            return team
             
         except Exception as e:
             print(f"ERROR in create_team: {str(e)}")
@@ -160,24 +145,14 @@ class TeamService:
     @staticmethod
     def update_team(team_id, data):
         try:
-            existing = TeamService.get_team_by_id(team_id)
-            if not existing:
+            team = Repository.update('Teams', 'team_id', team_id, data)
+            if not team:
+                db.session.rollback()
                 return None
-            
-            set_clause = ', '.join([f"{key} = :{key}" for key in data.keys()])
-            query = text(f'''
-                UPDATE Teams 
-                SET {set_clause}
-                WHERE team_id = :team_id
-            ''')
-            
-            params = data.copy()
-            params['team_id'] = team_id
-            
-            db.session.execute(query, params)
             db.session.commit()
             
-            return TeamService.get_team_by_id(team_id)
+            team['logo_url'] = TeamService._process_logo_url(team.get('logo_url'))
+            return team
             
         except Exception as e:
             print(f"ERROR in update_team: {str(e)}")
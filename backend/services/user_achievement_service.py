@@ -1,6 +1,8 @@
 from extensions import db
 from sqlalchemy import text
 from datetime import datetime
+from services.leaderboard_service import LeaderboardService
+from utils import events
 
 class UserAchievementService:
     @staticmethod
@@ -118,7 +120,12 @@ class UserAchievementService:
                     'user_id': data['user_id'],
                     'points': achievement_result.points_reward
                 })
-                db.session.commit()
+                with LeaderboardService.write_lock:
+                    db.session.commit()
+                    LeaderboardService.apply_points({
+                        int(data['user_id']): achievement_result.points_reward
+                    })
+                events.publish(events.POINTS_AWARDED, user_ids=[data['user_id']])
             
             return UserAchievementService.get_user_achievement_by_id(last_id), None
         except Exception as e:
@@ -1,8 +1,8 @@
 from models.user import User
+from utils.password_hasher import PasswordHasherBusy
 from extensions import db
 from flask_jwt_extended import create_access_token
-from google.oauth2 import id_token
-from google.auth.transport import requests
+from utils.google_certs import GoogleCertStore
 import os
 
 class UserService:
@@ -27,7 +27,10 @@ class UserService:
             email=email,
             full_name=full_name
         )
-        new_user.set_password(password) # Hàm này đã có trong user.py
+        try:
+            new_user.set_password(password) # Hash trên process pool (utils/password_hasher.py)
+        except PasswordHasherBusy as e:
+            return None, str(e)
         
         try:
             db.session.add(new_user)
@@ -57,7 +60,21 @@ class UserService:
         if not user:
             user = User.query.filter_by(email=username).first()
 
-        if user and user.check_password(password):
+        try:
+            valid = bool(user) and user.check_password(password)
+        except PasswordHasherBusy as e:
+            return None, str(e)
+
+        if valid:
+            # Đổi BCRYPT_LOG_ROUNDS -> hash lại bằng cost mới ngay khi user đăng nhập đúng
+            if user.password_needs_rehash():
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"⚠️ Không rehash được mật khẩu user {user.user_id}: {str(e)}")
+
             access_token = create_access_token(identity=str(user.user_id))
             return {
                 "message": "Đăng nhập thành công",
@@ -71,9 +88,9 @@ class UserService:
     @staticmethod
     def google_login(google_token):
         try:
-            # 1. Xác thực token gửi lên từ Frontend với Google
+            # 1. Xác thực token gửi lên từ Frontend (chữ ký kiểm tra bằng chứng chỉ Google đã cache)
             client_id = os.environ.get('GOOGLE_CLIENT_ID')
-            id_info = id_token.verify_oauth2_token(google_token, requests.Request(), client_id)
+            id_info = GoogleCertStore.verify(google_token, client_id)
 
             # 2. Lấy thông tin từ Google
             email = id_info.get('email')
@@ -0,0 +1,95 @@
+# tests/conftest.py
+# App test dùng DB SQLite tạm (không đụng vleague.db), hàng đợi ghi bật như chạy thật
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault('MATCH_SCHEDULER_ENABLED', '0')
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    from config import current_config
+    from app import create_app
+
+    db_path = tmp_path_factory.mktemp('db') / 'test.db'
+    uri = f'sqlite:///{db_path.as_posix()}'
+    current_config.SQLALCHEMY_DATABASE_URI = uri
+    current_config.SQLALCHEMY_BINDS = {'read': dict(current_config.SQLALCHEMY_BINDS['read'], url=uri)}
+
+    app, _ = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture(scope='session')
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def seed(app):
+    """1 user, 1 sân, 2 đội, 1 mùa và 3 trận chưa đá"""
+    from extensions import db
+    from models import User, Team, Season, Match, Stadium
+
+    with app.app_context():
+        user = User(username='tester', email='tester@example.com', password_hash='x')
+        stadium = Stadium(stadium_id=1, name='Test stadium', city='Hà Nội')
+        home = Team(team_id=1, name='Home FC')
+        away = Team(team_id=2, name='Away FC')
+        season = Season(season_id=1, name='Test season', vpf_sid=1)
+        db.session.add_all([user, stadium, home, away, season])
+        db.session.flush()
+
+        kickoff = datetime.utcnow() + timedelta(days=7)
+        matches = [
+            Match(
+                season_id=1, round=f'Vòng {i}', match_datetime=kickoff,
+                home_team_id=1, away_team_id=2, stadium_id=1, status='Chưa đá'
+            )
+            for i in range(1, 4)
+        ]
+        db.session.add_all(matches)
+        db.session.commit()
+        return {'user_id': user.user_id, 'match_ids': [m.match_id for m in matches]}
+
+
+@pytest.fixture(scope='session')
+def auth_headers(app, seed):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity=str(seed['user_id']))
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def count_statements(app):
+    """count_statements(fn) -> (kết quả, số câu SQL fn đã chạy trên mọi engine)"""
+    from sqlalchemy import event
+    from extensions import db
+
+    def run(fn):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', record)
+        try:
+            result = fn()
+        finally:
+            for engine in engines:
+                event.remove(engine, 'before_cursor_execute', record)
+        return result, len(statements)
+
+    return run
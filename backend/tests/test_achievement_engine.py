@@ -0,0 +1,20 @@
+# tests/test_achievement_engine.py
+# AchievementEngine.register(): gọi nhiều lần (mỗi create_app) không nhân đôi handler
+from services.achievement_engine import AchievementEngine
+from utils import events
+
+
+def test_register_twice_keeps_one_handler_per_event(app, monkeypatch):
+    calls = []
+    monkeypatch.setattr(AchievementEngine, 'evaluate',
+                        staticmethod(lambda user_ids, condition_types=None: calls.append(condition_types)))
+
+    AchievementEngine.register()
+    AchievementEngine.register()
+
+    for event in AchievementEngine.EVENT_CONDITIONS:
+        engine_handlers = [h for h in events._handlers[event] if getattr(h, 'func', None) is AchievementEngine._on_event]
+        assert len(engine_handlers) == 1
+
+    events.publish(events.POST_CREATED, user_ids=[1])
+    assert calls == [AchievementEngine.EVENT_CONDITIONS[events.POST_CREATED]]
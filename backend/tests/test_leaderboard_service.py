@@ -0,0 +1,54 @@
+# tests/test_leaderboard_service.py
+# Bảng hết hạn: vẫn trả bảng cũ ngay, làm mới 1 lần ở luồng nền
+import threading
+import time
+
+from services.leaderboard_service import LeaderboardService
+from utils.rank_index import RankIndex
+
+
+def test_stale_board_served_while_refreshing(app, monkeypatch):
+    key = ('round', 999, 1)
+    old = RankIndex({1: 5})
+    LeaderboardService._boards[key] = (old, float('-inf'))
+
+    release = threading.Event()
+    loads = []
+
+    def slow_load(k):
+        loads.append(k)
+        release.wait(5)
+        return RankIndex({1: 7})
+
+    monkeypatch.setattr(LeaderboardService, '_load_board', staticmethod(slow_load))
+    try:
+        with app.app_context():
+            started = time.monotonic()
+            boards = [LeaderboardService._get_board(key) for _ in range(5)]
+            assert time.monotonic() - started < 0.5
+            assert all(board is old for board in boards)
+
+        release.set()
+        deadline = time.monotonic() + 5
+        while key in LeaderboardService._refreshing and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert loads == [key]
+        board, built_at = LeaderboardService._boards[key]
+        assert board.score(1) == 7
+        assert LeaderboardService._is_fresh((board, built_at))
+    finally:
+        release.set()
+        LeaderboardService._boards.pop(key, None)
+
+
+def test_missing_board_built_on_request(app, monkeypatch):
+    key = ('round', 999, 2)
+    monkeypatch.setattr(LeaderboardService, '_load_board', staticmethod(lambda k: RankIndex({3: 1})))
+    try:
+        with app.app_context():
+            board = LeaderboardService._get_board(key)
+        assert board.score(3) == 1
+        assert LeaderboardService._boards[key][0] is board
+    finally:
+        LeaderboardService._boards.pop(key, None)
@@ -0,0 +1,60 @@
+# tests/test_match_details.py
+# Cache chi tiết trận: khóa int thống nhất, chỉ cache trận đã kết thúc, có TTL
+import pytest
+from sqlalchemy import text
+
+from extensions import db
+from services.match_service import MatchService
+
+
+def _set_match(match_id, **values):
+    assignments = ', '.join(f'{column} = :{column}' for column in values)
+    db.session.execute(text(f'UPDATE Matches SET {assignments} WHERE match_id = :match_id'),
+                       dict(values, match_id=match_id))
+    db.session.commit()
+
+
+@pytest.fixture
+def finished_match(app, seed):
+    match_id = seed['match_ids'][0]
+    with app.app_context():
+        _set_match(match_id, status='Kết thúc', home_score=2, away_score=1)
+        MatchService.invalidate_match_details()
+        yield match_id
+        _set_match(match_id, status='Chưa đá', home_score=None, away_score=None)
+        MatchService.invalidate_match_details()
+
+
+def test_unfinished_match_is_not_cached(app, seed):
+    match_id = seed['match_ids'][1]
+    with app.app_context():
+        MatchService.invalidate_match_details()
+        assert MatchService.get_match_with_details(match_id)['status'] == 'Chưa đá'
+        assert MatchService._detail_cache == {}
+
+
+def test_string_and_int_ids_share_one_entry(app, finished_match, count_statements):
+    with app.app_context():
+        details = MatchService.get_match_with_details(str(finished_match))
+        assert details['home_score'] == 2
+        assert list(MatchService._detail_cache) == [finished_match]
+
+        cached, statements = count_statements(lambda: MatchService.get_match_with_details(finished_match))
+        assert cached == details and statements == 0
+
+        # Ghi thẳng DB rồi xóa cache bằng khóa kiểu khác -> lần đọc sau thấy dữ liệu mới
+        _set_match(finished_match, home_score=3)
+        MatchService.invalidate_match_details(str(finished_match))
+        assert MatchService.get_match_with_details(finished_match)['home_score'] == 3
+
+
+def test_cached_details_expire_after_ttl(app, finished_match, monkeypatch):
+    with app.app_context():
+        assert MatchService.get_match_with_details(finished_match)['home_score'] == 2
+
+        # Sửa từ process khác: không ai gọi invalidate, chỉ TTL làm mới
+        _set_match(finished_match, home_score=4)
+        assert MatchService.get_match_with_details(finished_match)['home_score'] == 2
+
+        monkeypatch.setattr(MatchService, 'DETAIL_CACHE_TTL_SECONDS', -1)
+        assert MatchService.get_match_with_details(finished_match)['home_score'] == 4
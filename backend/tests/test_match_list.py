@@ -0,0 +1,46 @@
+# tests/test_match_list.py
+# GET /api/matches: 1 câu JOIN cho trang + 1 câu COUNT, không phụ thuộc per_page
+from datetime import datetime, timedelta
+
+import pytest
+
+from extensions import db
+from models import Match, Team
+
+
+@pytest.fixture(scope='module')
+def many_matches(app, seed):
+    """40 trận giữa 4 đội của mùa 1"""
+    with app.app_context():
+        db.session.add_all([Team(team_id=team_id, name=f'Team {team_id}') for team_id in (11, 12)])
+        kickoff = datetime(2024, 1, 1, 18, 0)
+        db.session.add_all([
+            Match(
+                season_id=1, round=f'Vòng {i // 4 + 1}', match_datetime=kickoff + timedelta(days=i),
+                home_team_id=(1, 11)[i % 2], away_team_id=(2, 12)[i % 2], stadium_id=1,
+                home_score=i % 3, away_score=1, status='Kết thúc'
+            )
+            for i in range(40)
+        ])
+        db.session.commit()
+
+
+@pytest.mark.usefixtures('many_matches')
+@pytest.mark.parametrize('filters', [{}, {'season_id': 1}, {'season_id': 1, 'status': 'Kết thúc'}])
+def test_query_count_independent_of_page_size(app, count_statements, filters):
+    from services.match_service import MatchService
+
+    with app.test_request_context():
+        (small, error), small_count = count_statements(
+            lambda: MatchService.get_matches_list(page=1, per_page=5, **filters)
+        )
+        assert error is None
+        (large, error), large_count = count_statements(
+            lambda: MatchService.get_matches_list(page=1, per_page=40, **filters)
+        )
+        assert error is None
+
+    assert len(small['matches']) == 5 and len(large['matches']) == 40
+    assert large['matches'][0]['home_team']['name'] and large['matches'][0]['season_name']
+    # Trang + COUNT của paginate
+    assert small_count == large_count == 2
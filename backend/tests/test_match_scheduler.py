@@ -0,0 +1,63 @@
+# tests/test_match_scheduler.py
+# Khoảng ngủ của luồng chuyển trạng thái trận
+from datetime import datetime, timedelta
+
+from services.match_scheduler import MatchStatusScheduler as Scheduler
+
+
+def test_sleeps_until_kickoff():
+    delay = Scheduler._next_delay(datetime.now() + timedelta(seconds=120))
+    assert 100 < delay <= 120
+    assert Scheduler._next_delay(datetime.now() + timedelta(days=1)) == Scheduler.MAX_SLEEP_SECONDS
+    assert Scheduler._next_delay(None) == Scheduler.MAX_SLEEP_SECONDS
+
+
+def test_past_kickoff_does_not_spin():
+    # Trận quá giờ mà chưa được chuyển trạng thái: vẫn ngủ tối thiểu
+    assert Scheduler._next_delay(datetime.now() - timedelta(hours=1)) == Scheduler.MIN_SLEEP_SECONDS
+
+
+def test_backoff_after_errors():
+    delays = [Scheduler._next_delay(None, failures) for failures in range(1, 10)]
+    assert delays[:3] == [5, 10, 20]
+    assert delays == sorted(delays)
+    assert delays[-1] == Scheduler.MAX_SLEEP_SECONDS
+
+
+class _StopLoop(Exception):
+    pass
+
+
+class _RecordingEvent:
+    """Thay Event của scheduler: ghi lại thời gian ngủ, dừng vòng lặp sau `limit` lần"""
+
+    def __init__(self, limit):
+        self.delays = []
+        self.limit = limit
+
+    def clear(self):
+        pass
+
+    def wait(self, delay):
+        self.delays.append(delay)
+        if len(self.delays) >= self.limit:
+            raise _StopLoop()
+
+
+def test_run_backs_off_when_status_update_fails(app, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+    from extensions import db
+
+    def failing_commit():
+        raise OperationalError('UPDATE Matches', {}, Exception('database is locked'))
+
+    wakeup = _RecordingEvent(limit=4)
+    monkeypatch.setattr(Scheduler, '_wakeup', wakeup)
+    monkeypatch.setattr(db.session, 'commit', failing_commit)
+
+    try:
+        Scheduler._run(app)
+    except _StopLoop:
+        pass
+
+    assert wakeup.delays == [5, 10, 20, 40]
@@ -0,0 +1,105 @@
+# tests/test_password_hasher.py
+# PasswordHasher: hash / kiểm tra, báo bận khi hết chỗ, giữ chỗ tới khi việc thật sự xong, rehash khi đăng nhập
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    """Pool 1 luồng thay cho process pool (không cần spawn), tối đa 1 việc, cost thấp cho nhanh"""
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(PasswordHasher, 'rounds', 4)
+    monkeypatch.setattr(PasswordHasher, 'workers', 1)
+    monkeypatch.setattr(PasswordHasher, 'max_pending', 1)
+    monkeypatch.setattr(PasswordHasher, 'timeout', 0.05)
+    monkeypatch.setattr(PasswordHasher, '_slots', threading.BoundedSemaphore(1))
+    monkeypatch.setattr(PasswordHasher, '_pool', pool)
+    yield PasswordHasher
+    pool.shutdown(wait=True)
+
+
+def test_hash_and_check(hasher):
+    password_hash = hasher.hash('mật khẩu')
+
+    assert password_hash.startswith('$2b$04$')
+    assert hasher.check(password_hash, 'mật khẩu')
+    assert not hasher.check(password_hash, 'sai')
+    assert not hasher.check(None, 'mật khẩu')
+
+
+def test_needs_rehash_follows_configured_rounds(hasher):
+    password_hash = hasher.hash('secret')
+
+    assert not hasher.needs_rehash(password_hash)
+    hasher.rounds = 5
+    assert hasher.needs_rehash(password_hash)
+    assert not hasher.needs_rehash('not-a-bcrypt-hash')
+
+
+def test_busy_when_no_slot_left(hasher):
+    assert hasher._slots.acquire(blocking=False)
+    try:
+        with pytest.raises(PasswordHasherBusy, match=hasher.BUSY_MESSAGE):
+            hasher.hash('secret')
+    finally:
+        hasher._slots.release()
+
+
+def test_timed_out_job_keeps_its_slot_until_it_finishes(hasher):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_job():
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    # Việc đang chạy quá timeout: người gọi nhận BUSY, cancel() không dừng được việc đó
+    with pytest.raises(PasswordHasherBusy):
+        hasher._run(slow_job)
+    assert started.is_set()
+
+    # Chỗ vẫn bị giữ trong lúc việc cũ còn chạy
+    assert not hasher._slots.acquire(blocking=False)
+
+    # Việc cũ xong -> done-callback trả chỗ
+    release.set()
+    hasher._pool.submit(lambda: None).result(timeout=5)
+    assert hasher._slots.acquire(blocking=False)
+    hasher._slots.release()
+    assert hasher._run(lambda: 'next') == 'next'
+
+
+def test_login_rehashes_password_with_new_cost(app, client, monkeypatch):
+    from extensions import db
+    from models import User
+
+    monkeypatch.setattr(PasswordHasher, 'rounds', 4)
+    with app.app_context():
+        user = User(username='rehash', email='rehash@example.com')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.user_id
+
+    monkeypatch.setattr(PasswordHasher, 'rounds', 5)
+    response = client.post('/api/auth/login', json={'username': 'rehash', 'password': 'secret'})
+    assert response.status_code == 200
+
+    with app.app_context():
+        password_hash = db.session.get(User, user_id).password_hash
+    assert password_hash.startswith('$2b$05$')
+    assert PasswordHasher.check(password_hash, 'secret')
+
+
+def test_login_returns_503_when_hasher_busy(client, seed, monkeypatch):
+    def busy(*args):
+        raise PasswordHasherBusy(PasswordHasher.BUSY_MESSAGE)
+
+    monkeypatch.setattr(PasswordHasher, '_run', busy)
+    response = client.post('/api/auth/login', json={'username': 'tester', 'password': 'secret'})
+    assert response.status_code == 503
+    assert response.get_json()['message'] == PasswordHasher.BUSY_MESSAGE
@@ -0,0 +1,98 @@
+# tests/test_post_feed.py
+# Newsfeed: số câu SQL mỗi trang không tăng theo số bài trong trang
+import pytest
+
+from extensions import db
+from models import Post, Comment, Like, User
+
+
+@pytest.fixture(scope='module')
+def feed(app, seed):
+    """60 bài của 3 user, mỗi bài có bình luận và like, một số bài gắn thẻ đội"""
+    with app.app_context():
+        authors = [User(username=f'author{i}', email=f'author{i}@example.com', password_hash='x') for i in range(3)]
+        db.session.add_all(authors)
+        db.session.flush()
+
+        for i in range(60):
+            author = authors[i % 3]
+            post = Post(
+                user_id=author.user_id, title=f'Bài {i}', content=f'Nội dung {i}',
+                team_id=1 if i % 2 else None, like_count=1, comment_count=2
+            )
+            db.session.add(post)
+            db.session.flush()
+            db.session.add_all([
+                Comment(user_id=authors[(i + 1) % 3].user_id, post_id=post.post_id, content='Hay'),
+                Comment(user_id=seed['user_id'], post_id=post.post_id, content='Đồng ý'),
+                Like(user_id=seed['user_id'], post_id=post.post_id),
+            ])
+        db.session.commit()
+
+
+@pytest.mark.usefixtures('feed')
+def test_page_query_count_independent_of_page_size(app, seed, count_statements):
+    from services.post_service import PostService
+
+    with app.test_request_context():
+        (small, error), small_count = count_statements(
+            lambda: PostService.get_all_posts(page=1, per_page=5, current_user_id=seed['user_id'])
+        )
+        assert error is None
+        (large, error), large_count = count_statements(
+            lambda: PostService.get_all_posts(page=1, per_page=50, current_user_id=seed['user_id'])
+        )
+        assert error is None
+
+    assert len(small['posts']) == 5 and len(large['posts']) == 50
+    assert all(post['is_liked'] for post in large['posts'])
+    assert small_count == large_count
+
+
+
+@pytest.mark.usefixtures('feed')
+def test_cursor_query_count_independent_of_limit(app, seed, count_statements):
+    from services.post_service import PostService
+
+    with app.test_request_context():
+        (small, error), small_count = count_statements(
+            lambda: PostService.get_posts_by_cursor(limit=5, current_user_id=seed['user_id'])
+        )
+        assert error is None
+        (large, error), large_count = count_statements(
+            lambda: PostService.get_posts_by_cursor(limit=50, current_user_id=seed['user_id'])
+        )
+        assert error is None
+
+    assert len(small['posts']) == 5 and len(large['posts']) == 50
+    assert small_count == large_count
+
+
+@pytest.mark.usefixtures('feed')
+def test_cursor_pages_walk_the_feed_without_gaps(client):
+    seen = []
+    cursor = ''
+    while True:
+        response = client.get('/api/posts', query_string={'cursor': cursor, 'limit': 7})
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        seen.extend(post['post_id'] for post in data['posts'])
+        if not data['has_more']:
+            break
+        cursor = data['next_cursor']
+
+    assert len(seen) == len(set(seen)) >= 60
+    assert seen == sorted(seen, reverse=True)
+
+
+@pytest.mark.parametrize('limit', [0, -1])
+def test_cursor_rejects_non_positive_limit(client, limit):
+    response = client.get('/api/posts', query_string={'cursor': '', 'limit': limit})
+    assert response.status_code == 400
+    assert 'limit' in response.get_json()['message']
+
+
+def test_cursor_rejects_invalid_token(client):
+    response = client.get('/api/posts', query_string={'cursor': 'not-a-cursor', 'limit': 5})
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Cursor không hợp lệ'
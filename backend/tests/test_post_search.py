@@ -0,0 +1,82 @@
+# tests/test_post_search.py
+# Index FTS5 PostsSearch: xóa / sửa bài dùng đúng author đã index, kể cả khi Users đã đổi
+import pytest
+from sqlalchemy import text
+
+from extensions import db
+from models import Post, User
+from utils import migrations
+
+
+def _matches(query):
+    return {row[0] for row in db.session.execute(
+        text('SELECT rowid FROM PostsSearch WHERE PostsSearch MATCH :match'), {'match': query}
+    )}
+
+
+@pytest.fixture
+def author_post(app):
+    with app.app_context():
+        user = User(username='zorro', email='zorro@example.com', full_name='Đặng Văn Zorro', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        post = Post(user_id=user.user_id, title='Tin chuyển nhượng', content='Hậu vệ mới')
+        db.session.add(post)
+        db.session.commit()
+        user_id, post_id = user.user_id, post.post_id
+        yield user_id, post_id
+        db.session.rollback()
+        db.session.execute(text('DELETE FROM Posts WHERE post_id = :id'), {'id': post_id})
+        db.session.execute(text('DELETE FROM Users WHERE user_id = :id'), {'id': user_id})
+        db.session.commit()
+
+
+def test_author_is_indexed_folded(app, author_post):
+    _, post_id = author_post
+    with app.app_context():
+        assert post_id in _matches('author: "Dang" "zorro"')
+
+
+def test_deleting_post_after_its_author_leaves_no_stale_tokens(app, author_post):
+    user_id, post_id = author_post
+    with app.app_context():
+        db.session.execute(text('DELETE FROM Users WHERE user_id = :id'), {'id': user_id})
+        db.session.execute(text('DELETE FROM Posts WHERE post_id = :id'), {'id': post_id})
+        db.session.commit()
+
+        assert _matches('zorro') == set()
+        assert post_id not in _matches('"chuyen" "nhuong"')
+
+
+def test_renaming_author_reindexes_their_posts(app, author_post):
+    user_id, post_id = author_post
+    with app.app_context():
+        db.session.get(User, user_id).full_name = 'Nguyễn Bernardo'
+        db.session.commit()
+
+        assert _matches('Bernardo') == {post_id}
+        assert _matches('Dang') & {post_id} == set()
+
+        # Đổi tên rồi sửa bài: lệnh 'delete' dùng author mới đã index
+        db.session.get(Post, post_id).title = 'Tin khác'
+        db.session.commit()
+        assert _matches('Bernardo') == {post_id}
+        assert post_id not in _matches('"chuyen"')
+
+
+def test_rebuild_search_index_matches_triggers(app, author_post):
+    from services.post_service import PostService
+
+    _, post_id = author_post
+    with app.app_context():
+        indexed, error = PostService.rebuild_search_index()
+        assert error is None
+        assert indexed == db.session.execute(text('SELECT COUNT(*) FROM Posts')).scalar()
+        assert _matches('zorro') == {post_id}
+
+
+def test_posts_search_migration_fails_without_fts5(app, monkeypatch):
+    monkeypatch.setattr(migrations, '_fts5_available', lambda: False)
+    with app.app_context():
+        with pytest.raises(RuntimeError, match='FTS5'):
+            migrations._m003_posts_search()
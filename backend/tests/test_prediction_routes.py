@@ -0,0 +1,150 @@
+# tests/test_prediction_routes.py
+# Tạo / lưu hàng loạt / xóa dự đoán qua API (ghi đi qua WriteQueue)
+import pytest
+
+from extensions import db
+from models import Prediction
+from utils.write_queue import WriteQueue
+
+
+def test_write_queue_running(app):
+    assert WriteQueue._thread is not None and WriteQueue._thread.is_alive()
+
+
+def test_create_prediction(app, client, seed, auth_headers):
+    match_id = seed['match_ids'][0]
+    response = client.post('/api/predictions', headers=auth_headers, json={
+        'match_id': match_id, 'predicted_result': 'HOME_WIN'
+    })
+
+    assert response.status_code == 201, response.get_json()
+    data = response.get_json()['data']
+    assert data['match_id'] == match_id
+    assert data['predicted_result'] == 'HOME_WIN'
+
+    # Tạo lần 2 cho cùng trận -> lỗi, không tạo thêm dòng
+    response = client.post('/api/predictions', headers=auth_headers, json={
+        'match_id': match_id, 'predicted_result': 'DRAW'
+    })
+    assert response.status_code == 400
+    with app.app_context():
+        assert Prediction.query.filter_by(match_id=match_id).count() == 1
+
+
+def test_save_predictions_batch(app, client, seed, auth_headers):
+    first, second, third = seed['match_ids']
+    response = client.post('/api/predictions/batch', headers=auth_headers, json={'predictions': [
+        {'match_id': first, 'predicted_result': 'AWAY_WIN'},
+        {'match_id': second, 'predicted_home_score': 2, 'predicted_away_score': 1},
+        {'match_id': third},
+        {'match_id': 999999, 'predicted_result': 'DRAW'},
+    ]})
+
+    assert response.status_code == 200, response.get_json()
+    results = response.get_json()['data']
+    assert [r['status'] for r in results] == ['updated', 'created', 'error', 'error']
+    assert results[0]['data']['predicted_result'] == 'AWAY_WIN'
+    assert results[1]['data']['predicted_home_score'] == 2
+
+    with app.app_context():
+        assert Prediction.query.filter_by(user_id=seed['user_id']).count() == 2
+
+
+def test_save_predictions_batch_limit(client, auth_headers):
+    from services.prediction_service import PredictionService
+
+    items = [{'match_id': i, 'predicted_result': 'DRAW'} for i in range(PredictionService.MAX_BATCH_SIZE + 1)]
+    response = client.post('/api/predictions/batch', headers=auth_headers, json={'predictions': items})
+
+    assert response.status_code == 400
+    assert 'Too many predictions' in response.get_json()['message']
+
+
+def test_delete_prediction(app, client, seed, auth_headers):
+    match_id = seed['match_ids'][1]
+    with app.app_context():
+        prediction_id = Prediction.query.filter_by(
+            user_id=seed['user_id'], match_id=match_id
+        ).one().prediction_id
+
+    response = client.delete(f'/api/predictions/{prediction_id}', headers=auth_headers)
+    assert response.status_code == 200, response.get_json()
+
+    with app.app_context():
+        assert db.session.get(Prediction, prediction_id) is None
+
+    response = client.delete(f'/api/predictions/{prediction_id}', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_concurrent_batches_do_not_race(app, client, seed, auth_headers):
+    """Nhiều batch cùng lúc cho cùng trận: ghi tuần tự qua WriteQueue, không lỗi UNIQUE"""
+    import threading
+    from models import Match
+    from datetime import datetime, timedelta
+
+    with app.app_context():
+        match = Match(
+            season_id=1, round='Vòng 9', match_datetime=datetime.utcnow() + timedelta(days=7),
+            home_team_id=1, away_team_id=2, stadium_id=1, status='Chưa đá'
+        )
+        db.session.add(match)
+        db.session.commit()
+        match_id = match.match_id
+
+    responses = []
+
+    def post_batch(result):
+        with app.test_client() as c:
+            responses.append(c.post('/api/predictions/batch', headers=auth_headers, json={
+                'predictions': [{'match_id': match_id, 'predicted_result': result}]
+            }))
+
+    threads = [
+        threading.Thread(target=post_batch, args=(result,))
+        for result in ('HOME_WIN', 'DRAW', 'AWAY_WIN') * 3
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [r.status_code for r in responses] == [200] * len(threads)
+    statuses = sorted(r.get_json()['data'][0]['status'] for r in responses)
+    assert statuses == ['created'] + ['updated'] * (len(threads) - 1)
+    with app.app_context():
+        assert Prediction.query.filter_by(match_id=match_id).count() == 1
+
+
+def test_batch_accepts_string_match_id(client, seed, auth_headers):
+    first = seed['match_ids'][0]
+    response = client.post('/api/predictions/batch', headers=auth_headers, json={'predictions': [
+        {'match_id': str(first), 'predicted_result': 'DRAW'},
+        {'match_id': 'abc', 'predicted_result': 'DRAW'},
+        {'predicted_result': 'DRAW'},
+    ]})
+
+    assert response.status_code == 200, response.get_json()
+    results = response.get_json()['data']
+    assert results[0]['status'] == 'updated'
+    assert results[0]['data']['predicted_result'] == 'DRAW'
+    assert [r['message'] for r in results[1:]] == ['Invalid match_id', 'Missing match_id']
+
+
+@pytest.mark.parametrize('fields, message', [
+    ({'predicted_result': 'WIN'}, 'Invalid predicted_result'),
+    ({'predicted_home_score': -1, 'predicted_away_score': 0}, 'Invalid predicted_home_score'),
+    ({'predicted_home_score': 1, 'predicted_away_score': '2'}, 'Invalid predicted_away_score'),
+    ({'predicted_home_score': True, 'predicted_away_score': 0}, 'Invalid predicted_home_score'),
+    ({'predicted_card_over_under': 'OVER_9'}, 'Invalid predicted_card_over_under'),
+])
+def test_batch_rejects_invalid_values(app, client, seed, auth_headers, fields, message):
+    match_id = seed['match_ids'][2]
+    response = client.post('/api/predictions/batch', headers=auth_headers, json={
+        'predictions': [dict(fields, match_id=match_id)]
+    })
+
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['data'][0]['message'] == message
+    with app.app_context():
+        assert Prediction.query.filter_by(user_id=seed['user_id'], match_id=match_id).count() == 0
@@ -0,0 +1,29 @@
+# tests/test_query_plans.py
+# Hồi quy index: các truy vấn đọc nóng không được quét toàn bộ bảng lớn
+import pytest
+
+from utils.query_plans import _SCAN_RE, check_query_plans
+
+
+@pytest.mark.parametrize('detail, table', [
+    ('SCAN Likes', 'Likes'),
+    ('SCAN l', 'l'),
+    ('SCAN TABLE Likes', 'Likes'),
+    ('SCAN TABLE Likes AS l', 'Likes'),
+    ('SCAN Likes USING INDEX idx_likes_post', None),
+    ('SCAN TABLE Likes USING COVERING INDEX idx_likes_post', None),
+    ('SEARCH Likes USING INDEX idx_likes_post (post_id=?)', None),
+])
+def test_scan_detail_parsing(detail, table):
+    match = _SCAN_RE.match(detail)
+    assert (match.group(1) if match else None) == table
+
+
+def test_hot_paths_use_indexes(app, seed):
+    with app.app_context():
+        problems, checked = check_query_plans()
+
+    assert checked > 0
+    assert problems == [], '\n'.join(
+        f"{name}: SCAN {table}\n    {' '.join(statement.split())}" for name, table, statement in problems
+    )
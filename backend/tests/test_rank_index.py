@@ -0,0 +1,42 @@
+# tests/test_rank_index.py
+# RankIndex so với sắp xếp trực tiếp, kể cả khi điểm âm
+import random
+
+from utils.rank_index import RankIndex
+
+
+def _expected(scores):
+    ordered = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [
+        (sum(1 for other in scores.values() if other > score) + 1, user_id, score)
+        for user_id, score in ordered
+    ]
+
+
+def test_negative_scores_keep_real_value():
+    index = RankIndex({1: 3, 2: 0})
+    index.apply_deltas({2: -5})
+    assert index.score(2) == -5
+
+    # Điểm âm rồi quay lại: phải cộng trên điểm thật, không phải 0
+    index.apply_deltas({2: 6})
+    assert index.score(2) == 1
+    assert index.entries(0, 10) == [(1, 1, 3), (2, 2, 1)]
+
+
+def test_matches_sorted_order_with_random_deltas():
+    rng = random.Random(14)
+    scores = {user_id: rng.randint(-20, 40) for user_id in range(1, 200)}
+    index = RankIndex(scores)
+
+    for _ in range(50):
+        deltas = {rng.randint(1, 260): rng.randint(-60, 60) for _ in range(rng.randint(1, 80))}
+        index.apply_deltas(deltas)
+        for user_id, delta in deltas.items():
+            scores[user_id] = scores.get(user_id, 0) + delta
+
+        expected = _expected(scores)
+        assert index.entries(0, len(scores)) == expected
+        for rank, user_id, score in rng.sample(expected, 10):
+            assert index.rank(user_id) == rank
+            assert index.score(user_id) == score
@@ -0,0 +1,60 @@
+# tests/test_write_queue.py
+# Hết thời gian chờ: job còn trong hàng đợi bị hủy, job đang chạy vẫn được ghi
+import threading
+
+import pytest
+
+from utils.write_queue import WriteQueue, WriteQueueBusy, WriteAccepted
+
+
+def _blocking_job(started, release, ran):
+    started.set()
+    release.wait(5)
+    ran.append(True)
+    return 'done'
+
+
+def test_timeout_cancels_queued_job(app, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    ran, queued_ran = [], []
+    blocker = WriteQueue.submit(_blocking_job, started, release, ran)
+    assert started.wait(5)
+
+    monkeypatch.setattr(WriteQueue, 'TIMEOUT', 0.1)
+    try:
+        with app.app_context():
+            with pytest.raises(WriteQueueBusy):
+                WriteQueue.run(queued_ran.append, True)
+    finally:
+        release.set()
+    assert blocker.result(5) == 'done'
+
+    # Job sau chạy xong nghĩa là luồng ghi đã đi qua job bị hủy
+    with app.app_context():
+        monkeypatch.setattr(WriteQueue, 'TIMEOUT', 5)
+        assert WriteQueue.run(lambda: 'next') == 'next'
+    assert queued_ran == []
+
+
+def test_timeout_while_running_reports_accepted(app, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    ran = []
+
+    monkeypatch.setattr(WriteQueue, 'TIMEOUT', 0.1)
+    try:
+        with app.app_context():
+            with pytest.raises(WriteAccepted):
+                WriteQueue.run(_blocking_job, started, release, ran)
+    finally:
+        release.set()
+
+    with app.app_context():
+        monkeypatch.setattr(WriteQueue, 'TIMEOUT', 5)
+        WriteQueue.run(lambda: None)
+    assert ran == [True]
+
+
+def test_error_response():
+    assert WriteQueue.error_response(WriteQueue.ACCEPTED_MESSAGE)[1] == 202
+    assert WriteQueue.error_response(WriteQueue.BUSY_MESSAGE)[1] == 503
+    assert WriteQueue.error_response('Match not found', 400)[1] == 400
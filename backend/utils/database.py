@@ -1,23 +1,74 @@
 # utils/database.py
+# Vòng đời connection SQLite: một pool ghi dùng chung cho ORM (db.session) và các helper raw
+# bên dưới, thêm pool 'read' chỉ đọc cho request GET (utils/db_routing.py);
+# mỗi connection mới được áp pragma một lần khi mở
 import sqlite3
-import os
 from contextlib import contextmanager
-from config import Config
+from sqlalchemy import event
+from extensions import db
+from utils.db_routing import READ_BIND
+
+# busy_timeout đặt trước để các pragma sau (journal_mode) chờ được khi DB đang bị khóa
+SQLITE_PRAGMAS = (
+    ('busy_timeout', 5000),        # ms chờ khóa ghi thay vì báo "database is locked" ngay
+    ('journal_mode', 'WAL'),       # Đọc không chặn ghi và ngược lại
+    ('synchronous', 'NORMAL'),     # An toàn khi dùng WAL, ít fsync hơn FULL
+    ('cache_size', -20000),        # ~20MB page cache mỗi connection (số âm = KB)
+    ('mmap_size', 268435456),      # Đọc qua memory-mapped I/O tới 256MB
+    ('temp_store', 'MEMORY'),      # Bảng tạm / sort trung gian trong RAM
+)
+
+# Connection của pool 'read': không đổi journal_mode / synchronous (thuộc về writer), chặn mọi câu ghi
+READ_ONLY_PRAGMAS = tuple(
+    pragma for pragma in SQLITE_PRAGMAS if pragma[0] not in ('journal_mode', 'synchronous')
+) + (('query_only', 'ON'),)
+
+_engine = None
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS:
+        # PRAGMA không nhận bind param, giá trị là hằng số nội bộ
+        cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
+def _apply_read_only_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in READ_ONLY_PRAGMAS:
+        cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
+def _reset_row_factory(dbapi_connection, connection_record):
+    # Helper raw đổi row_factory sang sqlite3.Row, trả về pool thì đặt lại cho ORM
+    dbapi_connection.row_factory = None
+
+def init_engine(app):
+    """Gắn pragma / reset vào engine của Flask-SQLAlchemy, gọi ngay sau db.init_app()"""
+    global _engine
+    with app.app_context():
+        engine = db.engine
+        read_engine = db.engines.get(READ_BIND)
+    if engine.dialect.name == 'sqlite':
+        if not event.contains(engine, 'connect', _apply_pragmas):
+            event.listen(engine, 'connect', _apply_pragmas)
+            event.listen(engine, 'checkin', _reset_row_factory)
+        if read_engine is not None and not event.contains(read_engine, 'connect', _apply_read_only_pragmas):
+            event.listen(read_engine, 'connect', _apply_read_only_pragmas)
+    _engine = engine
+    return engine
 
 def get_db_connection():
     """
-    Get database connection with dict factory
-    Returns connection that returns rows as dictionaries
+    Get pooled database connection with dict factory
+    Returns connection that returns rows as dictionaries; close() trả connection về pool
     """
+    if _engine is None:
+        raise RuntimeError("Database engine chưa được khởi tạo (gọi init_engine(app) trước)")
     try:
-        conn = sqlite3.connect(Config.DATABASE_URL)
-        conn.row_factory = sqlite3.Row  # This enables column access by name
-        # Enable foreign keys
-        conn.execute("PRAGMA foreign_keys = ON")
-        # Enable WAL mode for better concurrent reads
-        conn.execute("PRAGMA journal_mode = WAL")
+        conn = _engine.raw_connection()
+        conn.driver_connection.row_factory = sqlite3.Row  # This enables column access by name
         return conn
-    except sqlite3.Error as e:
+    except Exception as e:
         print(f"Database connection error: {e}")
         raise
 
@@ -140,7 +191,7 @@ def check_database_health():
         
         return {
             'status': 'healthy' if not missing_tables else 'degraded',
-            'database_path': Config.DATABASE_URL,
+            'database_path': str(_engine.url),
             'existing_tables': existing_tables,
             'missing_tables': missing_tables,
             'total_tables': len(existing_tables)
@@ -154,39 +205,9 @@ def check_database_health():
 
 def init_database():
     """
-    Initialize database with required tables and indexes
-    This is a safety function to ensure required tables exist
+    Initialize database indexes
+    Index / schema nay được quản lý bằng migration có version (utils/migrations.py),
+    hàm này giữ lại cho code cũ: chạy các migration còn thiếu (cần app context)
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        # Enable foreign keys
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
-        # Create indexes for better performance if they don't exist
-        indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_matches_season ON Matches(season_id)",
-            "CREATE INDEX IF NOT EXISTS idx_matches_status ON Matches(status)",
-            "CREATE INDEX IF NOT EXISTS idx_matches_datetime ON Matches(match_datetime)",
-            "CREATE INDEX IF NOT EXISTS idx_matches_teams ON Matches(home_team_id, away_team_id)",
-            "CREATE INDEX IF NOT EXISTS idx_teams_name ON Teams(name)",
-            "CREATE INDEX IF NOT EXISTS idx_players_name ON Players(full_name)",
-            "CREATE INDEX IF NOT EXISTS idx_seasons_dates ON Seasons(start_date, end_date)",
-            "CREATE INDEX IF NOT EXISTS idx_lineups_match ON MatchLineups(match_id)",
-            "CREATE INDEX IF NOT EXISTS idx_events_match ON MatchEvents(match_id)",
-            "CREATE INDEX IF NOT EXISTS idx_standings_season_round ON SeasonStandings(season_id, round)"
-        ]
-        
-        for index_sql in indexes:
-            cursor.execute(index_sql)
-        
-        conn.commit()
-        print("✅ Database initialized successfully")
-        
-    except Exception as e:
-        conn.rollback()
-        print(f"❌ Database initialization failed: {e}")
-        raise
-    finally:
-        conn.close()
\ No newline at end of file
+    from utils.migrations import run_migrations
+    return run_migrations()
@@ -0,0 +1,44 @@
+# utils/db_routing.py
+# Tách đọc / ghi cho db.session: request GET/HEAD đọc qua engine 'read' (connection
+# query_only, đọc snapshot WAL nên không chặn / bị chặn bởi writer), còn lại dùng engine ghi
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+READ_BIND = 'read'
+READ_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+_WRITE_KEYWORDS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'CREATE', 'DROP', 'ALTER')
+
+
+def _is_write(clause):
+    if clause is None:
+        return False
+    if getattr(clause, 'is_dml', False):
+        return True
+    # text(): nhìn từ khóa đầu câu
+    sql = getattr(clause, 'text', None)
+    if isinstance(sql, str):
+        words = sql.split(None, 1)
+        return bool(words) and words[0].upper() in _WRITE_KEYWORDS
+    return False
+
+
+class RoutingSession(Session):
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and request.method in READ_METHODS:
+            read_engine = self._db.engines.get(READ_BIND)
+            if read_engine is not None:
+                # Handler GET vẫn ghi (flush / UPDATE...) -> engine ghi, và các câu đọc sau đó
+                # trong cùng transaction cũng đi engine ghi để thấy dữ liệu vừa ghi
+                if self._flushing or _is_write(clause):
+                    self.info['wrote'] = True
+                elif not self.info.get('wrote'):
+                    return read_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _reset_route(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('wrote', None)
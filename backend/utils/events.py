@@ -0,0 +1,24 @@
+# utils/events.py
+# Sự kiện nghiệp vụ trong process: service phát sự kiện sau khi commit,
+# các bộ xử lý (thành tựu, ...) đăng ký nhận qua subscribe()
+
+PREDICTION_SETTLED = 'prediction_settled'   # user_ids: user có dự đoán vừa được chấm
+POINTS_AWARDED = 'points_awarded'           # user_ids: user vừa được cộng điểm thưởng
+POST_CREATED = 'post_created'               # user_ids: người đăng bài
+LIKE_RECEIVED = 'like_received'             # user_ids: chủ bài viết được like
+
+_handlers = {}
+
+def subscribe(event, handler):
+    """Đăng ký handler(**payload) cho sự kiện (đăng ký lại cùng handler không bị trùng)"""
+    handlers = _handlers.setdefault(event, [])
+    if handler not in handlers:
+        handlers.append(handler)
+
+def publish(event, **payload):
+    """Gọi lần lượt các handler; lỗi của handler không làm hỏng thao tác đã commit"""
+    for handler in _handlers.get(event, ()):
+        try:
+            handler(**payload)
+        except Exception as e:
+            print(f"❌ Event handler error ({event}): {str(e)}")
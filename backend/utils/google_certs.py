@@ -0,0 +1,158 @@
+# utils/google_certs.py
+# Cache chứng chỉ ký (x509 / JWKS) của Google để xác thực ID token đăng nhập Google:
+# giữ theo Cache-Control max-age, làm mới nền trước khi hết hạn -> mỗi lần đăng nhập
+# chỉ còn kiểm tra chữ ký cục bộ, không gọi HTTP ra ngoài
+import re
+import json
+import time
+import base64
+import threading
+
+from google.oauth2 import id_token
+from google.auth import exceptions
+from google.auth.transport import requests
+
+
+class _CachedCertsRequest:
+    """Thay transport HTTP khi gọi id_token.verify_oauth2_token: trả luôn chứng chỉ trong cache"""
+    status = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    def __call__(self, url, method='GET', **kwargs):
+        return self
+
+
+class GoogleCertStore:
+    CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+    DEFAULT_MAX_AGE = 3600       # Giây, khi Google không gửi Cache-Control
+    REFRESH_BEFORE = 300         # Còn < 5 phút là làm mới nền
+    MIN_REFETCH_INTERVAL = 60    # Gặp kid lạ: tải lại tối đa 1 lần / phút
+
+    # Đường dẫn file chứng chỉ cục bộ (JSON {kid: x509} hoặc JWKS), dùng khi test / chạy offline
+    local_file = None
+
+    _data = None           # JSON chứng chỉ dạng bytes (đúng định dạng verify_oauth2_token đọc)
+    _kids = frozenset()
+    _expires_at = 0.0
+    _fetched_at = 0.0
+    _refreshing = False
+    _lock = threading.Lock()        # Bảo vệ trạng thái cache
+    _fetch_lock = threading.Lock()  # Mỗi lúc chỉ một lần tải chứng chỉ
+
+    @classmethod
+    def init_app(cls, app):
+        cls.local_file = app.config.get('GOOGLE_CERTS_FILE')
+        with cls._lock:
+            cls._data = None
+            cls._kids = frozenset()
+            cls._expires_at = 0.0
+
+    @classmethod
+    def _store(cls, data, max_age):
+        certs = json.loads(data.decode('utf-8'))
+        if 'keys' in certs:
+            kids = frozenset(key.get('kid') for key in certs['keys'])
+        else:
+            kids = frozenset(certs.keys())
+        now = time.time()
+        with cls._lock:
+            cls._data = data
+            cls._kids = kids
+            cls._fetched_at = now
+            cls._expires_at = now + max_age
+
+    @staticmethod
+    def _max_age(headers):
+        """max-age trong Cache-Control trừ đi Age (thời gian response đã nằm ở cache trung gian)"""
+        match = re.search(r'max-age=(\d+)', headers.get('Cache-Control', ''))
+        if not match:
+            return GoogleCertStore.DEFAULT_MAX_AGE
+        try:
+            age = int(headers.get('Age', 0))
+        except ValueError:
+            age = 0
+        return max(int(match.group(1)) - age, 0)
+
+    @classmethod
+    def refresh(cls, force=True):
+        """Tải lại chứng chỉ (từ file cục bộ nếu có cấu hình, nếu không thì từ Google)"""
+        with cls._fetch_lock:
+            # force=False: luồng khác vừa tải xong trong lúc chờ lock thì thôi
+            if not force and cls._data is not None and time.time() < cls._expires_at:
+                return
+            if cls.local_file:
+                with open(cls.local_file, 'rb') as f:
+                    # File cục bộ không hết hạn
+                    cls._store(f.read(), float('inf'))
+                return
+
+            response = requests.Request()(cls.CERTS_URL, method='GET')
+            if response.status != 200:
+                raise exceptions.TransportError(f"Không tải được chứng chỉ Google ({response.status})")
+            max_age = cls._max_age(response.headers)
+            cls._store(response.data, max_age)
+            print(f"🔑 Đã tải chứng chỉ Google ({len(cls._kids)} key, hết hạn sau {max_age}s)")
+
+    @classmethod
+    def _refresh_in_background(cls):
+        try:
+            cls.refresh()
+        except Exception as e:
+            print(f"❌ Làm mới chứng chỉ Google lỗi: {str(e)}")
+        finally:
+            cls._refreshing = False
+
+    @classmethod
+    def _get_data(cls):
+        now = time.time()
+        data, expires_at = cls._data, cls._expires_at
+
+        if data is not None and now < expires_at:
+            # Sắp hết hạn -> làm mới nền, request hiện tại vẫn dùng bản đang có
+            if expires_at - now < cls.REFRESH_BEFORE:
+                with cls._lock:
+                    start = not cls._refreshing
+                    cls._refreshing = True
+                if start:
+                    threading.Thread(target=cls._refresh_in_background, daemon=True).start()
+            return data
+
+        # Chưa có hoặc đã hết hạn -> tải đồng bộ; Google lỗi thì tạm dùng bản cũ
+        try:
+            cls.refresh(force=False)
+        except Exception as e:
+            if data is None:
+                raise
+            print(f"⚠️ Dùng chứng chỉ Google đã hết hạn do tải lại lỗi: {str(e)}")
+            return data
+        return cls._data
+
+    @staticmethod
+    def _token_kid(token):
+        try:
+            header = token.split('.')[0]
+            header += '=' * (-len(header) % 4)
+            return json.loads(base64.urlsafe_b64decode(header)).get('kid')
+        except Exception:
+            return None
+
+    @classmethod
+    def verify(cls, token, audience):
+        """Xác thực ID token Google bằng chứng chỉ trong cache, trả về thông tin user (claims)"""
+        if isinstance(token, bytes):
+            token = token.decode('utf-8')
+        data = cls._get_data()
+
+        # Google vừa xoay key (kid chưa có trong cache) -> tải lại ngay, có giới hạn tần suất
+        kid = cls._token_kid(token)
+        if kid and kid not in cls._kids and not cls.local_file \
+                and time.time() - cls._fetched_at >= cls.MIN_REFETCH_INTERVAL:
+            try:
+                cls.refresh()
+                data = cls._data
+            except Exception as e:
+                print(f"❌ Tải lại chứng chỉ Google lỗi: {str(e)}")
+
+        return id_token.verify_oauth2_token(token, _CachedCertsRequest(data), audience)
@@ -0,0 +1,321 @@
+# utils/migrations.py
+from sqlalchemy import text
+from extensions import db
+
+# db.create_all() chỉ tạo bảng còn thiếu, không thêm cột/index vào bảng đã có.
+# Các bước dưới đây nâng cấp schema của DB cũ, đánh số theo PRAGMA user_version
+# để mỗi bước chỉ chạy đúng 1 lần.
+
+def _column_exists(table, column):
+    columns = db.session.execute(text(f'PRAGMA table_info({table})')).fetchall()
+    return any(col[1] == column for col in columns)
+
+def _add_column(table, column, ddl):
+    if not _column_exists(table, column):
+        db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+
+def _m001_post_counters():
+    """Thêm cột đếm like/comment cho Posts và tính lại từ dữ liệu hiện có"""
+    _add_column('Posts', 'like_count', 'INTEGER NOT NULL DEFAULT 0')
+    _add_column('Posts', 'comment_count', 'INTEGER NOT NULL DEFAULT 0')
+    db.session.execute(text('''
+        UPDATE Posts SET
+            like_count = (SELECT COUNT(*) FROM Likes l WHERE l.post_id = Posts.post_id),
+            comment_count = (SELECT COUNT(*) FROM Comments c WHERE c.post_id = Posts.post_id)
+    '''))
+
+def _m002_posts_feed_index():
+    """Index cho phân trang keyset của newsfeed"""
+    db.session.execute(text('''
+        CREATE INDEX IF NOT EXISTS idx_posts_created_at_post_id
+        ON Posts(created_at, post_id)
+    '''))
+
+def vn_fold_sql(expr):
+    """
+    Biểu thức SQL bỏ chữ đ/Đ -> d/D. Các dấu còn lại (à, ộ, ...) do tokenizer
+    unicode61 remove_diacritics 2 xử lý, riêng đ là chữ cái riêng nên phải tự đổi
+    """
+    return f"replace(replace({expr}, 'đ', 'd'), 'Đ', 'D')"
+
+def _post_author_sql(user_id_expr):
+    return f"(SELECT COALESCE(full_name, '') || ' ' || username FROM Users WHERE user_id = {user_id_expr})"
+
+def _fts5_available():
+    return bool(db.session.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar())
+
+def _m003_posts_search():
+    """
+    Bảng FTS5 PostsSearch cho tìm kiếm bài viết theo tiêu đề, nội dung, tên người đăng.
+    Dùng external content (view PostsSearchContent) để snippet() highlight trên text gốc,
+    còn index được nạp giá trị đã bỏ đ qua trigger. Không dùng lệnh 'rebuild' /
+    'integrity-check' của FTS5 (sẽ đọc text chưa bỏ đ), dùng PostService.rebuild_search_index()
+    """
+    # Báo lỗi thay vì bỏ qua: bỏ qua thì user_version vẫn lên 3 mà bảng không bao giờ được tạo
+    if not _fts5_available():
+        raise RuntimeError("SQLite không hỗ trợ FTS5 (cần cho bảng tìm kiếm PostsSearch)")
+
+    fold = vn_fold_sql
+    statements = [
+        '''
+        CREATE VIEW IF NOT EXISTS PostsSearchContent AS
+        SELECT p.post_id, p.title, p.content,
+               COALESCE(u.full_name, '') || ' ' || u.username AS author
+        FROM Posts p
+        LEFT JOIN Users u ON u.user_id = p.user_id
+        ''',
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS PostsSearch USING fts5(
+            title, content, author,
+            content='PostsSearchContent', content_rowid='post_id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_posts_search_insert AFTER INSERT ON Posts BEGIN
+            INSERT INTO PostsSearch(rowid, title, content, author)
+            VALUES (new.post_id, {fold('new.title')}, {fold('new.content')},
+                    {fold(_post_author_sql('new.user_id'))});
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_posts_search_delete AFTER DELETE ON Posts BEGIN
+            INSERT INTO PostsSearch(PostsSearch, rowid, title, content, author)
+            VALUES ('delete', old.post_id, {fold('old.title')}, {fold('old.content')},
+                    {fold(_post_author_sql('old.user_id'))});
+        END
+        ''',
+        # Chỉ bắt cột được index, tránh chạy trigger khi cập nhật like_count/comment_count
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_posts_search_update
+        AFTER UPDATE OF title, content, user_id ON Posts BEGIN
+            INSERT INTO PostsSearch(PostsSearch, rowid, title, content, author)
+            VALUES ('delete', old.post_id, {fold('old.title')}, {fold('old.content')},
+                    {fold(_post_author_sql('old.user_id'))});
+            INSERT INTO PostsSearch(rowid, title, content, author)
+            VALUES (new.post_id, {fold('new.title')}, {fold('new.content')},
+                    {fold(_post_author_sql('new.user_id'))});
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_users_posts_search_update
+        AFTER UPDATE OF username, full_name ON Users BEGIN
+            INSERT INTO PostsSearch(PostsSearch, rowid, title, content, author)
+            SELECT 'delete', p.post_id, {fold('p.title')}, {fold('p.content')},
+                   {fold("COALESCE(old.full_name, '') || ' ' || old.username")}
+            FROM Posts p WHERE p.user_id = old.user_id;
+            INSERT INTO PostsSearch(rowid, title, content, author)
+            SELECT p.post_id, {fold('p.title')}, {fold('p.content')},
+                   {fold("COALESCE(new.full_name, '') || ' ' || new.username")}
+            FROM Posts p WHERE p.user_id = new.user_id;
+        END
+        ''',
+        f'''
+        INSERT INTO PostsSearch(rowid, title, content, author)
+        SELECT post_id, {fold('title')}, {fold('content')}, {fold('author')}
+        FROM PostsSearchContent
+        ''',
+    ]
+    for statement in statements:
+        db.session.execute(text(statement))
+
+def _m004_matches_status_index():
+    """Index cho bộ lập lịch chuyển trạng thái trận"""
+    db.session.execute(text('''
+        CREATE INDEX IF NOT EXISTS idx_matches_status_datetime
+        ON Matches(status, match_datetime)
+    '''))
+
+def _m005_matches_round_no():
+    """Cột số vòng round_no (tính từ chuỗi round) + index lọc theo mùa/vòng"""
+    from models.match import parse_round_no
+
+    _add_column('Matches', 'round_no', 'INTEGER')
+    rows = db.session.execute(text('SELECT match_id, round FROM Matches')).fetchall()
+    params = [
+        {'match_id': row.match_id, 'round_no': parse_round_no(row.round)}
+        for row in rows
+    ]
+    if params:
+        db.session.execute(
+            text('UPDATE Matches SET round_no = :round_no WHERE match_id = :match_id'),
+            params
+        )
+    db.session.execute(text('''
+        CREATE INDEX IF NOT EXISTS idx_matches_season_round_datetime
+        ON Matches(season_id, round_no, match_datetime)
+    '''))
+
+def _m006_player_season_stats():
+    """Nạp dữ liệu ban đầu cho bảng PlayerSeasonStats (bảng do db.create_all() tạo)"""
+    from services.player_statistics_service import PlayerStatisticsService
+
+    _, error = PlayerStatisticsService.rebuild_season_stats(commit=False)
+    if error:
+        raise RuntimeError(error)
+
+def _m007_match_prediction_distribution():
+    """Nạp dữ liệu ban đầu cho bộ đếm phân bố dự đoán theo trận (bảng do db.create_all() tạo)"""
+    from services.prediction_service import PredictionService
+
+    _, error = PredictionService.rebuild_distribution(commit=False)
+    if error:
+        raise RuntimeError(error)
+
+def _m008_posts_user_index():
+    """Index đếm bài / like theo người đăng cho điều kiện thành tựu"""
+    db.session.execute(text('''
+        CREATE INDEX IF NOT EXISTS idx_posts_user_id ON Posts(user_id)
+    '''))
+
+def _m009_hot_filter_indexes():
+    """Index cho các bộ lọc nóng (khai báo cùng tên trong __table_args__ của model)"""
+    indexes = [
+        'idx_predictions_user_created ON Predictions(user_id, created_at)',
+        'idx_predictions_match ON Predictions(match_id)',
+        'idx_likes_post ON Likes(post_id)',
+        'idx_comments_post_created ON Comments(post_id, created_at)',
+        'idx_comments_user_created ON Comments(user_id, created_at)',
+        'idx_match_events_match ON MatchEvents(match_id)',
+        'idx_match_events_player_match ON MatchEvents(player_id, match_id)',
+        'idx_match_lineups_player ON MatchLineups(player_id)',
+        'idx_team_rosters_season_team ON TeamRosters(season_id, team_id)',
+        'idx_matches_home_team ON Matches(home_team_id)',
+        'idx_matches_away_team ON Matches(away_team_id)',
+    ]
+    for index in indexes:
+        db.session.execute(text(f'CREATE INDEX IF NOT EXISTS {index}'))
+
+def _stored_author_sql(post_id_expr):
+    return f"(SELECT author FROM PostsSearchAuthor WHERE post_id = {post_id_expr})"
+
+def fill_posts_search():
+    """
+    Nạp lại PostsSearchAuthor và toàn bộ index FTS5 từ Posts/Users (không commit),
+    trả về số bài đã index. Không dùng lệnh 'rebuild' của FTS5 vì nó đọc text chưa bỏ đ
+    """
+    fold = vn_fold_sql
+    db.session.execute(text('DELETE FROM PostsSearchAuthor'))
+    db.session.execute(text(f'''
+        INSERT INTO PostsSearchAuthor(post_id, author)
+        SELECT post_id, {fold('author')} FROM PostsSearchContent
+    '''))
+    db.session.execute(text("INSERT INTO PostsSearch(PostsSearch) VALUES ('delete-all')"))
+    return db.session.execute(text(f'''
+        INSERT INTO PostsSearch(rowid, title, content, author)
+        SELECT p.post_id, {fold('p.title')}, {fold('p.content')}, a.author
+        FROM Posts p
+        JOIN PostsSearchAuthor a ON a.post_id = p.post_id
+    ''')).rowcount
+
+def _m010_posts_search_stored_author():
+    """
+    Lưu author (đã bỏ đ) đúng như lúc index vào PostsSearchAuthor; lệnh 'delete' của FTS5
+    dùng giá trị này thay vì tính lại từ Users, nên user bị xóa / sửa tên trước khi
+    bài bị xóa / sửa không còn làm lệch index. Nạp lại index để sửa các dòng đã lệch
+    """
+    exists = db.session.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'PostsSearch'"
+    )).first()
+    if not exists:
+        # DB đã ghi version 3 khi bước 003 còn lặng lẽ bỏ qua lúc thiếu FTS5
+        _m003_posts_search()
+
+    fold = vn_fold_sql
+    stored = _stored_author_sql
+    statements = [
+        'DROP TRIGGER IF EXISTS trg_posts_search_insert',
+        'DROP TRIGGER IF EXISTS trg_posts_search_delete',
+        'DROP TRIGGER IF EXISTS trg_posts_search_update',
+        'DROP TRIGGER IF EXISTS trg_users_posts_search_update',
+        '''
+        CREATE TABLE IF NOT EXISTS PostsSearchAuthor (
+            post_id INTEGER PRIMARY KEY,
+            author TEXT
+        )
+        ''',
+        f'''
+        CREATE TRIGGER trg_posts_search_insert AFTER INSERT ON Posts BEGIN
+            INSERT OR REPLACE INTO PostsSearchAuthor(post_id, author)
+            VALUES (new.post_id, {fold(_post_author_sql('new.user_id'))});
+            INSERT INTO PostsSearch(rowid, title, content, author)
+            VALUES (new.post_id, {fold('new.title')}, {fold('new.content')}, {stored('new.post_id')});
+        END
+        ''',
+        f'''
+        CREATE TRIGGER trg_posts_search_delete AFTER DELETE ON Posts BEGIN
+            INSERT INTO PostsSearch(PostsSearch, rowid, title, content, author)
+            VALUES ('delete', old.post_id, {fold('old.title')}, {fold('old.content')}, {stored('old.post_id')});
+            DELETE FROM PostsSearchAuthor WHERE post_id = old.post_id;
+        END
+        ''',
+        # Chỉ bắt cột được index, tránh chạy trigger khi cập nhật like_count/comment_count
+        f'''
+        CREATE TRIGGER trg_posts_search_update
+        AFTER UPDATE OF title, content, user_id ON Posts BEGIN
+            INSERT INTO PostsSearch(PostsSearch, rowid, title, content, author)
+            VALUES ('delete', old.post_id, {fold('old.title')}, {fold('old.content')}, {stored('old.post_id')});
+            INSERT OR REPLACE INTO PostsSearchAuthor(post_id, author)
+            VALUES (new.post_id, {fold(_post_author_sql('new.user_id'))});
+            INSERT INTO PostsSearch(rowid, title, content, author)
+            VALUES (new.post_id, {fold('new.title')}, {fold('new.content')}, {stored('new.post_id')});
+        END
+        ''',
+        f'''
+        CREATE TRIGGER trg_users_posts_search_update
+        AFTER UPDATE OF username, full_name ON Users BEGIN
+            INSERT INTO PostsSearch(PostsSearch, rowid, title, content, author)
+            SELECT 'delete', p.post_id, {fold('p.title')}, {fold('p.content')}, {stored('p.post_id')}
+            FROM Posts p WHERE p.user_id = old.user_id;
+            UPDATE PostsSearchAuthor
+            SET author = {fold("COALESCE(new.full_name, '') || ' ' || new.username")}
+            WHERE post_id IN (SELECT post_id FROM Posts WHERE user_id = new.user_id);
+            INSERT INTO PostsSearch(rowid, title, content, author)
+            SELECT p.post_id, {fold('p.title')}, {fold('p.content')}, {stored('p.post_id')}
+            FROM Posts p WHERE p.user_id = new.user_id;
+        END
+        ''',
+    ]
+    for statement in statements:
+        db.session.execute(text(statement))
+    fill_posts_search()
+
+# (version, tên, hàm) - chỉ thêm bước mới vào cuối, không sửa bước đã phát hành
+MIGRATIONS = [
+    (1, 'post_counters', _m001_post_counters),
+    (2, 'posts_feed_index', _m002_posts_feed_index),
+    (3, 'posts_search_fts5', _m003_posts_search),
+    (4, 'matches_status_index', _m004_matches_status_index),
+    (5, 'matches_round_no', _m005_matches_round_no),
+    (6, 'player_season_stats', _m006_player_season_stats),
+    (7, 'match_prediction_distribution', _m007_match_prediction_distribution),
+    (8, 'posts_user_index', _m008_posts_user_index),
+    (9, 'hot_filter_indexes', _m009_hot_filter_indexes),
+    (10, 'posts_search_stored_author', _m010_posts_search_stored_author),
+]
+
+def get_schema_version():
+    return db.session.execute(text('PRAGMA user_version')).scalar() or 0
+
+def run_migrations():
+    """Chạy các bước migration có version lớn hơn user_version hiện tại"""
+    current_version = get_schema_version()
+    applied = []
+
+    for version, name, migrate in MIGRATIONS:
+        if version <= current_version:
+            continue
+        try:
+            migrate()
+            # PRAGMA không nhận bind param, version là hằng số nội bộ
+            db.session.execute(text(f'PRAGMA user_version = {int(version)}'))
+            db.session.commit()
+            applied.append(name)
+            print(f"✓ Migration {version:03d} ({name}) applied")
+        except Exception as e:
+            db.session.rollback()
+            print(f"✗ Migration {version:03d} ({name}) failed: {e}")
+            raise
+
+    return applied
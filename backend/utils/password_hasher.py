@@ -0,0 +1,122 @@
+# utils/password_hasher.py
+# Hash / kiểm tra mật khẩu bcrypt trên process pool riêng: ~250ms CPU mỗi lần
+# (cost 12) không còn chiếm luồng request, số việc chờ có giới hạn và có timeout
+import hmac
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """Pool quá tải (hàng đợi đầy) hoặc quá thời gian chờ"""
+    pass
+
+
+# --- Hàm chạy trong tiến trình con (phải ở cấp module để pickle được) ---
+
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _check_password(password_hash, password):
+    password_hash = password_hash.encode('utf-8')
+    return hmac.compare_digest(bcrypt.hashpw(password, password_hash), password_hash)
+
+
+class PasswordHasher:
+    BUSY_MESSAGE = "Hệ thống đang bận, vui lòng thử lại sau"
+
+    # Giá trị mặc định, init_app() ghi đè theo config
+    rounds = 12
+    workers = 2          # 0 = hash ngay trong luồng gọi (CLI, script seed dữ liệu)
+    max_pending = 32     # Số việc tối đa đang chạy + đang chờ trong pool
+    timeout = 5.0        # Giây chờ tối đa một lần hash / kiểm tra
+
+    _pool = None
+    _pool_lock = threading.Lock()
+    _slots = threading.BoundedSemaphore(max_pending)
+
+    @classmethod
+    def init_app(cls, app):
+        cls.rounds = app.config.get('BCRYPT_LOG_ROUNDS', cls.rounds)
+        cls.workers = app.config.get('PASSWORD_HASH_WORKERS', cls.workers)
+        cls.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', cls.max_pending)
+        cls.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', cls.timeout)
+        cls._slots = threading.BoundedSemaphore(cls.max_pending)
+        cls.shutdown()
+
+    @classmethod
+    def _get_pool(cls):
+        with cls._pool_lock:
+            if cls._pool is None:
+                # spawn: không fork cả process đang có luồng SocketIO / scheduler, chạy được cả trên Windows
+                cls._pool = ProcessPoolExecutor(
+                    max_workers=cls.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return cls._pool
+
+    @classmethod
+    def shutdown(cls):
+        with cls._pool_lock:
+            pool, cls._pool = cls._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _run(cls, fn, *args):
+        """Chạy fn trên pool; hết chỗ trong hàng đợi hoặc quá timeout -> PasswordHasherBusy"""
+        if cls.workers <= 0:
+            return fn(*args)
+
+        slots = cls._slots
+        if not slots.acquire(blocking=False):
+            print(f"⚠️ Password hasher quá tải ({cls.max_pending} việc đang chờ)")
+            raise PasswordHasherBusy(cls.BUSY_MESSAGE)
+
+        try:
+            future = cls._get_pool().submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        # Chỉ trả chỗ khi việc thật sự xong, kể cả khi người gọi đã bỏ đi vì timeout
+        future.add_done_callback(lambda _: slots.release())
+
+        try:
+            return future.result(timeout=cls.timeout)
+        except FutureTimeoutError:
+            # cancel() chỉ gỡ được việc còn nằm trong hàng đợi; việc đang chạy vẫn giữ chỗ
+            # cho tới khi xong thật (done-callback ở trên), nên hàng đợi không bị vượt max_pending
+            future.cancel()
+            print(f"⚠️ Password hasher quá thời gian chờ ({cls.timeout}s)")
+            raise PasswordHasherBusy(cls.BUSY_MESSAGE)
+        except BrokenProcessPool:
+            # Tiến trình con chết bất thường -> lần sau tạo pool mới
+            print("❌ Password hasher pool bị hỏng, khởi tạo lại")
+            cls.shutdown()
+            raise PasswordHasherBusy(cls.BUSY_MESSAGE)
+
+    @staticmethod
+    def _to_bytes(password):
+        return password.encode('utf-8') if isinstance(password, str) else password
+
+    @classmethod
+    def hash(cls, password):
+        """Trả về chuỗi hash bcrypt với cost hiện hành (BCRYPT_LOG_ROUNDS)"""
+        return cls._run(_hash_password, cls._to_bytes(password), cls.rounds)
+
+    @classmethod
+    def check(cls, password_hash, password):
+        if not password_hash or password is None:
+            return False
+        return cls._run(_check_password, password_hash, cls._to_bytes(password))
+
+    @classmethod
+    def needs_rehash(cls, password_hash):
+        """Hash được tạo với cost khác cấu hình hiện tại ('$2b$12$...')"""
+        try:
+            return int(password_hash.split('$')[2]) != cls.rounds
+        except (AttributeError, IndexError, ValueError):
+            return False
@@ -0,0 +1,136 @@
+# utils/query_plans.py
+# Kiểm tra hồi quy index: chạy các hàm đọc nóng của service, ghi lại mọi câu SQL phát ra,
+# rồi EXPLAIN QUERY PLAN từng câu; báo lỗi khi bảng lớn bị quét toàn bộ (SCAN không dùng index)
+import re
+from flask import current_app
+from sqlalchemy import event, text
+from extensions import db
+
+# Bảng tăng theo người dùng / trận đấu; bảng danh mục nhỏ (Teams, Seasons, ...) được phép SCAN
+HOT_TABLES = frozenset((
+    'Users', 'Posts', 'Likes', 'Comments', 'Predictions', 'Matches', 'MatchEvents',
+    'MatchLineups', 'MatchReferees', 'TeamRosters', 'SeasonStandings', 'PlayerSeasonStats',
+    'UserAchievements', 'MatchPredictionScores', 'Players',
+))
+
+# "SCAN Likes" / "SCAN l" (alias), SQLite < 3.36 ghi "SCAN TABLE Likes AS l";
+# "SCAN ... USING INDEX" và "SEARCH ..." đều dùng index
+_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$')
+
+
+def _sample_ids():
+    """Lấy 1 id thật cho mỗi loại để gọi service (DB trống thì dùng id 1)"""
+    queries = {
+        'user_id': 'SELECT MIN(user_id) FROM Users',
+        'post_id': 'SELECT MIN(post_id) FROM Posts',
+        'match_id': 'SELECT MIN(match_id) FROM Matches',
+        'season_id': 'SELECT MAX(season_id) FROM Seasons',
+        'team_id': 'SELECT MIN(team_id) FROM Teams',
+        'player_id': 'SELECT MIN(player_id) FROM MatchEvents',
+    }
+    return {key: db.session.execute(text(sql)).scalar() or 1 for key, sql in queries.items()}
+
+
+def hot_paths(ids):
+    """(tên, hàm) các thao tác đọc trên đường request cần có index"""
+    from services.prediction_service import PredictionService
+    from services.post_service import PostService
+    from services.comment_service import CommentService
+    from services.like_service import LikeService
+    from services.match_service import MatchService
+    from services.team_roster_service import TeamRosterService
+    from services.player_statistics_service import PlayerStatisticsService
+    from services.season_standing_service import SeasonStandingService
+    from services.user_achievement_service import UserAchievementService
+
+    user_id, post_id, match_id = ids['user_id'], ids['post_id'], ids['match_id']
+    season_id, team_id, player_id = ids['season_id'], ids['team_id'], ids['player_id']
+    return [
+        ('predictions.by_user', lambda: PredictionService.get_user_predictions(user_id)),
+        ('predictions.by_match', lambda: PredictionService.get_match_predictions(match_id)),
+        ('predictions.summary', lambda: PredictionService.get_match_prediction_summary(match_id)),
+        ('predictions.upcoming', lambda: PredictionService.get_upcoming_matches_for_prediction(user_id)),
+        ('posts.feed', lambda: PostService.get_posts_by_cursor(current_user_id=user_id)),
+        ('posts.detail', lambda: PostService.get_post_detail(post_id, user_id)),
+        ('comments.by_post', lambda: CommentService.get_comments_by_post(post_id)),
+        ('comments.by_user', lambda: CommentService.get_comments_by_user(user_id)),
+        ('likes.by_post', lambda: LikeService.get_likes_by_post(post_id)),
+        ('likes.by_user', lambda: LikeService.get_likes_by_user(user_id)),
+        ('likes.count', lambda: LikeService.get_like_count_for_post(post_id)),
+        ('matches.list', lambda: MatchService.get_matches_list(season_id=season_id, round=1)),
+        ('matches.by_team', lambda: MatchService.get_team_matches(team_id)),
+        ('matches.details', lambda: MatchService.get_match_with_details(match_id)),
+        ('matches.events', lambda: MatchService.get_match_events(match_id)),
+        ('matches.lineups', lambda: MatchService.get_match_lineups(match_id)),
+        ('matches.next_kickoff', lambda: MatchService.get_next_kickoff()),
+        ('rosters.by_team', lambda: TeamRosterService.get_rosters_by_team(team_id, season_id)),
+        ('rosters.by_season', lambda: TeamRosterService.get_rosters_by_season(season_id)),
+        ('players.by_season', lambda: PlayerStatisticsService.get_players_by_season(season_id, team_id)),
+        ('players.detailed_stats', lambda: PlayerStatisticsService.get_player_detailed_stats(player_id, season_id)),
+        ('standings.by_round', lambda: SeasonStandingService.get_standings_by_season(season_id, 1)),
+        ('achievements.by_user', lambda: UserAchievementService.get_achievements_by_user(user_id)),
+    ]
+
+
+def _capture(fn):
+    """Chạy fn, trả về các câu SQL (statement, params) đã phát ra"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and not statement.lstrip().upper().startswith(('PRAGMA', 'EXPLAIN')):
+            statements.append((statement, parameters))
+
+    engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', record)
+    try:
+        fn()
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', record)
+        db.session.rollback()
+    return statements
+
+
+def _full_scans(statement, parameters):
+    """Các bảng lớn bị SCAN toàn bộ trong plan của câu SQL"""
+    rows = db.session.connection().exec_driver_sql(
+        'EXPLAIN QUERY PLAN ' + statement, parameters
+    ).fetchall()
+    aliases = {}
+    for table in HOT_TABLES:
+        aliases[table] = table
+        # Alias trong câu SQL: "FROM Likes l", "JOIN Users AS u"
+        for match in re.finditer(rf'\b{table}\b(?:\s+AS)?\s+(\w+)', statement, re.IGNORECASE):
+            aliases.setdefault(match.group(1), table)
+
+    scans = []
+    for row in rows:
+        match = _SCAN_RE.match(row[-1])
+        if not match:
+            continue
+        table = aliases.get(match.group(1))
+        if table in HOT_TABLES:
+            scans.append(table)
+    return scans
+
+
+def check_query_plans():
+    """
+    Chạy các hot path, trả về danh sách lỗi [(tên, bảng, câu SQL)].
+    Câu SQL giống nhau chỉ kiểm tra một lần
+    """
+    ids = _sample_ids()
+    problems = []
+    seen = set()
+    # Chạy như một request GET: service cần request.host_url, và đọc qua pool 'read' như thật
+    with current_app.test_request_context():
+        for name, fn in hot_paths(ids):
+            for statement, parameters in _capture(fn):
+                if statement in seen:
+                    continue
+                seen.add(statement)
+                for table in _full_scans(statement, parameters):
+                    problems.append((name, table, statement))
+        db.session.rollback()
+    return problems, len(seen)
@@ -0,0 +1,200 @@
+# utils/rank_index.py
+import bisect
+
+class RankIndex:
+    """
+    Bảng xếp hạng trong bộ nhớ: cây Fenwick đếm số user theo từng mức điểm
+    + danh sách user_id đã sắp xếp của mỗi mức điểm.
+    Hạng (bằng điểm thì đồng hạng), vị trí và các user lân cận tìm được trong O(log n);
+    cùng điểm thì xếp theo user_id tăng dần. Điểm là số nguyên, có thể âm
+    """
+    # Số thay đổi trong 1 mức điểm từ ngưỡng này trở lên thì dựng lại cả danh sách
+    # (1 lần sort) thay vì insort/xóa từng phần tử
+    REBUILD_THRESHOLD = 64
+
+    def __init__(self, scores=None):
+        self._scores = {}
+        self._buckets = {}
+        # Cây phủ các mức điểm [_offset, _offset + _capacity)
+        self._offset = 0
+        self._capacity = 1
+        self._tree = [0, 0]
+        if scores:
+            self.update(scores)
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __contains__(self, user_id):
+        return user_id in self._scores
+
+    def score(self, user_id):
+        return self._scores.get(user_id)
+
+    # ===== Cây Fenwick: chỉ số i (1..capacity) ứng với mức điểm offset + i - 1 =====
+
+    def _covers(self, score):
+        return self._offset <= score < self._offset + self._capacity
+
+    def _grow(self, min_score, max_score):
+        """
+        Nới khoảng điểm (capacity là lũy thừa của 2) cho mức điểm mới và dựng lại cây từ số đếm.
+        Điểm âm: hạ offset xuống thêm đúng capacity hiện tại mỗi lần gấp đôi
+        """
+        offset = self._offset
+        capacity = self._capacity
+        while min_score < offset:
+            offset -= capacity
+            capacity *= 2
+        while offset + capacity <= max_score:
+            capacity *= 2
+        tree = [0] * (capacity + 1)
+        for score, bucket in self._buckets.items():
+            tree[score - offset + 1] = len(bucket)
+        for i in range(1, capacity + 1):
+            parent = i + (i & -i)
+            if parent <= capacity:
+                tree[parent] += tree[i]
+        self._offset = offset
+        self._capacity = capacity
+        self._tree = tree
+
+    def _add(self, score, count):
+        i = score - self._offset + 1
+        tree = self._tree
+        capacity = self._capacity
+        while i <= capacity:
+            tree[i] += count
+            i += i & -i
+
+    def _count_upto(self, score):
+        """Số user có điểm <= score"""
+        i = min(score - self._offset + 1, self._capacity)
+        tree = self._tree
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _count_above(self, score):
+        return len(self._scores) - self._count_upto(score)
+
+    def _score_at(self, k):
+        """Mức điểm của phần tử thứ k (đếm từ 0) khi xếp điểm tăng dần"""
+        position = 0
+        step = self._capacity
+        tree = self._tree
+        while step:
+            nxt = position + step
+            if nxt <= self._capacity and tree[nxt] <= k:
+                position = nxt
+                k -= tree[nxt]
+            step //= 2
+        return position + self._offset
+
+    # ===== Truy vấn =====
+
+    def rank(self, user_id):
+        """Hạng của user (1 = cao nhất), None nếu không có trong bảng"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return self._count_above(score) + 1
+
+    def position(self, user_id):
+        """Vị trí (đếm từ 0) của user trong bảng đã sắp xếp, None nếu không có"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        bucket = self._buckets[score]
+        return self._count_above(score) + bisect.bisect_left(bucket, user_id)
+
+    def entries(self, start, count):
+        """Các dòng [start, start + count) của bảng: list (rank, user_id, score)"""
+        total = len(self._scores)
+        start = max(start, 0)
+        end = min(start + max(count, 0), total)
+        result = []
+        pos = start
+        while pos < end:
+            score = self._score_at(total - 1 - pos)
+            above = self._count_above(score)
+            bucket = self._buckets[score]
+            for user_id in bucket[pos - above:end - above]:
+                result.append((above + 1, user_id, score))
+            pos = min(end, above + len(bucket))
+        return result
+
+    def around(self, user_id, before, after):
+        """User và tối đa before/after user đứng ngay trên/dưới"""
+        position = self.position(user_id)
+        if position is None:
+            return []
+        start = max(position - before, 0)
+        return self.entries(start, position - start + after + 1)
+
+    # ===== Cập nhật =====
+
+    def update(self, scores):
+        """Ghi điểm mới cho nhiều user cùng lúc: {user_id: điểm}, điểm None = xóa khỏi bảng"""
+        removed = {}
+        added = {}
+        for user_id, new_score in scores.items():
+            if new_score is not None:
+                new_score = int(new_score)
+            old_score = self._scores.get(user_id)
+            if old_score == new_score:
+                continue
+            if old_score is not None:
+                removed.setdefault(old_score, []).append(user_id)
+                del self._scores[user_id]
+            if new_score is not None:
+                added.setdefault(new_score, []).append(user_id)
+                self._scores[user_id] = new_score
+
+        if not removed and not added:
+            return
+
+        if added and not (self._covers(min(added)) and self._covers(max(added))):
+            # Cây được dựng lại từ số đếm các mức điểm sau khi cập nhật danh sách
+            self._apply_buckets(removed, added)
+            self._grow(min(added), max(added))
+            return
+
+        self._apply_buckets(removed, added)
+        for score, user_ids in removed.items():
+            self._add(score, -len(user_ids))
+        for score, user_ids in added.items():
+            self._add(score, len(user_ids))
+
+    def apply_deltas(self, deltas):
+        """Cộng điểm: {user_id: điểm cộng thêm}, user chưa có trong bảng bắt đầu từ 0"""
+        scores = self._scores
+        self.update({
+            user_id: (scores.get(user_id) or 0) + delta
+            for user_id, delta in deltas.items()
+        })
+
+    def _apply_buckets(self, removed, added):
+        buckets = self._buckets
+        for score in set(removed) | set(added):
+            bucket = buckets.get(score, [])
+            leaving = removed.get(score, ())
+            joining = added.get(score, ())
+
+            if len(leaving) + len(joining) >= self.REBUILD_THRESHOLD:
+                leaving = set(leaving)
+                bucket = [user_id for user_id in bucket if user_id not in leaving]
+                bucket.extend(joining)
+                bucket.sort()
+            else:
+                for user_id in leaving:
+                    del bucket[bisect.bisect_left(bucket, user_id)]
+                for user_id in joining:
+                    bisect.insort(bucket, user_id)
+
+            if bucket:
+                buckets[score] = bucket
+            else:
+                buckets.pop(score, None)
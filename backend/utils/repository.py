@@ -0,0 +1,78 @@
+# utils/repository.py
+# INSERT / UPDATE động cho các service CRUD quản trị: tên cột lấy từ key của request nên
+# phải đối chiếu với cột thật của bảng; câu SQL dựng một lần cho mỗi (bảng, tập cột) rồi dùng lại,
+# RETURNING * trả luôn dòng vừa ghi (không cần SELECT last_insert_rowid() + SELECT lại)
+import threading
+from sqlalchemy import text
+from extensions import db
+
+
+class Repository:
+    _statements = {}      # (thao tác, bảng, cột...) -> TextClause
+    _columns = {}         # bảng -> frozenset tên cột
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _table_columns(table):
+        columns = Repository._columns.get(table)
+        if columns is None:
+            columns = frozenset(db.metadata.tables[table].columns.keys())
+            Repository._columns[table] = columns
+        return columns
+
+    @staticmethod
+    def _check_columns(table, data):
+        """Chỉ nhận key là cột của bảng (tên cột được ghép thẳng vào SQL)"""
+        columns = tuple(sorted(data))
+        unknown = set(columns) - Repository._table_columns(table)
+        if unknown:
+            raise ValueError(f"Invalid column(s) for {table}: {', '.join(sorted(unknown))}")
+        return columns
+
+    @staticmethod
+    def _statement(key, build):
+        statement = Repository._statements.get(key)
+        if statement is None:
+            with Repository._lock:
+                statement = Repository._statements.get(key)
+                if statement is None:
+                    statement = text(build())
+                    Repository._statements[key] = statement
+        return statement
+
+    @staticmethod
+    def insert(table, data):
+        """INSERT 1 dòng (không commit), trả về dict dòng vừa tạo"""
+        columns = Repository._check_columns(table, data)
+
+        def build():
+            if not columns:
+                return f'INSERT INTO {table} DEFAULT VALUES RETURNING *'
+            return (
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join(':' + column for column in columns)}) RETURNING *"
+            )
+
+        statement = Repository._statement(('insert', table) + columns, build)
+        row = db.session.execute(statement, data).mappings().first()
+        return dict(row) if row else None
+
+    @staticmethod
+    def update(table, key_column, key_value, data):
+        """UPDATE 1 dòng theo khóa (không commit), trả về dict dòng sau khi sửa hoặc None nếu không có"""
+        # Khóa chính lấy theo tham số, không cho sửa qua data
+        data = {column: value for column, value in data.items() if column != key_column}
+        columns = Repository._check_columns(table, data)
+
+        def build():
+            if not columns:
+                return f'SELECT * FROM {table} WHERE {key_column} = :{key_column}'
+            return (
+                f"UPDATE {table} SET {', '.join(f'{column} = :{column}' for column in columns)} "
+                f"WHERE {key_column} = :{key_column} RETURNING *"
+            )
+
+        statement = Repository._statement(('update', table, key_column) + columns, build)
+        data[key_column] = key_value
+        row = db.session.execute(statement, data).mappings().first()
+        return dict(row) if row else None
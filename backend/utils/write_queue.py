@@ -0,0 +1,154 @@
+# utils/write_queue.py
+# Gom các thao tác ghi nhỏ (like, bình luận, dự đoán...) về một luồng ghi duy nhất:
+# SQLite chỉ cho một writer, nên thay vì nhiều luồng request tranh khóa rồi báo
+# "database is locked", luồng ghi lấy job từ hàng đợi và commit nhiều job trong một transaction
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from extensions import db
+
+
+class WriteQueueBusy(Exception):
+    """Quá thời gian chờ, job đã bị hủy khỏi hàng đợi (không ghi gì)"""
+    pass
+
+
+class WriteAccepted(Exception):
+    """Quá thời gian chờ nhưng job đang chạy: vẫn được ghi, chỉ là chưa có kết quả"""
+    pass
+
+
+class WriteQueue:
+    BUSY_MESSAGE = "Hệ thống đang bận, vui lòng thử lại sau"
+    ACCEPTED_MESSAGE = "Yêu cầu đã được tiếp nhận và đang được xử lý"
+
+    MAX_BATCH = 64          # Số job tối đa trong một transaction
+    TIMEOUT = 10.0          # Giây request chờ kết quả job
+
+    _app = None
+    _queue = queue.Queue()
+    _thread = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def init_app(cls, app):
+        cls._app = app
+        cls.MAX_BATCH = app.config.get('WRITE_QUEUE_MAX_BATCH', cls.MAX_BATCH)
+        cls.TIMEOUT = app.config.get('WRITE_QUEUE_TIMEOUT', cls.TIMEOUT)
+        if app.config.get('WRITE_QUEUE_ENABLED', True):
+            cls.start()
+
+    @classmethod
+    def start(cls):
+        with cls._lock:
+            if cls._thread is not None and cls._thread.is_alive():
+                return
+            cls._thread = threading.Thread(target=cls._loop, name='write-queue', daemon=True)
+            cls._thread.start()
+        print("✓ Write queue started")
+
+    @classmethod
+    def submit(cls, fn, *args, **kwargs):
+        """
+        Đưa job vào hàng đợi, trả về Future. fn chạy trên luồng ghi trong app context,
+        dùng db.session như bình thường nhưng KHÔNG commit (luồng ghi commit cả lô)
+        """
+        future = Future()
+        cls._queue.put((fn, args, kwargs, future))
+        return future
+
+    @classmethod
+    def run(cls, fn, *args, **kwargs):
+        """
+        Chạy fn qua luồng ghi và chờ kết quả. Chưa bật hàng đợi (CLI, script) hoặc gọi từ
+        chính luồng ghi thì chạy ngay trên session hiện tại và tự commit.
+        Quá TIMEOUT: job còn trong hàng đợi thì hủy -> WriteQueueBusy,
+        job đang chạy (sẽ được commit) -> WriteAccepted
+        """
+        thread = cls._thread
+        if thread is None or not thread.is_alive() or threading.current_thread() is thread:
+            try:
+                result = fn(*args, **kwargs)
+                db.session.commit()
+                return result
+            except Exception:
+                db.session.rollback()
+                raise
+        future = cls.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=cls.TIMEOUT)
+        except FutureTimeoutError:
+            # Luồng ghi bỏ qua job đã hủy (set_running_or_notify_cancel)
+            if future.cancel():
+                raise WriteQueueBusy(cls.BUSY_MESSAGE)
+            if future.done():
+                # Vừa xong đúng lúc hết giờ: trả kết quả / lỗi thật
+                return future.result()
+            raise WriteAccepted(cls.ACCEPTED_MESSAGE)
+
+    @classmethod
+    def error_response(cls, error, status=400):
+        """(body, mã HTTP) cho lỗi trả về từ service có ghi qua hàng đợi"""
+        if error == cls.ACCEPTED_MESSAGE:
+            return {'status': 'accepted', 'message': error}, 202
+        if error == cls.BUSY_MESSAGE:
+            return {'status': 'error', 'message': error}, 503
+        return {'status': 'error', 'message': error}, status
+
+    @classmethod
+    def _loop(cls):
+        while True:
+            jobs = [cls._queue.get()]
+            # Lấy thêm các job đang chờ sẵn, không đợi thêm: lô tự lớn lên khi tải cao
+            while len(jobs) < cls.MAX_BATCH:
+                try:
+                    jobs.append(cls._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with cls._app.app_context():
+                    cls._run_batch(jobs)
+            except Exception as e:
+                print(f"❌ Write queue error: {str(e)}")
+                for job in jobs:
+                    if not job[3].done():
+                        job[3].set_exception(e)
+
+    @classmethod
+    def _run_batch(cls, jobs):
+        session = db.session
+        results = []
+        try:
+            # pysqlite chỉ BEGIN trước câu ghi đầu tiên; BEGIN tường minh để SAVEPOINT bên dưới
+            # lồng trong transaction của lô (RELEASE không tự commit), IMMEDIATE giữ khóa ghi cả lô
+            session.connection().exec_driver_sql('BEGIN IMMEDIATE')
+
+            for fn, args, kwargs, future in jobs:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                # Mỗi job một SAVEPOINT: job lỗi chỉ hoàn tác phần của nó
+                savepoint = session.begin_nested()
+                try:
+                    result = fn(*args, **kwargs)
+                    savepoint.commit()
+                    results.append((future, result, None))
+                except Exception as e:
+                    savepoint.rollback()
+                    results.append((future, None, e))
+
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            for fn, args, kwargs, future in jobs:
+                if not future.done():
+                    future.set_exception(e)
+            print(f"❌ Write queue commit error ({len(jobs)} jobs): {str(e)}")
+            return
+
+        # Chỉ báo kết quả sau khi commit thành công
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)